@@ -3,6 +3,7 @@ from __future__ import annotations
 import time
 import uuid
 import asyncio
+from dataclasses import asdict
 
 from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, UploadFile
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
@@ -244,7 +245,7 @@ def ask(payload: AskIn, request: Request, workspace_id: str = Depends(require_wo
 
         if not unknown:
             ok, _reason = verify_citation_snippets(
-                [h.model_dump() for h in hits],
+                [asdict(h) for h in hits],
                 [c.model_dump() for c in citations],
             )
             ok2, _reason2 = evidence_minimum([c.model_dump() for c in citations], min_chars=80)
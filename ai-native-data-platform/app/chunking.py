@@ -1,5 +1,12 @@
 from __future__ import annotations
 
+import hashlib
+import uuid
+
+# Namespace for deterministic document_chunk primary keys (see chunk_id).
+CHUNK_NS = uuid.UUID("1cc9aa74-f3a0-541e-a7f1-c32b259c905e")
+
+
 def chunk_text(text: str, chunk_size: int = 1200, overlap: int = 200) -> list[str]:
     text = (text or "").strip()
     chunks: list[str] = []
@@ -14,3 +21,23 @@ def chunk_text(text: str, chunk_size: int = 1200, overlap: int = 200) -> list[st
             break
         start = max(0, end - overlap)
     return chunks
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash persisted in document_chunk.chunk_hash.
+
+    Shared by online ingestion and bulk indexing so both paths agree on the
+    column's semantics (hex SHA-256). hashlib is OpenSSL-backed and picks up
+    SHA-NI on x86, so it is not worth changing the digest (which would
+    invalidate every stored hash) for a faster pure-software one.
+    """
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def chunk_id(document_id: str, chunk_index: int, embedding_version: str) -> str:
+    """Deterministic document_chunk primary key.
+
+    Derived from the same tuple as the idempotency conflict key, so a retried
+    insert produces the same id instead of a fresh random one.
+    """
+    return str(uuid.uuid5(CHUNK_NS, f"{document_id}:{int(chunk_index)}:{embedding_version}"))
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 import time
 from collections import OrderedDict
 from typing import Any, Optional
 
+import orjson
+
 from app.core.config import settings
 
 try:
@@ -13,6 +14,10 @@ except Exception:  # pragma: no cover
     redis = None
 
 
+# Tolerate non-str dict keys and numpy scalars/arrays the way callers expect.
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
 class InMemoryLRU:
     def __init__(self, max_items: int, ttl_s: int):
         self.max_items = max_items
@@ -52,13 +57,19 @@ class Cache:
     def __init__(self) -> None:
         self._mem = InMemoryLRU(settings.cache_max_items, settings.cache_ttl_s)
         self._redis = None
+        self._redis_bin = None
         if settings.redis_url and redis is not None:
+            timeout_s = settings.redis_socket_timeout_ms / 1000.0
+            opts = {"socket_connect_timeout": timeout_s, "socket_timeout": timeout_s, "retry_on_timeout": False}
             try:
-                self._redis = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+                self._redis = redis.Redis.from_url(settings.redis_url, decode_responses=True, **opts)
                 # ping to validate
                 self._redis.ping()
+                # Separate client for raw binary values (e.g. float32 vectors).
+                self._redis_bin = redis.Redis.from_url(settings.redis_url, decode_responses=False, **opts)
             except Exception:
                 self._redis = None
+                self._redis_bin = None
 
     def get_json(self, key: str) -> Optional[Any]:
         try:
@@ -66,7 +77,7 @@ class Cache:
                 raw = self._redis.get(key)
                 if raw is None:
                     return None
-                return json.loads(raw)
+                return orjson.loads(raw)
         except Exception:
             return None
 
@@ -75,12 +86,60 @@ class Cache:
     def set_json(self, key: str, value: Any, ttl_s: Optional[int] = None) -> None:
         try:
             if self._redis is not None:
-                self._redis.setex(key, ttl_s or settings.cache_ttl_s, json.dumps(value))
+                self._redis.setex(key, ttl_s or settings.cache_ttl_s, orjson.dumps(value, option=_ORJSON_OPTS))
+                return
+        except Exception:
+            pass
+
+        self._mem.set(key, value)
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        """Raw binary value (e.g. a msgpack payload); None on miss or error."""
+        try:
+            if self._redis_bin is not None:
+                return self._redis_bin.get(key)
+        except Exception:
+            return None
+
+        return self._mem.get(key)
+
+    def set_blob(self, key: str, value: bytes, ttl_s: Optional[int] = None) -> None:
+        try:
+            if self._redis_bin is not None:
+                self._redis_bin.setex(key, ttl_s or settings.cache_ttl_s, value)
                 return
         except Exception:
             pass
 
         self._mem.set(key, value)
 
+    def mget_bytes(self, keys: list[str]) -> list[Optional[bytes]]:
+        """Fetch many raw binary values in one round-trip; misses are None."""
+        if not keys:
+            return []
+        try:
+            if self._redis_bin is not None:
+                return list(self._redis_bin.mget(keys))
+        except Exception:
+            return [None] * len(keys)
+
+        return [self._mem.get(k) for k in keys]
+
+    def set_many_bytes(self, items: dict[str, bytes], ttl_s: Optional[int] = None) -> None:
+        if not items:
+            return
+        try:
+            if self._redis_bin is not None:
+                pipe = self._redis_bin.pipeline(transaction=False)
+                for k, v in items.items():
+                    pipe.setex(k, ttl_s or settings.cache_ttl_s, v)
+                pipe.execute()
+                return
+        except Exception:
+            pass
+
+        for k, v in items.items():
+            self._mem.set(k, v)
+
 
 cache = Cache()
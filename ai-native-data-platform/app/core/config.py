@@ -26,6 +26,14 @@ class Settings(BaseSettings):
         default=2.0,
         description="Max acceptable replay lag (seconds) for routing reads to a replica.",
     )
+    db_statement_timeout_ms: int = Field(
+        default=0,
+        description="Session-level statement_timeout applied when a pooled connection is opened (0, the default, disables it so seeding, reindexing and DDL are not cut off). Latency-sensitive paths still tighten it per transaction with SET LOCAL.",
+    )
+    db_prepared_statements: bool = Field(
+        default=True,
+        description="PREPARE hot retrieval queries once per pooled connection. Disable behind a transaction-pooling PgBouncer.",
+    )
 
     # Multi-tenant hardening
     enforce_tenancy: bool = Field(
@@ -48,8 +56,21 @@ class Settings(BaseSettings):
     # Hybrid candidates + fusion
     hybrid_candidates: int = Field(default=50)
     fusion_method: str = Field(default="rrf", description="rrf | concat")
+    hybrid_lexical_scope: str = Field(
+        default="corpus",
+        description="corpus | dense_candidates. With dense_candidates, hybrid lexical scoring only ranks the dense hits instead of searching the whole corpus.",
+    )
     rrf_k: int = Field(default=60)
 
+    lexical_bm25: bool = Field(
+        default=True,
+        description="Rank lexical hits with pg_textsearch BM25 when its index exists (see ensure_bm25_index); falls back to ts_rank_cd.",
+    )
+    lexical_rank_candidates: int = Field(
+        default=0,
+        description="If > 0, ts_rank_cd scores only the first N full-text matches by chunk id: bounded cost on common terms, but better matches past the cap are missed. 0 ranks every match.",
+    )
+
     # Reranking
     rerank_mode: str = Field(default="mmr", description="none | mmr | cross")
     rerank_candidates: int = Field(default=25)
@@ -58,6 +79,10 @@ class Settings(BaseSettings):
         default=0.70,
         description="Semantic weight for cross reranker stub (alpha*cosine + (1-alpha)*token_overlap).",
     )
+    rerank_embedding_cache_items: int = Field(
+        default=20_000,
+        description="Per-process LRU capacity for candidate embeddings shared by the rerankers.",
+    )
 
     # --- Sharding (logical) for retrieval
     # Example: "postgresql://.../shard0,postgresql://.../shard1"
@@ -65,6 +90,10 @@ class Settings(BaseSettings):
         default="",
         description="Comma-separated DB DSNs for retrieval shards. When set, retrieval can route by document_id hash.",
     )
+    retrieval_shard_replica_dsns: str = Field(
+        default="",
+        description="Read replicas per shard, comma-separated in retrieval_shard_dsns order; each entry is a '|'-separated DSN list (empty for none). A shard that is slow to answer during fan-out is hedged to its first replica.",
+    )
 
     shard_consistency_mode: str = Field(
         default="best_effort",
@@ -85,6 +114,20 @@ class Settings(BaseSettings):
         description="If the first shard hasn't returned in this many ms, issue a hedged request to a second shard.",
     )
 
+    dense_inner_product: bool = Field(
+        default=True,
+        description="Rank dense hits by negative inner product (<#>) over unit-normalized embeddings, which skips the cosine norm division. Disable to fall back to cosine distance (<=>) for data embedded before vectors were normalized. The ANN index opclass must match (vector_ip_ops vs vector_cosine_ops).",
+    )
+    hnsw_ef_search_max: int = Field(
+        default=400,
+        description="Upper bound for the per-query hnsw.ef_search (max(4*k, 40)) set by dense retrieval.",
+    )
+    dense_batch_window_ms: float = Field(
+        default=0.0,
+        description="When >0, concurrent dense searches for the same workspace/shard wait up to this long to share one SQL call (0 disables).",
+    )
+    dense_batch_max_size: int = Field(default=32, description="Max query vectors per batched dense search.")
+
     # --- Retrieval latency budgets (online enforcement)
     retrieval_budget_ms: int = Field(
         default=220,
@@ -108,8 +151,41 @@ class Settings(BaseSettings):
 
     # --- Caching
     redis_url: str = Field(default="", description="Redis URL. When set, enables distributed caching.")
+    redis_socket_timeout_ms: int = Field(
+        default=200,
+        description="Connect and per-command timeout for the Redis cache. An unreachable Redis turns into a fast miss instead of blocking the request.",
+    )
     cache_ttl_s: int = Field(default=300)
     cache_max_items: int = Field(default=10_000)
+    embedding_cache_ttl_s: int = Field(
+        default=86_400,
+        description="TTL for provider embeddings cached by (embedding_version, model, chunk hash). Avoids re-embedding unchanged text across reindex runs.",
+    )
+    qvcache_enabled: bool = Field(
+        default=False,
+        description="Serve dense retrieval for near-duplicate query vectors from an in-process cache (approximate).",
+    )
+    qvcache_threshold: float = Field(
+        default=0.97,
+        description="Initial cosine similarity a query must reach against a cached query to reuse its dense hits.",
+    )
+    qvcache_ttl_s: int = Field(default=60, description="Max age of a cached dense result.")
+    qvcache_max_entries: int = Field(default=2048, description="Cached query vectors per (workspace, version, shard, k) region.")
+    qvcache_max_regions: int = Field(
+        default=256,
+        description="Regions kept before the least recently used is evicted. Region matrices grow on demand, but a full one holds qvcache_max_entries x dim float32s.",
+    )
+    qvcache_verify_rate: float = Field(
+        default=0.02,
+        description="Fraction of cache hits re-run against the DB to measure recall and adapt the region's threshold.",
+    )
+    qvcache_target_recall: float = Field(default=0.90)
+
+    # --- Ingestion
+    ingest_worker_concurrency: int = Field(
+        default=4,
+        description="Number of ingestion worker threads draining the document queue. Work is IO-bound (embed + DB), so threads overlap well.",
+    )
 
     # --- Backpressure / rate control
     max_in_flight_requests: int = Field(default=128)
@@ -8,6 +8,8 @@ Provides three context managers used throughout the platform:
                                      replica_database_urls is configured,
                                      falls back to primary otherwise
   - session_scope()                — alias for write_session_scope (compat)
+  - retrieval_connection(url)      — autocommit Core connection for online
+                                     retrieval reads (single round-trip)
 
 Engine and sessionmaker instances are cached per URL so each DSN gets a
 single connection pool for the lifetime of the process.
@@ -16,7 +18,7 @@ single connection pool for the lifetime of the process.
 from contextlib import contextmanager
 from typing import Generator
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Connection, Engine, create_engine, text
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
@@ -37,6 +39,16 @@ def _replica_urls() -> list[str]:
     return [u.strip() for u in raw.split(",") if u.strip()]
 
 
+def _connect_args(url: str, timeout_ms: int, *options: str) -> dict:
+    # Set statement_timeout (and any extra GUCs) once per physical connection
+    # via libpq startup options instead of a SET round-trip per transaction.
+    if not url.startswith("postgresql"):
+        return {}
+    opts = [f"-c statement_timeout={int(timeout_ms)}"] if int(timeout_ms) > 0 else []
+    opts += [f"-c {o}" for o in options]
+    return {"options": " ".join(opts)} if opts else {}
+
+
 def _get_sessionmaker(url: str) -> sessionmaker:
     if url not in _engine_cache:
         engine = create_engine(
@@ -45,12 +57,35 @@ def _get_sessionmaker(url: str) -> sessionmaker:
             pool_size=5,
             max_overflow=10,
             pool_timeout=30,
+            connect_args=_connect_args(url, settings.db_statement_timeout_ms),
         )
         sm = sessionmaker(bind=engine, autocommit=False, autoflush=False)
         _engine_cache[url] = (engine, sm)
     return _engine_cache[url][1]
 
 
+_retrieval_engines: dict[str, Engine] = {}
+
+
+def _get_retrieval_engine(url: str) -> Engine:
+    # Separate pool whose connections start with the tight retriever timeout,
+    # so hot-path queries need neither a transaction nor SET LOCAL.
+    # force_custom_plan keeps PREPAREd searches from switching to a generic
+    # plan after five executions: with embedding_version as a $n parameter a
+    # generic plan can't use the per-version partial HNSW index.
+    if url not in _retrieval_engines:
+        _retrieval_engines[url] = create_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10,
+            pool_timeout=30,
+            isolation_level="AUTOCOMMIT",
+            connect_args=_connect_args(url, settings.retriever_timeout_ms, "plan_cache_mode=force_custom_plan"),
+        )
+    return _retrieval_engines[url]
+
+
 # ---------------------------------------------------------------------------
 # Public exports for backwards-compatible imports (app.db shim)
 # ---------------------------------------------------------------------------
@@ -82,6 +117,17 @@ def session_scope(url: str | None = None) -> Generator[Session, None, None]:
         session.close()
 
 
+@contextmanager
+def retrieval_connection(url: str | None = None) -> Generator[Connection, None, None]:
+    """Autocommit Core connection for latency-bound retrieval reads.
+
+    Each execute is one round-trip: no ORM session, no BEGIN/COMMIT, and the
+    statement_timeout is already set to retriever_timeout_ms on the connection.
+    """
+    with _get_retrieval_engine(url or _primary_url()).connect() as conn:
+        yield conn
+
+
 @contextmanager
 def write_session_scope() -> Generator[Session, None, None]:
     """Session pinned to the primary (write) database."""
@@ -134,6 +180,7 @@ __all__ = [
     "SessionLocal",
     "engine",
     "session_scope",
+    "retrieval_connection",
     "write_session_scope",
     "read_session_scope",
 ]
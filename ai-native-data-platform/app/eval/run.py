@@ -3,7 +3,7 @@ from __future__ import annotations
 import argparse
 import json
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any
 
@@ -156,7 +156,7 @@ def run_experiment(
 
             if not gen_out.unknown:
                 ok, _ = verify_citation_snippets(
-                    [h.model_dump() for h in hits],
+                    [asdict(h) for h in hits],
                     [cit.model_dump() for cit in gen_out.citations],
                 )
                 ok2, _ = evidence_minimum([cit.model_dump() for cit in gen_out.citations], min_chars=80)
@@ -6,8 +6,8 @@ These are intentionally lightweight (string containment) so they can be:
   - enforced online (cheap)
   - reused in offline evaluation
 
-The rest of the system models retrieved context chunks as the Pydantic
-`RetrievedChunk` schema, which serializes as `{id, text, ...}`. Earlier
+The rest of the system models retrieved context chunks as the
+`RetrievedChunk` dataclass, which serializes as `{id, text, ...}`. Earlier
 iterations of this scaffold used `{chunk_id, chunk_text}`.
 
 To avoid brittle call sites, we accept either shape here.
@@ -15,7 +15,7 @@ To avoid brittle call sites, we accept either shape here.
 
 def verify_citation_snippets(contexts: list[dict], citations: list[dict]) -> tuple[bool, str]:
     # Support both historical shapes:
-    #   - contexts from RetrievedChunk.model_dump(): {"id": ..., "text": ...}
+    #   - contexts from asdict(RetrievedChunk): {"id": ..., "text": ...}
     #   - contexts from older pipelines: {"chunk_id": ..., "chunk_text": ...}
     ctx_by_id: dict[str, str] = {}
     for c in contexts:
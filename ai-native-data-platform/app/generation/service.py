@@ -64,7 +64,7 @@ def run_rag(workspace_id: str, query: str, contexts: list[RetrievedChunk]) -> tu
         t0 = time.time()
         prompt = build_prompt(query, contexts)
         try:
-            raw = generate(prompt).strip()
+            raw = generate(prompt, question=query, workspace_id=workspace_id).strip()
         except Exception as e:  # provider/network/model errors
             raise GenerationFailure("llm_provider_error", f"LLM provider error: {type(e).__name__}: {e}")
 
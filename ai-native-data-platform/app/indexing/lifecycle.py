@@ -5,8 +5,9 @@ import time
 from dataclasses import dataclass
 
 from app.core.observability import emit_event
-from app.indexing.index_state import promote_target_to_active, set_target_embedding_version
+from app.indexing.index_state import get_index_state, promote_target_to_active, set_target_embedding_version
 from app.indexing.pipeline import IndexingConfig, build_manifest, run_manifest
+from app.vectorstore.pgvector_scaling import drop_version_index_if_unused, ensure_version_index
 
 
 @dataclass(frozen=True)
@@ -31,7 +32,9 @@ def reindex_embeddings(
     Operational semantics:
     1) Set workspace target embedding version (DB state).
     2) Run a bulk backfill that writes chunks tagged with target_embedding_version.
-    3) Atomically promote target->active (bump index_epoch).
+    3) Build the target version's ANN index CONCURRENTLY (no table lock).
+    4) Atomically promote target->active (bump index_epoch).
+    5) Drop the previous version's index once no workspace still uses it.
 
     Notes:
     - This design supports **shadow indexing** + **canary retrieval** by keeping
@@ -40,6 +43,7 @@ def reindex_embeddings(
       promotion.
     """
     cfg = cfg or IndexingConfig()
+    old_active_version = get_index_state(workspace_id, ttl_s=0).active_embedding_version
 
     # Persist the target for auditability and for multi-run resumability.
     set_target_embedding_version(workspace_id, target_embedding_version)
@@ -60,13 +64,20 @@ def reindex_embeddings(
         else:
             os.environ["EMBEDDING_VERSION"] = old
 
+    # Warm the ANN index before cutover so post-promotion reads don't seq-scan.
+    index_name = ensure_version_index(target_embedding_version)
+    emit_event("reindex_index_built", {"workspace_id": workspace_id, "index": index_name})
+
     # Cutover.
     promote_target_to_active(workspace_id)
     emit_event("reindex_promoted", {"workspace_id": workspace_id, "new_active_embedding_version": target_embedding_version})
 
+    if old_active_version != target_embedding_version and drop_version_index_if_unused(old_active_version):
+        emit_event("reindex_old_index_dropped", {"workspace_id": workspace_id, "embedding_version": old_active_version})
+
     return ReindexResult(
         workspace_id=workspace_id,
-        old_active_version=stats.get("embedding_version", ""),
+        old_active_version=old_active_version,
         new_active_version=target_embedding_version,
         indexed_docs=int(stats.get("indexed_docs") or 0),
         indexed_chunks=int(stats.get("indexed_chunks") or 0),
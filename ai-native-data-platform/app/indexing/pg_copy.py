@@ -0,0 +1,134 @@
+"""Postgres COPY BINARY encoding for document_chunk rows.
+
+The bulk indexer ships chunk rows with `COPY ... FROM STDIN (FORMAT binary)`
+instead of parameterized INSERTs: no per-row SQL parsing on the server and no
+float -> text formatting of embeddings on the client. Embeddings are written in
+pgvector's binary wire format (int16 dim, int16 unused, float4[dim], all
+big-endian), taken straight from a float32 matrix.
+
+COPY has no ON CONFLICT clause, so rows are copied into a per-connection temp
+staging table and moved with INSERT ... SELECT ... ON CONFLICT DO NOTHING,
+which keeps the backfill idempotent.
+"""
+
+from __future__ import annotations
+
+import io
+import struct
+import uuid
+
+import numpy as np
+
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+CHUNK_COLUMNS = (
+    "id",
+    "document_id",
+    "workspace_id",
+    "chunk_index",
+    "chunk_text",
+    "chunk_hash",
+    "embedding",
+    "embedding_version",
+)
+
+STAGE_TABLE = "_document_chunk_stage"
+
+CREATE_STAGE_SQL = (
+    f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} "
+    f"(LIKE document_chunk INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+
+COPY_STAGE_SQL = f"COPY {STAGE_TABLE} ({', '.join(CHUNK_COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+
+MERGE_STAGE_SQL = (
+    f"INSERT INTO document_chunk ({', '.join(CHUNK_COLUMNS)}) "
+    f"SELECT {', '.join(CHUNK_COLUMNS)} FROM {STAGE_TABLE} "
+    f"ON CONFLICT (document_id, chunk_index, embedding_version) DO NOTHING"
+)
+
+_FIELD_COUNT = struct.pack("!h", len(CHUNK_COLUMNS))
+_UUID_LEN = struct.pack("!i", 16)
+_INT4 = struct.Struct("!ii")
+_LEN = struct.Struct("!i")
+_VEC_HEADER = struct.Struct("!ihh")
+
+
+def as_vector_matrix(vecs) -> np.ndarray:
+    """Stack vectors into one contiguous big-endian float32 matrix.
+
+    The byte swap happens once for the whole batch, after which each row's
+    `tobytes()` is exactly the pgvector binary payload.
+    """
+    return np.ascontiguousarray(np.asarray(vecs, dtype=np.float32), dtype=">f4")
+
+
+class ChunkCopyWriter:
+    """Accumulates document_chunk rows as a COPY BINARY stream.
+
+    Rows are encoded as they are produced, so a pending batch costs its raw
+    wire bytes rather than one dict (plus formatted strings) per chunk.
+    """
+
+    def __init__(self) -> None:
+        self._buf = io.BytesIO()
+        self._buf.write(COPY_HEADER)
+        self._finished = False
+        self.rows = 0
+
+    def write_row(
+        self,
+        *,
+        id: str,
+        document_id: str,
+        workspace_id: str,
+        chunk_index: int,
+        chunk_text: str,
+        chunk_hash: str,
+        embedding: np.ndarray,
+        embedding_version: str,
+    ) -> None:
+        if self._finished:
+            raise RuntimeError("ChunkCopyWriter already finished")
+        w = self._buf.write
+        w(_FIELD_COUNT)
+        w(_UUID_LEN)
+        w(uuid.UUID(id).bytes)
+        w(_UUID_LEN)
+        w(uuid.UUID(document_id).bytes)
+        self._text(workspace_id)
+        w(_INT4.pack(4, int(chunk_index)))
+        self._text(chunk_text)
+        self._text(chunk_hash)
+        dim = int(embedding.shape[0])
+        w(_VEC_HEADER.pack(4 + 4 * dim, dim, 0))
+        w(embedding.astype(">f4", copy=False).tobytes())
+        self._text(embedding_version)
+        self.rows += 1
+
+    def _text(self, value: str) -> None:
+        b = value.encode("utf-8")
+        self._buf.write(_LEN.pack(len(b)))
+        self._buf.write(b)
+
+    def finish(self) -> None:
+        """Append the COPY trailer; no rows may be written afterwards."""
+        if not self._finished:
+            self._buf.write(COPY_TRAILER)
+            self._finished = True
+
+    def getvalue(self) -> bytes:
+        """Complete COPY payload (header + rows + trailer)."""
+        self.finish()
+        return self._buf.getvalue()
+
+    def stream(self) -> io.BytesIO:
+        """File-like COPY payload for cursor.copy_expert, rewound for (re)reads.
+
+        The underlying buffer is handed over directly, so retries re-send the
+        same bytes without copying the batch.
+        """
+        self.finish()
+        self._buf.seek(0)
+        return self._buf
@@ -1,29 +1,63 @@
 from __future__ import annotations
 
-import hashlib
-import json
+import itertools
 import os
 import random
+import threading
 import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 
+import numpy as np
+import orjson
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
 
-from app.chunking import chunk_text
+from app.chunking import chunk_hash, chunk_id, chunk_text
+from app.core.cache import InMemoryLRU
 from app.core.config import settings
 from app.core.observability import emit_event
 from app.data.db import session_scope, write_session_scope
+from app.indexing.pg_copy import (
+    COPY_STAGE_SQL,
+    CREATE_STAGE_SQL,
+    MERGE_STAGE_SQL,
+    ChunkCopyWriter,
+    as_vector_matrix,
+)
 from app.providers.embeddings import embed_batch
 
 
-def _vec_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+try:  # COPY goes through the raw psycopg2 cursor, so its errors aren't wrapped by SQLAlchemy.
+    from psycopg2 import OperationalError as _DriverOperationalError
+except ImportError:  # pragma: no cover
+    _DriverOperationalError = OperationalError
 
+# Candidates for retry; _is_transient_db_error narrows DBAPIError further.
+_TRANSIENT_DB_ERRORS = (DBAPIError, _DriverOperationalError)
 
-def _hash_text(t: str) -> str:
-    return hashlib.sha256(t.encode("utf-8", errors="ignore")).hexdigest()
+
+def _is_transient_db_error(exc: BaseException) -> bool:
+    """Connection loss / server-side operational failures only.
+
+    DBAPIError is also the base of IntegrityError, ProgrammingError and
+    DataError, which will fail the same way on every attempt.
+    """
+    if isinstance(exc, (OperationalError, _DriverOperationalError)):
+        return True
+    return isinstance(exc, DBAPIError) and bool(exc.connection_invalidated)
+
+
+def _iter_doc_ids(path: Path) -> Iterator[str]:
+    """Yield document ids from a manifest one line at a time."""
+    with path.open("rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            yield orjson.loads(line)["document_id"]
 
 
 @dataclass(frozen=True)
@@ -38,13 +72,25 @@ class IndexingConfig:
     batch_size_docs: int = 250
     batch_size_chunks: int = 512
     embedding_batch_size: int = 96
-    statement_timeout_ms: int = 30_000
     manifest_dir: str = "data/index_manifests"
 
     # Failure injection + retries (for soak/backfill hardening)
     fault_injection_rate: float = 0.0  # 0..1 probability of injected failure per doc
     max_retries: int = 3
     retry_backoff_ms: int = 250
+    max_backoff_ms: int = 10_000
+
+    # Cross-batch reuse of embeddings for repeated chunk texts (boilerplate
+    # headers/footers) within a single run.
+    embedding_cache_items: int = 4096
+
+    # Manifest batches indexed concurrently (1 = sequential). Embedding
+    # round-trips dominate, so a few in flight overlap provider latency.
+    max_in_flight_batches: int = 1
+
+
+MANIFEST_FETCH_ROWS = 10_000
+MANIFEST_WRITE_BUFFER = 1 << 20
 
 
 def build_manifest(*, workspace_id: str, limit: int | None = None) -> Path:
@@ -61,12 +107,16 @@ def build_manifest(*, workspace_id: str, limit: int | None = None) -> Path:
     if limit is not None:
         sql += " LIMIT :lim"
 
-    with session_scope() as db:
-        rows = db.execute(text(sql), {"ws": workspace_id, "lim": int(limit or 0)}).mappings().all()
-
-    with out.open("w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps({"document_id": r["id"]}) + "\n")
+    # Stream ids through a server-side cursor straight into the file, so a
+    # large workspace is never held in memory as one result list.
+    with session_scope() as db, out.open("wb", buffering=MANIFEST_WRITE_BUFFER) as f:
+        ids = db.execute(
+            text(sql),
+            {"ws": workspace_id, "lim": int(limit or 0)},
+            execution_options={"yield_per": MANIFEST_FETCH_ROWS},
+        ).scalars()
+        for doc_id in ids:
+            f.write(orjson.dumps({"document_id": doc_id}) + b"\n")
 
     return out
 
@@ -85,8 +135,10 @@ def run_manifest(
     - Chunk inserts are idempotent via (document_id, chunk_index, embedding_version).
 
     Throughput:
+    - Up to cfg.max_in_flight_batches manifest batches run concurrently.
     - Chunk texts are embedded in batches via embed_batch.
-    - Inserts are executed in bulk.
+    - Embeddings are staged as one float32 matrix per embed batch and rows are
+      shipped with COPY BINARY (see app.indexing.pg_copy).
     """
     cfg = cfg or IndexingConfig()
     embedding_version = embedding_version or settings.embedding_version
@@ -97,8 +149,13 @@ def run_manifest(
     indexed_chunks = 0
     skipped_docs = 0
 
-    def _flush_chunk_batch(chunk_rows: list[dict]) -> int:
-        if not chunk_rows:
+    # chunk_hash -> vector, scoped to this run (the TTL only needs to outlive it).
+    # Shared by concurrent batches, hence the lock.
+    emb_cache = InMemoryLRU(cfg.embedding_cache_items, ttl_s=24 * 3600)
+    emb_cache_lock = threading.Lock()
+
+    def _flush_chunk_batch(writer: ChunkCopyWriter) -> int:
+        if not writer.rows:
             return 0
 
         # Failure injection to validate retry/idempotency behavior during backfills.
@@ -107,47 +164,52 @@ def run_manifest(
             raise RuntimeError("injected_flush_failure")
 
         attempt = 0
+
+        def _backoff_or_raise(exc: BaseException) -> None:
+            nonlocal attempt
+            attempt += 1
+            if attempt > int(cfg.max_retries):
+                raise exc
+            # Exponential backoff with jitter
+            backoff_ms = min(int(cfg.max_backoff_ms), int(cfg.retry_backoff_ms) * (2 ** (attempt - 1)))
+            time.sleep((backoff_ms / 1000.0) + random.random() * 0.05)
+
+        # One connection checkout and one outer transaction per flush; each
+        # attempt runs inside a SAVEPOINT so a transient failure only rolls
+        # back that attempt. A fresh session is only taken if the connection
+        # itself is lost (the savepoint rollback then fails too).
         while True:
             try:
                 with write_session_scope() as db:
-                    db.execute(text("SET LOCAL statement_timeout = :ms"), {"ms": int(cfg.statement_timeout_ms)})
-                    db.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk (
-                              id, document_id, workspace_id, chunk_index, chunk_text, chunk_hash, embedding, embedding_version
-                            )
-                            VALUES (
-                              :id, :document_id, :workspace_id, :chunk_index, :chunk_text, :chunk_hash, CAST(:embedding AS vector), :embedding_version
-                            )
-                            ON CONFLICT (document_id, chunk_index, embedding_version) DO NOTHING
-                            """
-                        ),
-                        chunk_rows,
-                    )
-                return len(chunk_rows)
-            except Exception:
-                attempt += 1
-                if attempt > int(cfg.max_retries):
+                    db.execute(text(CREATE_STAGE_SQL))
+                    cur = db.connection().connection.cursor()
+                    while True:
+                        sp = db.begin_nested()
+                        try:
+                            cur.copy_expert(COPY_STAGE_SQL, writer.stream())
+                            db.execute(text(MERGE_STAGE_SQL))
+                            sp.commit()
+                            break
+                        except _TRANSIENT_DB_ERRORS as e:
+                            # Only transient DB errors are retried; anything else
+                            # (bad data, programming errors) fails fast.
+                            if not _is_transient_db_error(e):
+                                raise
+                            sp.rollback()
+                            _backoff_or_raise(e)
+                return writer.rows
+            except _TRANSIENT_DB_ERRORS as e:
+                if not _is_transient_db_error(e):
                     raise
-                # Exponential backoff with jitter
-                backoff_ms = min(int(cfg.max_backoff_ms), int((2 ** (attempt - 1)) * 100))
-                time.sleep((backoff_ms / 1000.0) + random.random() * 0.05)
+                _backoff_or_raise(e)
 
-
-    with path.open("r", encoding="utf-8") as f:
-        doc_ids: list[str] = []
-        for line in f:
-            if not line.strip():
-                continue
-            doc_ids.append(json.loads(line)["document_id"])
-
-    # Process in doc batches to keep memory bounded.
-    for i in range(0, len(doc_ids), cfg.batch_size_docs):
-        batch = doc_ids[i : i + cfg.batch_size_docs]
+    def _index_batch(batch: list[str]) -> tuple[int, int, int]:
+        """Index one manifest batch; returns (docs, chunks, skipped docs)."""
+        batch_docs = 0
+        batch_chunks = 0
+        batch_skipped = 0
 
         with session_scope() as db:
-            db.execute(text("SET LOCAL statement_timeout = :ms"), {"ms": int(cfg.statement_timeout_ms)})
             rows = db.execute(
                 text(
                     """
@@ -161,54 +223,79 @@ def run_manifest(
 
         docs = {r["id"]: (r.get("text") or "") for r in rows}
 
-        # Produce chunk rows and embed in batches.
-        pending_chunk_rows: list[dict] = []
+        # Produce chunk rows and embed in batches. Rows are encoded straight
+        # into the COPY buffer as they are staged.
+        pending_copy = ChunkCopyWriter()
         pending_chunk_texts: list[str] = []
-        pending_chunk_meta: list[tuple[str, int, str]] = []  # (doc_id, idx, text)
+        pending_chunk_meta: list[tuple[str, int, str, str]] = []  # (doc_id, idx, text, hash)
 
         def _embed_and_stage() -> None:
-            nonlocal pending_chunk_rows, pending_chunk_texts, pending_chunk_meta, indexed_chunks
+            nonlocal pending_copy, pending_chunk_texts, pending_chunk_meta, batch_chunks
             if not pending_chunk_texts:
                 return
-            vecs = embed_batch(pending_chunk_texts)
-            for (doc_id, chunk_idx, ch_text), vec in zip(pending_chunk_meta, vecs, strict=False):
-                pending_chunk_rows.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "document_id": doc_id,
-                        "workspace_id": workspace_id,
-                        "chunk_index": int(chunk_idx),
-                        "chunk_text": ch_text,
-                        "chunk_hash": _hash_text(ch_text),
-                        "embedding": _vec_literal(vec),
-                        "embedding_version": embedding_version,
-                    }
+
+            # Dedupe by content hash so identical chunks (within the batch or
+            # already seen this run) are only sent to the provider once.
+            vec_by_hash: dict[str, np.ndarray] = {}
+            to_embed: dict[str, str] = {}
+            with emb_cache_lock:
+                for _, _, ch_text, h in pending_chunk_meta:
+                    if h in vec_by_hash or h in to_embed:
+                        continue
+                    cached = emb_cache.get(h)
+                    if cached is not None:
+                        vec_by_hash[h] = cached
+                    else:
+                        to_embed[h] = ch_text
+            if to_embed:
+                mat = as_vector_matrix(embed_batch(list(to_embed.values()), embedding_version=embedding_version))
+                with emb_cache_lock:
+                    for h, vec in zip(to_embed, mat, strict=True):
+                        vec_by_hash[h] = vec
+                        emb_cache.set(h, vec)
+
+            for doc_id, chunk_idx, ch_text, h in pending_chunk_meta:
+                pending_copy.write_row(
+                    id=chunk_id(doc_id, chunk_idx, embedding_version),
+                    document_id=doc_id,
+                    workspace_id=workspace_id,
+                    chunk_index=chunk_idx,
+                    chunk_text=ch_text,
+                    chunk_hash=h,
+                    embedding=vec_by_hash[h],
+                    embedding_version=embedding_version,
                 )
 
             pending_chunk_texts = []
             pending_chunk_meta = []
 
-            if len(pending_chunk_rows) >= cfg.batch_size_chunks:
-                indexed_chunks += _flush_chunk_batch(pending_chunk_rows)
-                pending_chunk_rows = []
+            if pending_copy.rows >= cfg.batch_size_chunks:
+                batch_chunks += _flush_chunk_batch(pending_copy)
+                pending_copy = ChunkCopyWriter()
 
         for doc_id in batch:
             text_body = docs.get(doc_id)
             if not text_body:
-                skipped_docs += 1
+                batch_skipped += 1
                 continue
             chunks = chunk_text(text_body)
             for cidx, ch in enumerate(chunks):
                 pending_chunk_texts.append(ch)
-                pending_chunk_meta.append((doc_id, cidx, ch))
+                pending_chunk_meta.append((doc_id, cidx, ch, chunk_hash(ch)))
                 if len(pending_chunk_texts) >= cfg.embedding_batch_size:
                     _embed_and_stage()
-            indexed_docs += 1
+            batch_docs += 1
 
         # Flush tail
         _embed_and_stage()
-        indexed_chunks += _flush_chunk_batch(pending_chunk_rows)
-
+        batch_chunks += _flush_chunk_batch(pending_copy)
+        return batch_docs, batch_chunks, batch_skipped
+
+    def _record(counts: tuple[int, int, int]) -> None:
+        nonlocal indexed_docs, indexed_chunks, skipped_docs
+        indexed_docs += counts[0]
+        indexed_chunks += counts[1]
+        skipped_docs += counts[2]
         emit_event(
             "bulk_index_progress",
             {
@@ -219,6 +306,30 @@ def run_manifest(
             },
         )
 
+    # Stream the manifest and process it in doc batches so memory stays
+    # bounded by batch_size_docs (x in-flight batches) rather than the
+    # manifest size.
+    doc_iter = _iter_doc_ids(path)
+    batches = iter(lambda: list(itertools.islice(doc_iter, cfg.batch_size_docs)), [])
+    in_flight = max(1, int(cfg.max_in_flight_batches))
+    if in_flight == 1:
+        for batch in batches:
+            _record(_index_batch(batch))
+    else:
+        # Batches are independent (idempotent inserts keyed per chunk) and the
+        # work is dominated by embedding round-trips, so a few run at once.
+        # Submission is bounded to keep provider load and memory in check.
+        with ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="bulk-index") as pool:
+            pending: set = set()
+            for batch in batches:
+                if len(pending) >= in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        _record(fut.result())
+                pending.add(pool.submit(_index_batch, batch))
+            for fut in as_completed(pending):
+                _record(fut.result())
+
     return {
         "workspace_id": workspace_id,
         "manifest": str(path),
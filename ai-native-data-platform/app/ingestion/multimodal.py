@@ -14,6 +14,7 @@ from app.core.observability import INGEST_JOBS, emit_event
 from app.data.db import write_session_scope
 from app.providers.embeddings import embed
 from app.providers.vision import caption_image
+from app.vectorstore.encoding import vec_literal
 
 _mm_jobs: "queue.Queue[_ImageJob]" = queue.Queue()
 _started = False
@@ -63,10 +64,6 @@ def _hash_bytes(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
-def _vec_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
-
-
 def _process_job(job: _ImageJob) -> None:
     for page_number, (img_bytes, mime_type) in enumerate(job.images):
         image_hash = _hash_bytes(img_bytes)
@@ -108,7 +105,7 @@ def _process_job(job: _ImageJob) -> None:
                     "external_id": job.external_id,
                     "page_number": page_number,
                     "caption": caption,
-                    "embedding": _vec_literal(embedding),
+                    "embedding": vec_literal(embedding),
                     "embedding_version": settings.embedding_version,
                     "image_hash": image_hash,
                 },
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import hashlib
 import queue
 import threading
 import time
@@ -11,8 +10,9 @@ from sqlalchemy import text
 from app.core.config import settings
 from app.core.observability import INGEST_JOBS, INGEST_LATENCY, emit_event, timer
 from app.data.db import write_session_scope
-from app.chunking import chunk_text
+from app.chunking import chunk_hash, chunk_id, chunk_text
 from app.providers.embeddings import embed
+from app.vectorstore.encoding import vec_literal
 
 _jobs: "queue.Queue[str]" = queue.Queue()
 _started = False
@@ -23,12 +23,19 @@ def enqueue(document_id: str) -> None:
 
 
 def start_worker() -> None:
+    """Start the ingestion worker pool.
+
+    process_document spends most of its time waiting on the embeddings
+    provider and Postgres, so several threads draining the same queue keep
+    multiple documents in flight without a full asyncio rewrite.
+    """
     global _started
     if _started:
         return
     _started = True
-    t = threading.Thread(target=_loop, daemon=True)
-    t.start()
+    for i in range(max(1, int(settings.ingest_worker_concurrency))):
+        t = threading.Thread(target=_loop, name=f"ingest-worker-{i}", daemon=True)
+        t.start()
 
 
 def _loop() -> None:
@@ -42,14 +49,6 @@ def _loop() -> None:
             _jobs.task_done()
 
 
-def _vec_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
-
-
-def _hash_text(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
-
-
 def process_document(document_id: str) -> None:
     """Idempotent ingestion run: chunk, embed, and persist.
 
@@ -85,7 +84,7 @@ def process_document(document_id: str) -> None:
 
                 ws = str(doc.get("workspace_id"))
                 for idx, ch in enumerate(chunks):
-                    chash = _hash_text(ch)
+                    chash = chunk_hash(ch)
                     v = embed(ch)
                     db.execute(
                         text(
@@ -96,13 +95,13 @@ def process_document(document_id: str) -> None:
                             """
                         ),
                         {
-                            "id": str(uuid.uuid4()),
+                            "id": chunk_id(document_id, idx, settings.embedding_version),
                             "document_id": document_id,
                             "workspace_id": ws,
                             "chunk_index": idx,
                             "chunk_text": ch,
                             "chunk_hash": chash,
-                            "embedding": _vec_literal(v),
+                            "embedding": vec_literal(v),
                             "embedding_version": settings.embedding_version,
                         },
                     )
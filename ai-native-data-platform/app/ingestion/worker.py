@@ -9,6 +9,7 @@ from app.db import SessionLocal
 from app.chunking import chunk_text
 from app.providers.embeddings import embed
 from app.observability import INGEST_JOBS, INGEST_LATENCY, timer
+from app.vectorstore.encoding import vec_literal
 
 _jobs: "queue.Queue[uuid.UUID]" = queue.Queue()
 _started = False
@@ -34,9 +35,6 @@ def _loop() -> None:
         finally:
             _jobs.task_done()
 
-def _vec_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
-
 def process_document(document_id: uuid.UUID) -> None:
     run_id = uuid.uuid4()
     with SessionLocal() as db:
@@ -60,7 +58,7 @@ def process_document(document_id: uuid.UUID) -> None:
 
                 for idx, ch in enumerate(chunks):
                     v = embed(ch)
-                    vlit = _vec_literal(v)
+                    vlit = vec_literal(v)
 
                     db.execute(
                         text("""
@@ -1,22 +1,48 @@
 from __future__ import annotations
+import hashlib
 import os
 import numpy as np
-import httpx
+import orjson
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.chunking import chunk_hash
+from app.core.cache import cache
+from app.core.config import settings
+from app.providers.http import get_client
+
 EMBED_DIM = int(os.getenv("EMBED_DIM", "384"))
 PROVIDER = os.getenv("EMBED_PROVIDER", "mock").lower()
-TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_S", "20"))
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_EMBED_MODEL = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
 
-def _hash_to_vec(s: str, dim: int) -> np.ndarray:
-    rng = np.random.default_rng(abs(hash(s)) % (2**32))
-    v = rng.normal(size=dim).astype(np.float32)
-    v /= (np.linalg.norm(v) + 1e-12)
+def _hash_to_vec_batch(strs: list[str], dim: int) -> np.ndarray:
+    """Deterministic mock embeddings for many strings at once.
+
+    Each string's SHAKE-256 stream supplies `dim` uint32 words that are mapped
+    to [-1, 1) and L2-normalized for the whole batch in one NumPy pass. Unlike
+    the builtin hash(), the digest is stable across processes, so the ingestion
+    worker and the API agree on vectors for the same text.
+    """
+    if not strs:
+        return np.empty((0, dim), dtype=np.float32)
+    raw = b"".join(hashlib.shake_256(s.encode("utf-8", errors="ignore")).digest(4 * dim) for s in strs)
+    words = np.frombuffer(raw, dtype="<u4").reshape(len(strs), dim)
+    v = words.astype(np.float32) * np.float32(2.0 / 2**32) - np.float32(1.0)
+    v /= np.linalg.norm(v, axis=1, keepdims=True) + np.float32(1e-12)
     return v
 
+
+def _hash_to_vec(s: str, dim: int) -> np.ndarray:
+    return _hash_to_vec_batch([s], dim)[0]
+
+
+def _l2_normalize(vecs: list[list[float]]) -> list[list[float]]:
+    """Unit-normalize provider vectors so dense retrieval can rank by inner product."""
+    m = np.asarray(vecs, dtype=np.float32)
+    m /= np.linalg.norm(m, axis=-1, keepdims=True) + np.float32(1e-12)
+    return m.tolist()
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.3, min=0.3, max=3))
 def _openai_embed(text: str) -> list[float]:
     if not OPENAI_API_KEY:
@@ -26,15 +52,14 @@ def _openai_embed(text: str) -> list[float]:
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
     payload = {"model": OPENAI_EMBED_MODEL, "input": text}
 
-    with httpx.Client(timeout=TIMEOUT) as client:
-        r = client.post(url, json=payload, headers=headers)
-        r.raise_for_status()
-        data = r.json()
+    r = get_client().post(url, json=payload, headers=headers)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
 
     vec = data["data"][0]["embedding"]
     if not isinstance(vec, list):
         raise RuntimeError("Unexpected embeddings response shape")
-    return vec
+    return _l2_normalize([vec])[0]
 
 def embed(text: str) -> list[float]:
     text = (text or "").strip()
@@ -65,10 +90,9 @@ def _openai_embed_batch(texts: list[str]) -> list[list[float]]:
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
     payload = {"model": OPENAI_EMBED_MODEL, "input": texts}
 
-    with httpx.Client(timeout=TIMEOUT) as client:
-        r = client.post(url, json=payload, headers=headers)
-        r.raise_for_status()
-        data = r.json()
+    r = get_client().post(url, json=payload, headers=headers)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
 
     rows = data.get("data") or []
     # API returns list of objects with an `embedding` field.
@@ -80,13 +104,49 @@ def _openai_embed_batch(texts: list[str]) -> list[list[float]]:
         out.append(vec)
     if len(out) != len(texts):
         raise RuntimeError("Embeddings batch size mismatch")
-    return out
+    return _l2_normalize(out) if out else out
+
 
+def _embedding_cache_key(text: str, embedding_version: str) -> str:
+    return f"emb:{embedding_version}:{OPENAI_EMBED_MODEL}:{chunk_hash(text)}"
 
-def embed_batch(texts: list[str]) -> list[list[float]]:
+
+def _cached_openai_embed_batch(texts: list[str], embedding_version: str) -> list[list[float]]:
+    """Provider batch embeddings behind a (version, model, content hash) cache.
+
+    One MGET resolves the whole batch; only misses (deduped) go to the
+    provider, and their vectors are written back as raw float32 bytes.
+    Cache failures behave like misses.
+    """
+    keys = [_embedding_cache_key(t, embedding_version) for t in texts]
+    out: list[list[float] | None] = [None] * len(texts)
+    missing: dict[str, str] = {}
+    for i, raw in enumerate(cache.mget_bytes(keys)):
+        if raw:
+            out[i] = np.frombuffer(raw, dtype=np.float32).tolist()
+        else:
+            missing.setdefault(keys[i], texts[i])
+
+    if missing:
+        fresh = dict(zip(missing, _openai_embed_batch(list(missing.values())), strict=True))
+        cache.set_many_bytes(
+            {k: np.asarray(v, dtype=np.float32).tobytes() for k, v in fresh.items()},
+            ttl_s=settings.embedding_cache_ttl_s,
+        )
+        for i, k in enumerate(keys):
+            if out[i] is None:
+                out[i] = fresh[k]
+
+    return out  # type: ignore[return-value]
+
+
+def embed_batch(texts: list[str], *, embedding_version: str | None = None) -> list[list[float]]:
     """Embed many inputs.
 
-    For the mock provider we deterministically hash each string.
+    For the mock provider we deterministically hash each string. Provider
+    calls go through the embedding cache (see _cached_openai_embed_batch),
+    keyed by the embedding_version being written (default: settings), so a
+    reindex into a new version never reuses vectors cached for the old one.
     """
     cleaned: list[str] = []
     for t in texts:
@@ -96,6 +156,6 @@ def embed_batch(texts: list[str]) -> list[list[float]]:
         cleaned.append(s)
 
     if PROVIDER == "openai":
-        return _openai_embed_batch(cleaned)
+        return _cached_openai_embed_batch(cleaned, embedding_version or settings.embedding_version)
 
-    return [_hash_to_vec(s, EMBED_DIM).tolist() for s in cleaned]
+    return _hash_to_vec_batch(cleaned, EMBED_DIM).tolist()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import atexit
+import importlib.util
+import os
+import threading
+
+import httpx
+
+TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_S", "20"))
+MAX_CONNECTIONS = int(os.getenv("PROVIDER_HTTP_MAX_CONNECTIONS", "32"))
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to pooled
+# HTTP/1.1 keep-alive when it isn't installed.
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_client: httpx.Client | None = None
+_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Process-wide pooled client for provider APIs.
+
+    Creating an httpx.Client per call pays a TCP + TLS handshake every time;
+    one shared client keeps connections alive (and multiplexes them over
+    HTTP/2 when available) across calls and threads.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=HTTP2,
+                    timeout=TIMEOUT,
+                    # httpx already defaults to this; pinned so provider
+                    # responses stay compressed if those defaults change.
+                    headers={"Accept-Encoding": "gzip, deflate"},
+                    limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+                )
+                atexit.register(_client.close)
+    return _client
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import json
 import os
+import random
 import threading
 import time
+from typing import Iterable, NamedTuple
 
 import httpx
+import orjson
 from tenacity import (
     retry,
     retry_if_exception,
@@ -13,11 +15,28 @@ from tenacity import (
     wait_exponential,
 )
 
+from app.providers.http import get_client
+from app.providers.prompt_cache import cached_generate
+
 PROVIDER = os.getenv("LLM_PROVIDER", "mock").lower()
-TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_S", "20"))
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4.1-mini")
+CHAT_TEMPERATURE = 0.2
+_SYSTEM_MESSAGE = {"role": "system", "content": "Return ONLY valid JSON matching the requested schema. No extra text."}
+
+
+class _BreakerState(NamedTuple):
+    state: str  # closed | open | half_open
+    failures: int
+    successes: int  # consecutive successful probes while half-open
+    until_ns: int  # monotonic; open: cooldown end, half_open: when an unanswered probe may be retried
+
+
+_CLOSED = _BreakerState("closed", 0, 0, 0)
+
+# +/- fraction applied to each cooldown so replicas don't probe in lockstep.
+_COOLDOWN_JITTER = 0.2
 
 
 class CircuitBreaker:
@@ -25,54 +44,83 @@ class CircuitBreaker:
 
     This is intentionally dependency-free and conservative:
       - opens after N consecutive failures
-      - stays open for a cooldown period
-      - half-opens for a single trial request
+      - stays open for a jittered cooldown period
+      - half-opens for a single trial request at a time, and closes again
+        after `success_threshold` consecutive successful trials
+
+    State lives in one immutable snapshot that is swapped by reference (atomic
+    under the GIL), so the hot path - a closed breaker allowing a call and a
+    success that changes nothing - reads it without locking. The lock is only
+    taken for transitions and failure counting.
 
     In real deployments, you'd back this with shared state (Redis) per
     upstream/provider region.
     """
 
-    def __init__(self, *, failure_threshold: int, cooldown_s: float):
+    def __init__(self, *, failure_threshold: int, cooldown_s: float, success_threshold: int = 1):
         self.failure_threshold = max(1, int(failure_threshold))
         self.cooldown_s = max(1.0, float(cooldown_s))
+        self.cooldown_ns = int(self.cooldown_s * 1e9)
+        self.success_threshold = max(1, int(success_threshold))
         self._lock = threading.Lock()
-        self._state = "closed"  # closed | open | half_open
-        self._failures = 0
-        self._opened_at = 0.0
+        self._snap = _CLOSED
+        # Seeded per process: deterministic for a given worker, different
+        # across workers.
+        self._jitter = random.Random(os.getpid())
+
+    def _cooldown_ns(self) -> int:
+        return int(self.cooldown_ns * (1.0 + self._jitter.uniform(-_COOLDOWN_JITTER, _COOLDOWN_JITTER)))
 
     def allow(self) -> bool:
-        now = time.time()
+        snap = self._snap
+        if snap.state == "closed":
+            return True
+        now = time.monotonic_ns()
+        if now < snap.until_ns:
+            return False
+
         with self._lock:
-            if self._state == "closed":
+            snap = self._snap
+            if snap.state == "closed":
                 return True
-            if self._state == "open":
-                if (now - self._opened_at) >= self.cooldown_s:
-                    self._state = "half_open"
-                    return True
+            if now < snap.until_ns:
                 return False
-            # half-open allows exactly one in-flight attempt
-            self._state = "open"
-            self._opened_at = now
+            # Cooldown over (open), or the previous probe never reported back
+            # (half-open): let exactly one trial through.
+            self._snap = _BreakerState("half_open", snap.failures, snap.successes, now + self.cooldown_ns)
             return True
 
     def on_success(self) -> None:
+        if self._snap is _CLOSED:
+            return
         with self._lock:
-            self._state = "closed"
-            self._failures = 0
-            self._opened_at = 0.0
+            snap = self._snap
+            if snap.state == "half_open" and snap.successes + 1 < self.success_threshold:
+                # Keep probing one request at a time until enough succeed.
+                self._snap = snap._replace(successes=snap.successes + 1, until_ns=0)
+            else:
+                self._snap = _CLOSED
 
     def on_failure(self) -> None:
-        now = time.time()
+        now = time.monotonic_ns()
         with self._lock:
-            self._failures += 1
-            if self._failures >= self.failure_threshold:
-                self._state = "open"
-                self._opened_at = now
+            snap = self._snap
+            # Bounded so a long outage doesn't grow the counter forever.
+            failures = min(snap.failures + 1, 2 * self.failure_threshold)
+            if snap.state == "half_open" or failures >= self.failure_threshold:
+                self._snap = _BreakerState("open", failures, 0, now + self._cooldown_ns())
+            else:
+                self._snap = snap._replace(failures=failures)
 
 
 CB_FAILURE_THRESHOLD = int(os.getenv("LLM_CB_FAILURE_THRESHOLD", "5"))
 CB_COOLDOWN_S = float(os.getenv("LLM_CB_COOLDOWN_S", "20"))
-_cb = CircuitBreaker(failure_threshold=CB_FAILURE_THRESHOLD, cooldown_s=CB_COOLDOWN_S)
+CB_SUCCESS_THRESHOLD = int(os.getenv("LLM_CB_SUCCESS_THRESHOLD", "1"))
+_cb = CircuitBreaker(
+    failure_threshold=CB_FAILURE_THRESHOLD,
+    cooldown_s=CB_COOLDOWN_S,
+    success_threshold=CB_SUCCESS_THRESHOLD,
+)
 
 
 def _retryable(e: Exception) -> bool:
@@ -85,6 +133,23 @@ def _retryable(e: Exception) -> bool:
     return False
 
 
+def _collect_stream_content(lines: Iterable[str]) -> str:
+    """Assemble `choices[0].delta.content` from chat-completion SSE lines."""
+    parts: list[str] = []
+    for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        choices = orjson.loads(data).get("choices") or []
+        if choices:
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                parts.append(delta)
+    return "".join(parts)
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=0.4, min=0.4, max=4),
@@ -102,64 +167,91 @@ def _openai_chat(prompt: str) -> str:
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
     payload = {
         "model": OPENAI_CHAT_MODEL,
-        "messages": [
-            {"role": "system", "content": "Return ONLY valid JSON matching the requested schema. No extra text."},
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.2,
+        "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+        "temperature": CHAT_TEMPERATURE,
+        "stream": True,
     }
 
     try:
-        with httpx.Client(timeout=TIMEOUT) as client:
-            r = client.post(url, json=payload, headers=headers)
+        with get_client().stream("POST", url, json=payload, headers=headers) as r:
+            # Non-2xx raises here, before any body is consumed, so tenacity
+            # still retries 5xx/408/429 as before.
             r.raise_for_status()
-            data = r.json()
+            content = _collect_stream_content(r.iter_lines())
         _cb.on_success()
-        return data["choices"][0]["message"]["content"]
+        return content
     except Exception:
         _cb.on_failure()
         raise
 
-def generate(prompt: str) -> str:
-    if PROVIDER == "openai":
-        return _openai_chat(prompt)
 
-    # Mock generator keeps the system runnable with no external deps.
-    # It performs a tiny amount of prompt parsing so the included eval suite
-    # can run deterministically in CI without network calls.
+def _parse_context_blocks(prompt: str) -> list[dict]:
+    """Extract context blocks (document_id, chunk_id, text) from the prompt.
 
-    # Extract context blocks (document_id, chunk_id, text) from the prompt.
-    blocks: list[dict] = []
+    Single pass over line offsets: header fields are sliced out directly and
+    each block's text body is one slice from the line after `text:` up to the
+    next `[CTX ...]` header, instead of splitting the prompt into a list and
+    concatenating lines. Header fields are only read in a block's preamble
+    (before `text:`); body lines that look like headers stay part of the text.
+    """
+    blocks: list[dict] = [None] * prompt.count("[CTX ")  # type: ignore[list-item]
+    n = 0
     cur: dict | None = None
-    in_text = False
-    for line in prompt.splitlines():
-        line_stripped = line.strip("\n")
-
-        if line_stripped.startswith("[CTX ") and line_stripped.endswith("]"):
-            if cur:
-                blocks.append(cur)
+    text_start = -1
+    pos = 0
+    end = len(prompt)
+
+    def _close(text_end: int) -> None:
+        if cur is not None and text_start >= 0:
+            body = prompt[text_start:text_end]
+            cur["text"] = body if not body or body.endswith("\n") else body + "\n"
+
+    while pos < end:
+        nl = prompt.find("\n", pos)
+        line_end = end if nl == -1 else nl
+        next_pos = line_end + 1
+
+        if prompt.startswith("[CTX ", pos) and prompt[line_end - 1] == "]":
+            _close(pos)
             cur = {"document_id": "", "chunk_id": "", "text": ""}
-            in_text = False
-            continue
-
-        if cur is None:
-            continue
-
-        if line_stripped.startswith("document_id:"):
-            cur["document_id"] = line_stripped.split(":", 1)[1].strip()
-            continue
-        if line_stripped.startswith("chunk_id:"):
-            cur["chunk_id"] = line_stripped.split(":", 1)[1].strip()
-            continue
-        if line_stripped.startswith("text:"):
-            in_text = True
-            continue
+            blocks[n] = cur
+            n += 1
+            text_start = -1
+        elif cur is not None and text_start < 0:
+            if prompt.startswith("document_id:", pos):
+                cur["document_id"] = prompt[pos + 12 : line_end].strip()
+            elif prompt.startswith("chunk_id:", pos):
+                cur["chunk_id"] = prompt[pos + 9 : line_end].strip()
+            elif prompt.startswith("text:", pos):
+                text_start = min(next_pos, end)
+        pos = next_pos
+
+    _close(end)
+    del blocks[n:]
+    return blocks
+
+
+def generate(prompt: str, *, question: str | None = None, workspace_id: str | None = None) -> str:
+    """Generate a response for `prompt`.
+
+    `question` / `workspace_id` (the raw user question and its tenant) enable
+    the semantic response cache for RAG prompts; see prompt_cache.
+    """
+    if PROVIDER == "openai":
+        return cached_generate(
+            prompt,
+            model=OPENAI_CHAT_MODEL,
+            temperature=CHAT_TEMPERATURE,
+            call=_openai_chat,
+            question=question,
+            workspace_id=workspace_id,
+        )
 
-        if in_text:
-            cur["text"] += (line + "\n")
+    # Mock generator keeps the system runnable with no external deps.
+    # It performs a tiny amount of prompt parsing so the included eval suite
+    # can run deterministically in CI without network calls.
 
-    if cur:
-        blocks.append(cur)
+    blocks = _parse_context_blocks(prompt)
 
     # Heuristic: if any context mentions onboarding, answer with that.
     # Otherwise, default to unknown.
@@ -181,7 +273,7 @@ def generate(prompt: str) -> str:
         if not snippet:
             snippet = text[:80].strip()
 
-        return json.dumps(
+        return orjson.dumps(
             {
                 "answer": "The biggest customer pain point is onboarding (onboarding friction / setup complexity).",
                 "unknown": False,
@@ -194,13 +286,13 @@ def generate(prompt: str) -> str:
                 ],
                 "followups": ["Track onboarding drop-off and iterate on the first-run experience."],
             }
-        )
+        ).decode()
 
-    return json.dumps(
+    return orjson.dumps(
         {
             "answer": "I don’t know based on the provided context.",
             "unknown": True,
             "citations": [],
             "followups": ["Ingest more documents into this workspace."],
         }
-    )
+    ).decode()
@@ -0,0 +1,165 @@
+"""Response cache in front of the chat provider.
+
+RAG traffic repeats itself: the same workspace asks the same question and
+retrieval returns the same context blocks, so the LLM sees byte-identical
+prompts. Two tiers avoid paying a provider round-trip for those:
+
+  - exact: SHA-256 over (model, temperature, prompt) in the shared cache
+    (Redis when configured, otherwise the in-process LRU)
+  - semantic (opt-in): cosine nearest neighbour over embeddings of the user
+    question only, held in-process with one index per (workspace, model,
+    temperature). Embedding the whole prompt would let the shared retrieved
+    context dominate, so different questions over the same context (or the
+    same context in another tenant) could clear the threshold.
+
+Only answered responses are stored. `unknown=true` outputs depend on what is
+missing from the corpus and should be recomputed once more documents land.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import orjson
+
+from app.core.cache import cache
+
+PROMPT_CACHE_TTL_S = int(os.getenv("LLM_PROMPT_CACHE_TTL_S", "3600"))
+SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "0").lower() in ("1", "true", "yes")
+SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_MAX_ITEMS = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_ITEMS", "1024"))
+SEMANTIC_MAX_SCOPES = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_SCOPES", "256"))
+
+
+def prompt_key(model: str, temperature: float, prompt: str) -> str:
+    h = hashlib.sha256(f"{model}|{temperature}|{prompt}".encode("utf-8")).hexdigest()
+    return f"llm:{h}"
+
+
+def cacheable(raw: str) -> bool:
+    """Store only well-formed, answered responses."""
+    try:
+        data = orjson.loads(raw)
+    except (TypeError, orjson.JSONDecodeError):
+        return False
+    return isinstance(data, dict) and not data.get("unknown", False)
+
+
+class SemanticIndex:
+    """Bounded in-process cosine index over prompt embeddings.
+
+    Rows are unit-normalized, so a lookup is one matrix-vector product. The
+    matrix grows by doubling up to max_items; once full, the oldest entry is
+    overwritten (ring buffer).
+    """
+
+    def __init__(self, *, max_items: int, threshold: float):
+        self.max_items = max(1, int(max_items))
+        self.threshold = float(threshold)
+        self._lock = threading.Lock()
+        self._vecs: np.ndarray | None = None
+        self._values: list[str] = []
+        self._next = 0
+
+    def _unit(self, vec) -> np.ndarray | None:
+        v = np.asarray(vec, dtype=np.float32).ravel()
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else None
+
+    def get(self, vec) -> str | None:
+        q = self._unit(vec)
+        if q is None:
+            return None
+        with self._lock:
+            if self._vecs is None or not self._values or self._vecs.shape[1] != q.shape[0]:
+                return None
+            sims = self._vecs[: len(self._values)] @ q
+            i = int(sims.argmax())
+            return self._values[i] if sims[i] >= self.threshold else None
+
+    def put(self, vec, value: str) -> None:
+        v = self._unit(vec)
+        if v is None:
+            return
+        with self._lock:
+            if self._vecs is None or self._vecs.shape[1] != v.shape[0]:
+                self._vecs = np.zeros((min(16, self.max_items), v.shape[0]), dtype=np.float32)
+                self._values = []
+                self._next = 0
+            i = self._next
+            if i >= self._vecs.shape[0]:
+                grown = np.zeros((min(2 * self._vecs.shape[0], self.max_items), v.shape[0]), dtype=np.float32)
+                grown[: self._vecs.shape[0]] = self._vecs
+                self._vecs = grown
+            self._vecs[i] = v
+            if i < len(self._values):
+                self._values[i] = value
+            else:
+                self._values.append(value)
+            self._next = (i + 1) % self.max_items
+
+
+# (workspace_id, model, temperature) -> index; least recently used scope is
+# evicted past SEMANTIC_MAX_SCOPES.
+_semantic: OrderedDict[tuple[str, str, float], SemanticIndex] = OrderedDict()
+_semantic_lock = threading.Lock()
+
+
+def _semantic_index(workspace_id: str, model: str, temperature: float) -> SemanticIndex:
+    scope = (workspace_id, model, float(temperature))
+    with _semantic_lock:
+        idx = _semantic.get(scope)
+        if idx is None:
+            idx = _semantic[scope] = SemanticIndex(max_items=SEMANTIC_MAX_ITEMS, threshold=SEMANTIC_THRESHOLD)
+            while len(_semantic) > SEMANTIC_MAX_SCOPES:
+                _semantic.popitem(last=False)
+        else:
+            _semantic.move_to_end(scope)
+        return idx
+
+
+def _embed_question(question: str) -> list[float]:
+    # Same embedding model as retrieval; imported lazily to keep the LLM
+    # provider importable without the embeddings stack.
+    from app.providers.embeddings import embed
+
+    return embed(question)
+
+
+def cached_generate(
+    prompt: str,
+    *,
+    model: str,
+    temperature: float,
+    call,
+    question: str | None = None,
+    workspace_id: str | None = None,
+) -> str:
+    """Return a cached response for `prompt` or compute it with `call(prompt)`.
+
+    The semantic tier only applies when the caller supplies the user
+    `question` and its `workspace_id`; other prompts use the exact tier only.
+    """
+    key = prompt_key(model, temperature, prompt)
+    hit = cache.get_json(key)
+    if isinstance(hit, str):
+        return hit
+
+    vec = index = None
+    if SEMANTIC_CACHE and question and workspace_id:
+        index = _semantic_index(workspace_id, model, temperature)
+        vec = _embed_question(question)
+        hit = index.get(vec)
+        if hit is not None:
+            return hit
+
+    raw = call(prompt)
+    if cacheable(raw):
+        cache.set_json(key, raw, ttl_s=PROMPT_CACHE_TTL_S)
+        if index is not None:
+            index.put(vec, raw)
+    return raw
@@ -7,6 +7,7 @@ different freshness levels. A platform typically exposes a **consistency mode**
 so callers can choose between...
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Iterable
 
@@ -21,16 +22,29 @@ class ShardConsistency:
     index_epoch: str | None
 
 
+_MAX_EPOCH_FETCH_WORKERS = 8
+
+
+def _fetch_epoch(dsn: str) -> ShardConsistency:
+    try:
+        with session_scope(dsn) as db:
+            row = db.execute(text("SELECT index_epoch::text FROM shard_state LIMIT 1")).fetchone()
+        return ShardConsistency(dsn=dsn, index_epoch=row[0] if row else None)
+    except Exception:
+        return ShardConsistency(dsn=dsn, index_epoch=None)
+
+
 def fetch_shard_epochs(shard_dsns: Iterable[str]) -> list[ShardConsistency]:
-    out: list[ShardConsistency] = []
-    for dsn in shard_dsns:
-        try:
-            with session_scope(dsn) as db:
-                row = db.execute(text("SELECT index_epoch::text FROM shard_state LIMIT 1")).fetchone()
-            out.append(ShardConsistency(dsn=dsn, index_epoch=row[0] if row else None))
-        except Exception:
-            out.append(ShardConsistency(dsn=dsn, index_epoch=None))
-    return out
+    """Read every shard's index epoch, one shard per thread.
+
+    The lookups run concurrently so a strict-consistency check costs the
+    slowest shard's round-trip rather than the sum. Results keep input order.
+    """
+    dsns = list(shard_dsns)
+    if len(dsns) <= 1:
+        return [_fetch_epoch(dsn) for dsn in dsns]
+    with ThreadPoolExecutor(max_workers=min(_MAX_EPOCH_FETCH_WORKERS, len(dsns))) as ex:
+        return list(ex.map(_fetch_epoch, dsns))
 
 
 def consistent_epochs(epochs: list[ShardConsistency]) -> bool:
@@ -8,23 +8,41 @@ import yaml
 
 from app.core.config import settings
 from app.retrieval.pipeline import RetrievalPipeline
-from app.retrieval.retrievers.dense import DenseRetriever
+from app.retrieval.retrievers.dense import BatchingDenseRetriever, DenseRetriever
 from app.retrieval.retrievers.lexical import LexicalRetriever
 from app.retrieval.retrievers.multimodal import MultimodalDenseRetriever
 from app.retrieval.rerankers.mmr import MMRReranker
 from app.retrieval.rerankers.cross_encoder_stub import CrossEncoderStubReranker
 
 
+# LibYAML's C loader when PyYAML was built with it; same safe semantics.
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@lru_cache(maxsize=64)
+def _parse_experiment_file(path: str, mtime: float) -> dict[str, Any]:
+    # mtime is part of the cache key so edited experiment files are re-read.
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
 def _load_experiment_config(experiment: str) -> dict[str, Any]:
     # Accept explicit file path, otherwise look in app/eval/experiments.
     path = experiment
-    if not (os.path.isfile(path) and path.endswith((".yml", ".yaml"))):
+    if not path.endswith((".yml", ".yaml")) or not os.path.isfile(path):
         path = os.path.join("app", "eval", "experiments", f"{experiment}.yaml")
-    if not os.path.isfile(path):
+    try:
+        return _parse_experiment_file(path, os.path.getmtime(path))
+    except FileNotFoundError:
         return {}
 
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+
+def _dense() -> DenseRetriever:
+    if settings.dense_batch_window_ms > 0:
+        return BatchingDenseRetriever(
+            window_ms=settings.dense_batch_window_ms, max_batch=settings.dense_batch_max_size
+        )
+    return DenseRetriever()
 
 
 def _pick(d: dict[str, Any], *keys: str, default: Any = None) -> Any:
@@ -51,6 +69,9 @@ def build_pipeline(experiment: str | None = None) -> RetrievalPipeline:
     fusion = str(_pick(cfg, "retrieval", "fusion", default=settings.fusion_method) or "rrf").lower()
     rrf_k = int(_pick(cfg, "retrieval", "rrf_k", default=settings.rrf_k) or settings.rrf_k)
 
+    lexical_scope = str(
+        _pick(cfg, "retrieval", "lexical_scope", default=settings.hybrid_lexical_scope) or "corpus"
+    ).lower()
     rerank_mode = str(_pick(cfg, "retrieval", "rerank", default=settings.rerank_mode) or "none").lower()
     mmr_lambda = float(_pick(cfg, "retrieval", "mmr_lambda", default=settings.mmr_lambda) or settings.mmr_lambda)
     cross_alpha = float(
@@ -62,13 +83,13 @@ def build_pipeline(experiment: str | None = None) -> RetrievalPipeline:
         # Unified dense retrieval across text + image chunks.
         retrievers = [MultimodalDenseRetriever()]
     elif mode == "dense":
-        retrievers = [DenseRetriever()]
+        retrievers = [_dense()]
     elif mode == "lexical":
         retrievers = [LexicalRetriever()]
     else:
         # hybrid: use multimodal dense when MULTIMODAL_RETRIEVAL=true, else standard dense.
-        dense = MultimodalDenseRetriever() if settings.multimodal_retrieval else DenseRetriever()
-        retrievers = [dense, LexicalRetriever()]
+        dense = MultimodalDenseRetriever() if settings.multimodal_retrieval else _dense()
+        retrievers = [dense, LexicalRetriever(candidates_only=(lexical_scope == "dense_candidates"))]
 
     reranker = None
     if rerank_mode == "mmr":
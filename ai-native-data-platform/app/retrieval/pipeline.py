@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import hashlib
-import json
-import threading
+import heapq
 import time
-from dataclasses import dataclass
-from typing import Protocol, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache, partial
+from typing import Callable, Protocol, Sequence
+
+import msgpack
+import numpy as np
 
 from app.core.cache import cache
 from app.core.config import settings
@@ -13,7 +17,8 @@ from app.core.observability import RETRIEVAL_LATENCY, persist_trace, timer
 from app.indexing.index_state import get_index_state
 from app.schemas import RetrievedChunk
 from app.retrieval.slo import LatencyBudget
-from app.retrieval.routing import choose_shards
+from app.retrieval.routing import choose_shards, shard_replicas
+from app.retrieval.rerankers._vectors import unit_vector
 
 
 class Retriever(Protocol):
@@ -39,7 +44,60 @@ class Retriever(Protocol):
 
 
 class Reranker(Protocol):
-    def rerank(self, query: str, query_vec: list[float], docs: list[RetrievedChunk], k: int) -> list[RetrievedChunk]: ...
+    """Reranker interface.
+
+    query_vec_unit, when given, is query_vec already L2-normalized (float32);
+    the pipeline computes it once per request so cosines are plain dot products.
+    """
+
+    def rerank(
+        self,
+        query: str,
+        query_vec: list[float],
+        docs: list[RetrievedChunk],
+        k: int,
+        *,
+        query_vec_unit: np.ndarray | None = None,
+    ) -> list[RetrievedChunk]: ...
+
+
+# Shard calls run on shared pools; abandoned (slower or over-budget) calls
+# finish there in the background without holding up the request. Hedged calls
+# get their own pool because a hedge is itself awaited from a fan-out worker,
+# and waiting on a queue you are occupying can deadlock under load.
+_FANOUT_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="retrieval-fanout")
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="retrieval-hedge")
+
+
+def _run_work(
+    work: list[tuple[int, Callable[[], list[RetrievedChunk]]]],
+    budget: LatencyBudget,
+) -> dict[int, list[RetrievedChunk]]:
+    """Run (stage index, call) pairs on the fan-out pool within the budget.
+
+    Returns hits merged per stage index. Calls still running when the budget
+    expires are cancelled (or left to finish unobserved); if nothing has
+    finished by then we still wait for the first call.
+    """
+    if not work:
+        return {}
+    if len(work) == 1:
+        i, fn = work[0]
+        return {i: fn()}
+
+    futures = [_FANOUT_POOL.submit(fn) for _i, fn in work]
+    done, pending = wait(futures, timeout=budget.remaining_ms() / 1000.0)
+    if not done:
+        done, pending = wait(futures, return_when=FIRST_COMPLETED)
+    for fut in pending:
+        fut.cancel()
+
+    # Merge in submission order so results don't depend on timing.
+    merged: dict[int, list[RetrievedChunk]] = {}
+    for (i, _fn), fut in zip(work, futures):
+        if fut in done:
+            merged.setdefault(i, []).extend(fut.result())
+    return merged
 
 
 def _shards(workspace_id: str, query: str):
@@ -53,46 +111,81 @@ def _hedged_retrieve(
     query: str,
     k: int,
     query_vec: list[float],
-    dsns: list[str | None],
+    dsns: Sequence[str | None],
     embedding_version: str,
+    budget: LatencyBudget | None = None,
 ) -> list[RetrievedChunk]:
     """Tail-latency mitigation via request hedging.
 
-    If shard fanout is 1 but multiple shards exist, we issue a second request
-    after a small delay and take the union. This is a simplified, dependency-
-    free hedging strategy for p95/p99 protection.
+    dsns[0] is queried first; only if it has not answered within
+    shard_hedge_after_ms is the same request sent to dsns[1] (a second shard
+    when fanout is 1, or the shard's read replica during fan-out). The first
+    successful response wins and the slower call is abandoned (its result is
+    discarded).
+
+    With a budget, the hedge fires after at most half of the remaining time,
+    and only if the budget can still give the hedge as long as the primary
+    has had.
     """
 
     if len(dsns) <= 1 or int(settings.shard_hedge_after_ms or 0) <= 0:
         return r.retrieve(workspace_id, query, k=k, query_vec=query_vec, database_url=dsns[0], embedding_version=embedding_version)
 
-    primary = dsns[0]
-    hedge = dsns[1]
-    delay_s = max(0.0, float(settings.shard_hedge_after_ms) / 1000.0)
+    delay_ms = float(settings.shard_hedge_after_ms)
+    if budget is not None:
+        delay_ms = min(delay_ms, budget.remaining_ms() * 0.5)
+
+    def _call(dsn: str | None) -> list[RetrievedChunk]:
+        return r.retrieve(workspace_id, query, k=k, query_vec=query_vec, database_url=dsn, embedding_version=embedding_version)
+
+    pending = {_HEDGE_POOL.submit(_call, dsns[0])}
+    done, _ = wait(pending, timeout=max(0.0, delay_ms / 1000.0))
+    if not done or next(iter(done)).exception() is not None:
+        if budget is None or budget.allow(int(delay_ms)):
+            pending.add(_HEDGE_POOL.submit(_call, dsns[1]))
+
+    error: BaseException = RuntimeError("hedged retrieval produced no result")
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                return fut.result()
+            error = fut.exception()
+    raise error
+
+
+@lru_cache(maxsize=4096)
+def _cache_key_str(raw: str) -> str:
+    # 128-bit BLAKE2b: same 32 hex chars as the old truncated SHA-256, cheaper
+    # to compute, and memoized for hot repeated queries.
+    h = hashlib.blake2b(raw.encode("utf-8", errors="ignore"), digest_size=16).hexdigest()
+    return f"retrieval:{h}"
 
-    out: list[RetrievedChunk] = []
-    lock = threading.Lock()
 
-    def _call(dsn: str | None, *, delay: float) -> None:
-        if delay:
-            time.sleep(delay)
-        res = r.retrieve(workspace_id, query, k=k, query_vec=query_vec, database_url=dsn, embedding_version=embedding_version)
-        with lock:
-            out.extend(res)
+def _cache_key(parts: Sequence[str]) -> str:
+    return _cache_key_str("|".join(parts))
 
-    t1 = threading.Thread(target=_call, kwargs={"dsn": primary, "delay": 0.0})
-    t2 = threading.Thread(target=_call, kwargs={"dsn": hedge, "delay": delay_s})
-    t1.start()
-    t2.start()
-    t1.join()
-    t2.join()
-    return out
 
+def _pack_cached(entry: dict) -> bytes | None:
+    # Retrieval results are cached as msgpack: binary floats and no JSON text
+    # round-trip on the hottest read path. Anything msgpack can't encode is
+    # simply not cached.
+    try:
+        return msgpack.packb(entry, use_bin_type=True)
+    except (TypeError, ValueError):
+        return None
 
-def _cache_key(parts: Sequence[str]) -> str:
-    raw = "|".join(parts)
-    h = hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()[:32]
-    return f"retrieval:{h}"
+
+def _unpack_cached(blob: bytes | None) -> dict | None:
+    if not blob:
+        return None
+    try:
+        entry = msgpack.unpackb(blob, raw=False)
+    except (msgpack.UnpackException, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
 
 
 @dataclass
@@ -132,9 +225,13 @@ class RetrievalPipeline:
             str(rerank_candidates),
             query.strip().lower(),
         ])
-        cached = cache.get_json(key)
+        cached = _unpack_cached(cache.get_blob(key))
         if cached is not None:
-            hits = [RetrievedChunk(**d) for d in cached.get("hits", [])]
+            # Cached hits were validated when they were written: trace the raw
+            # dicts as-is and build models (without re-validation) only for
+            # what is returned.
+            raw_hits = cached.get("hits", [])[:k]
+            hits = [RetrievedChunk(**d) for d in raw_hits]
             persist_trace(
                 trace_type="retrieval",
                 workspace_id=workspace_id,
@@ -143,14 +240,14 @@ class RetrievalPipeline:
                     "cache_key": key,
                     "experiment": self.experiment,
                     "embedding_version": embedding_version,
-                    "hits": [d.model_dump() for d in hits],
+                    "hits": raw_hits,
                 },
                 latency_ms=int(cached.get("latency_ms", 0)),
             )
-            return hits[:k], int(cached.get("latency_ms", 0))
+            return hits, int(cached.get("latency_ms", 0))
 
         with timer(RETRIEVAL_LATENCY):
-            t0 = time.time()
+            t0 = time.monotonic_ns()
 
             stage_results: list[list[RetrievedChunk]] = []
             routed = _shards(workspace_id, query)
@@ -175,29 +272,15 @@ class RetrievalPipeline:
             budget = LatencyBudget.start(settings.retrieval_budget_ms)
 
             # Fan-out to shards and merge per stage.
-            for r in self.retrievers:
-                if budget.expired():
-                    break
-                merged: list[RetrievedChunk] = []
-                # If we only query a single shard (fanout==1) but have multiple
-                # shards available, hedge to protect tail latency.
-                if len(shard_dsns) >= 2 and int(settings.retrieval_shard_fanout or 0) == 1:
-                    merged.extend(
-                        _hedged_retrieve(
-                            r,
-                            workspace_id=workspace_id,
-                            query=query,
-                            k=rerank_candidates,
-                            query_vec=query_vec,
-                            dsns=shard_dsns,
-                            embedding_version=embedding_version,
-                        )
-                    )
-                else:
-                    for dsn in shard_dsns:
-                        if budget.expired():
-                            break
-                        merged.extend(r.retrieve(workspace_id, query, k=rerank_candidates, query_vec=query_vec, database_url=dsn, embedding_version=embedding_version))
+            for merged in self._fan_out(
+                workspace_id,
+                query,
+                query_vec=query_vec,
+                k=rerank_candidates,
+                shard_dsns=shard_dsns,
+                embedding_version=embedding_version,
+                budget=budget,
+            ):
                 # Keep best per id (dedupe across shards)
                 by_id: dict[str, RetrievedChunk] = {}
                 for doc in merged:
@@ -210,18 +293,15 @@ class RetrievalPipeline:
 
             out = fused
             if self.reranker and budget.allow(settings.reranker_timeout_ms):
-                out = self.reranker.rerank(query, query_vec, fused, k=k)
+                out = self.reranker.rerank(query, query_vec, fused, k=k, query_vec_unit=unit_vector(query_vec))
             else:
                 out = out[:k]
 
-            latency_ms = int((time.time() - t0) * 1000)
-            cache.set_json(
-                key,
-                {
-                    "hits": [d.model_dump() for d in out],
-                    "latency_ms": latency_ms,
-                },
-            )
+            latency_ms = (time.monotonic_ns() - t0) // 1_000_000
+            hit_dicts = [asdict(d) for d in out]
+            blob = _pack_cached({"hits": hit_dicts, "latency_ms": latency_ms})
+            if blob is not None:
+                cache.set_blob(key, blob)
 
             persist_trace(
                 trace_type="retrieval",
@@ -241,15 +321,114 @@ class RetrievalPipeline:
                     "shard_epochs": routed.epochs,
                     "budget_ms": settings.retrieval_budget_ms,
                     "stages": [len(x) for x in stage_results],
-                    "hits": [d.model_dump() for d in out],
+                    "hits": hit_dicts,
                 },
                 latency_ms=latency_ms,
             )
             return out, latency_ms
 
+    def _fan_out(
+        self,
+        workspace_id: str,
+        query: str,
+        *,
+        query_vec: list[float],
+        k: int,
+        shard_dsns: Sequence[str | None],
+        embedding_version: str,
+        budget: LatencyBudget,
+    ) -> list[list[RetrievedChunk]]:
+        """Run every (retriever x shard) call concurrently within the budget.
+
+        Returns one merged hit list per retriever that produced a result, in
+        retriever order. Calls still running when the budget expires are
+        cancelled (or left to finish unobserved) and count as empty; if
+        nothing has finished by then we still wait for the first call, so a
+        slow backend degrades to partial results rather than none.
+        """
+        if budget.expired():
+            return []
+
+        # Candidate scorers (lexical with candidates_only) don't search the
+        # corpus: they score the first-pass hits in a second, cheap phase.
+        scorers = [(i, r) for i, r in enumerate(self.retrievers) if getattr(r, "candidates_only", False)]
+
+        # If we only query a single shard (fanout==1) but have multiple
+        # shards available, hedge to protect tail latency.
+        hedged = len(shard_dsns) >= 2 and int(settings.retrieval_shard_fanout or 0) == 1
+        replicas = shard_replicas()
+        work: list[tuple[int, Callable[[], list[RetrievedChunk]]]] = []
+        for i, r in enumerate(self.retrievers):
+            if getattr(r, "candidates_only", False):
+                continue
+            if hedged:
+                work.append((i, partial(
+                    _hedged_retrieve,
+                    r,
+                    workspace_id=workspace_id,
+                    query=query,
+                    k=k,
+                    query_vec=query_vec,
+                    dsns=shard_dsns,
+                    embedding_version=embedding_version,
+                    budget=budget,
+                )))
+            else:
+                for dsn in shard_dsns:
+                    if dsn in replicas:
+                        # A slow shard would set the tail for the whole
+                        # fan-out; hedge it to its read replica.
+                        work.append((i, partial(
+                            _hedged_retrieve,
+                            r,
+                            workspace_id=workspace_id,
+                            query=query,
+                            k=k,
+                            query_vec=query_vec,
+                            dsns=(dsn, replicas[dsn][0]),
+                            embedding_version=embedding_version,
+                            budget=budget,
+                        )))
+                        continue
+                    work.append((i, partial(
+                        r.retrieve,
+                        workspace_id,
+                        query,
+                        k=k,
+                        query_vec=query_vec,
+                        database_url=dsn,
+                        embedding_version=embedding_version,
+                    )))
+
+        merged = _run_work(work, budget)
+
+        if scorers and not budget.expired():
+            ids = list(dict.fromkeys(d.id for hits in merged.values() for d in hits))
+            if ids:
+                # Chunk ids are unique across shards, so every shard scores
+                # the full list; ids living elsewhere simply don't match.
+                merged.update(_run_work([
+                    (i, partial(
+                        r.score_candidates,
+                        workspace_id,
+                        query,
+                        ids,
+                        database_url=dsn,
+                        embedding_version=embedding_version,
+                    ))
+                    for i, r in scorers
+                    for dsn in shard_dsns
+                ], budget))
+
+        return [merged[i] for i in sorted(merged)]
+
     def _fuse(self, results: list[list[RetrievedChunk]], *, top_k: int) -> list[RetrievedChunk]:
         if not results:
             return []
+        if len(results) == 1:
+            # One stage (dense-only / lexical-only): each stage is already
+            # deduped and sorted, so fusion would only relabel scores.
+            return results[0][:top_k]
         if self.fusion_method == "concat":
             seen = set()
             out: list[RetrievedChunk] = []
@@ -264,18 +443,15 @@ class RetrievalPipeline:
             return out
 
         # Reciprocal Rank Fusion
+        rrf_k = self.rrf_k
         scores: dict[str, float] = {}
         by_id: dict[str, RetrievedChunk] = {}
         for stage in results:
             for rank, d in enumerate(stage, start=1):
-                scores[d.id] = scores.get(d.id, 0.0) + 1.0 / (self.rrf_k + rank)
+                scores[d.id] = scores.get(d.id, 0.0) + 1.0 / (rrf_k + rank)
                 if d.id not in by_id:
                     by_id[d.id] = d
 
-        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
-        out: list[RetrievedChunk] = []
-        for cid, s in ranked[:top_k]:
-            d = by_id[cid]
-            d.score = float(s)
-            out.append(d)
-        return out
+        ranked = heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+        # Copy rather than mutate: the stage hits may be shared with callers.
+        return [replace(by_id[cid], score=float(s)) for cid, s in ranked]
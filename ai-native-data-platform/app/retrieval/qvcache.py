@@ -0,0 +1,151 @@
+"""Semantic query-vector cache for dense retrieval.
+
+Dense retrieval is a DB round-trip plus an ANN traversal per request, even when
+successive queries are near-duplicates ("how do I reset my password" vs
+"how can I reset my password"). This cache remembers recent query vectors and
+their hits per *region* - (workspace_id, embedding_version, index_epoch,
+database_url, k) - and serves a new query from the most similar cached query
+when their cosine similarity clears the region's threshold.
+
+Each region keeps its unit query vectors in one float32 matrix, so a lookup is
+a single matrix-vector product over at most `max_entries` rows. The matrix
+starts small and doubles as entries arrive, so the many regions that only ever
+see a handful of queries don't each pay for `max_entries` rows.
+
+Hits are approximate by construction, so each region adapts its threshold: a
+small fraction of hits is re-run against the DB, recall of the cached answer is
+folded into an EWMA, and the threshold is nudged up when recall falls below the
+target (and relaxed slowly when it is comfortably above).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Hashable
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas import RetrievedChunk
+
+_EWMA_ALPHA = 0.2
+_THRESHOLD_STEP_UP = 0.005
+_THRESHOLD_STEP_DOWN = 0.001
+_MAX_THRESHOLD = 0.999
+_INITIAL_ROWS = 16
+
+
+class _Region:
+    def __init__(self, dim: int, capacity: int, threshold: float):
+        rows = min(_INITIAL_ROWS, capacity)
+        self.capacity = capacity
+        self.vecs = np.zeros((rows, dim), dtype=np.float32)
+        self.hits: list[list[RetrievedChunk]] = []
+        self.stored_at = np.zeros(rows, dtype=np.float64)
+        self.next = 0
+        self.threshold = threshold
+        self.recall_ewma: float | None = None
+
+    def ensure_row(self, i: int) -> None:
+        """Grow the matrices (doubling, capped at capacity) so row i exists."""
+        rows = self.vecs.shape[0]
+        if i < rows:
+            return
+        new_rows = min(max(2 * rows, i + 1), self.capacity)
+        vecs = np.zeros((new_rows, self.vecs.shape[1]), dtype=np.float32)
+        vecs[:rows] = self.vecs
+        stored_at = np.zeros(new_rows, dtype=np.float64)
+        stored_at[:rows] = self.stored_at
+        self.vecs, self.stored_at = vecs, stored_at
+
+
+class QVCache:
+    def __init__(
+        self,
+        *,
+        threshold: float,
+        ttl_s: float,
+        max_entries: int,
+        target_recall: float,
+        max_regions: int = 1024,
+    ):
+        self.base_threshold = float(threshold)
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.target_recall = float(target_recall)
+        self.max_regions = max(1, int(max_regions))
+        self._regions: "OrderedDict[Hashable, _Region]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, region: Hashable, q_unit: np.ndarray) -> list[RetrievedChunk] | None:
+        with self._lock:
+            r = self._regions.get(region)
+            if r is None or not r.hits or r.vecs.shape[1] != q_unit.shape[0]:
+                return None
+            self._regions.move_to_end(region)
+            n = len(r.hits)
+            sims = r.vecs[:n] @ q_unit
+            sims[r.stored_at[:n] < time.monotonic() - self.ttl_s] = -np.inf
+            i = int(sims.argmax())
+            if sims[i] < r.threshold:
+                return None
+            hits = r.hits[i]
+        # Callers (fusion, rerankers) mutate score/meta; hand out copies.
+        return [replace(h) for h in hits]
+
+    def put(self, region: Hashable, q_unit: np.ndarray, hits: list[RetrievedChunk]) -> None:
+        with self._lock:
+            r = self._regions.get(region)
+            if r is None or r.vecs.shape[1] != q_unit.shape[0]:
+                r = _Region(q_unit.shape[0], self.max_entries, self.base_threshold)
+                self._regions[region] = r
+                while len(self._regions) > self.max_regions:
+                    self._regions.popitem(last=False)
+            self._regions.move_to_end(region)
+            i = r.next
+            r.ensure_row(i)
+            r.vecs[i] = q_unit
+            r.stored_at[i] = time.monotonic()
+            stored = [replace(h) for h in hits]
+            if i < len(r.hits):
+                r.hits[i] = stored
+            else:
+                r.hits.append(stored)
+            r.next = (i + 1) % self.max_entries
+
+    def record_recall(self, region: Hashable, cached: list[RetrievedChunk], fresh: list[RetrievedChunk]) -> None:
+        """Fold the recall of a served hit (vs a fresh DB answer) into the region's threshold."""
+        if not fresh:
+            return
+        fresh_ids = {h.id for h in fresh}
+        recall = len(fresh_ids.intersection(h.id for h in cached)) / len(fresh_ids)
+        with self._lock:
+            r = self._regions.get(region)
+            if r is None:
+                return
+            r.recall_ewma = recall if r.recall_ewma is None else (1 - _EWMA_ALPHA) * r.recall_ewma + _EWMA_ALPHA * recall
+            if r.recall_ewma < self.target_recall:
+                r.threshold = min(_MAX_THRESHOLD, r.threshold + _THRESHOLD_STEP_UP)
+            else:
+                r.threshold = max(self.base_threshold, r.threshold - _THRESHOLD_STEP_DOWN)
+
+    def threshold(self, region: Hashable) -> float:
+        with self._lock:
+            r = self._regions.get(region)
+            return r.threshold if r is not None else self.base_threshold
+
+    def clear(self) -> None:
+        with self._lock:
+            self._regions.clear()
+
+
+qvcache = QVCache(
+    threshold=settings.qvcache_threshold,
+    ttl_s=settings.qvcache_ttl_s,
+    max_entries=settings.qvcache_max_entries,
+    target_recall=settings.qvcache_target_recall,
+    max_regions=settings.qvcache_max_regions,
+)
@@ -0,0 +1,97 @@
+"""Candidate-embedding cache and loader shared by the rerankers.
+
+MMR and the cross-encoder stub rerank the same candidates, so they share one
+thread-safe LRU keyed by (embedding_version, chunk_id): a chunk fetched by
+either reranker is a hit for both, and eviction drops the least recently used
+entry rather than the oldest inserted one.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.data.db import read_session_scope
+from app.retrieval.rerankers._vectors import VECTOR_SEND_SQL, decode_vectors
+
+
+class EmbeddingLRU:
+    def __init__(self, max_items: int):
+        self.max_items = max(1, int(max_items))
+        self._data: "OrderedDict[tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, embedding_version: str, chunk_id: str) -> np.ndarray | None:
+        with self._lock:
+            vec = self._data.get((embedding_version, chunk_id))
+            if vec is not None:
+                self._data.move_to_end((embedding_version, chunk_id))
+            return vec
+
+    def set(self, embedding_version: str, chunk_id: str, vec: np.ndarray) -> None:
+        with self._lock:
+            self._data[(embedding_version, chunk_id)] = vec
+            self._data.move_to_end((embedding_version, chunk_id))
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def mget(self, embedding_version: str, chunk_ids: list[str]) -> tuple[dict[str, np.ndarray], list[str]]:
+        """Return (hits, missing ids) under a single lock acquisition."""
+        hits: dict[str, np.ndarray] = {}
+        missing: list[str] = []
+        with self._lock:
+            for cid in chunk_ids:
+                key = (embedding_version, cid)
+                vec = self._data.get(key)
+                if vec is None:
+                    missing.append(cid)
+                else:
+                    self._data.move_to_end(key)
+                    hits[cid] = vec
+        return hits, missing
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_cache = EmbeddingLRU(settings.rerank_embedding_cache_items)
+
+
+def fetch_embeddings(chunk_ids: list[str], *, embedding_version: str) -> dict[str, np.ndarray]:
+    """Fetch candidate embeddings efficiently.
+
+    - Serves repeats from the shared in-process LRU across requests/eval runs.
+    - Fetches missing embeddings in a single batch query.
+    - Reads pgvector's binary send format and decodes the batch into one
+      float32 matrix (no vector->text parsing, no per-dimension Python floats).
+    """
+    if not chunk_ids:
+        return {}
+
+    out, missing = _cache.mget(embedding_version, chunk_ids)
+    if not missing:
+        return out
+
+    sql = text(
+        f"""
+        SELECT id::text AS chunk_id, {VECTOR_SEND_SQL} AS emb
+        FROM document_chunk
+        WHERE id::text = ANY(:ids)
+          AND embedding_version = :embedding_version
+        """
+    )
+    with read_session_scope() as db:
+        rows = db.execute(sql, {"ids": missing, "embedding_version": embedding_version}).mappings().all()
+
+    rows = [r for r in rows if r["emb"] is not None]
+    arr = decode_vectors([r["emb"] for r in rows])
+    for r, vec in zip(rows, arr):
+        out[r["chunk_id"]] = vec
+        _cache.set(embedding_version, r["chunk_id"], vec)
+
+    return out
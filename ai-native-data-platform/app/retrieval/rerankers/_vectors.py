@@ -0,0 +1,83 @@
+"""NumPy helpers shared by the rerankers.
+
+Candidate embeddings are stacked into one L2-normalized float32 matrix so all
+cosines for a rerank come out of a couple of BLAS calls instead of a Python
+loop per pair.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Sequence
+
+import numpy as np
+
+# pgvector's binary send format: int16 dim, int16 unused, float4[dim] (big-endian).
+VECTOR_SEND_SQL = "vector_send(embedding)"
+_VEC_HEADER = struct.Struct("!hh")
+
+
+def decode_vectors(payloads: Sequence[bytes | memoryview]) -> np.ndarray:
+    """Decode `vector_send` payloads into one native float32 (n, d) matrix.
+
+    The column has a fixed dimension, so each payload is exactly one 4-byte
+    header followed by d floats: the whole batch is parsed with a single
+    np.frombuffer over the joined bytes and the header column sliced off.
+    """
+    if not payloads:
+        return np.empty((0, 0), dtype=np.float32)
+    dim, _ = _VEC_HEADER.unpack_from(payloads[0])
+    raw = b"".join(payloads)
+    if len(raw) != len(payloads) * 4 * (dim + 1):
+        raise ValueError("vector payloads have mixed dimensions")
+    return np.frombuffer(raw, dtype=">f4").reshape(len(payloads), dim + 1)[:, 1:].astype(np.float32)
+
+
+def unit_vector(vec: Sequence[float] | np.ndarray) -> np.ndarray:
+    """float32 copy of vec scaled to unit length (zero vector stays zero)."""
+    v = np.asarray(vec, dtype=np.float32).ravel()
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else v
+
+
+def unit_matrix(
+    ids: Sequence[str], embs: dict[str, Sequence[float] | np.ndarray]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Stack candidate embeddings into an (n, d) matrix of unit rows.
+
+    Returns (E, has) where has[i] says whether candidate i has an embedding
+    at all (callers fall back to the first-stage score otherwise). Rows that
+    are missing, zero, or wrongly sized stay zero, so every cosine involving
+    them is 0.0, matching the scalar implementation.
+    """
+    dim = 0
+    for cid in ids:
+        e = embs.get(cid)
+        if e is not None and len(e):
+            dim = len(e)
+            break
+
+    E = np.zeros((len(ids), dim), dtype=np.float32)
+    has = np.zeros(len(ids), dtype=bool)
+    if not dim:
+        return E, has
+
+    for i, cid in enumerate(ids):
+        e = embs.get(cid)
+        if e is None or not len(e):
+            continue
+        has[i] = True
+        if len(e) == dim:
+            E[i] = e
+
+    norms = np.linalg.norm(E, axis=1)
+    nz = norms > 0
+    E[nz] /= norms[nz, None]
+    return E, has
+
+
+def query_cosines(E: np.ndarray, q_unit: np.ndarray) -> np.ndarray:
+    """Cosine of each candidate row to a unit query vector; 0.0 where undefined."""
+    if E.shape[1] != q_unit.shape[0]:
+        return np.zeros(E.shape[0], dtype=np.float32)
+    return E @ q_unit
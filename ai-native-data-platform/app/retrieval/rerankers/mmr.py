@@ -1,87 +1,13 @@
 from __future__ import annotations
 
-import math
-
-from sqlalchemy import text
+import numpy as np
 
 from app.core.config import settings
-from app.data.db import read_session_scope
+from app.retrieval.rerankers._embcache import fetch_embeddings
+from app.retrieval.rerankers._vectors import query_cosines, unit_matrix, unit_vector
 from app.schemas import RetrievedChunk
 
 
-_EMB_CACHE: dict[tuple[str, str], list[float]] = {}
-_EMB_CACHE_MAX = 5000
-
-
-def _cache_get(embedding_version: str, chunk_id: str) -> list[float] | None:
-    return _EMB_CACHE.get((embedding_version, chunk_id))
-
-
-def _cache_set(embedding_version: str, chunk_id: str, vec: list[float]) -> None:
-    # very small, dependency-free cache suitable for single-process dev and CI.
-    # In production you'd use Redis or an in-process LRU.
-    if len(_EMB_CACHE) >= _EMB_CACHE_MAX:
-        _EMB_CACHE.pop(next(iter(_EMB_CACHE)))
-    _EMB_CACHE[(embedding_version, chunk_id)] = vec
-
-
-def _cosine(a: list[float], b: list[float]) -> float:
-    if not a or not b or len(a) != len(b):
-        return 0.0
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for x, y in zip(a, b):
-        dot += x * y
-        na += x * x
-        nb += y * y
-    if na <= 0 or nb <= 0:
-        return 0.0
-    return dot / math.sqrt(na * nb)
-
-
-def _fetch_embeddings(chunk_ids: list[str], *, embedding_version: str) -> dict[str, list[float]]:
-    """Fetch candidate embeddings efficiently.
-
-    Improvements vs the naive approach:
-    - Reuses an in-process cache across requests/eval runs.
-    - Fetches missing embeddings in a single batch query.
-    - Avoids parsing vector->text by casting to a Postgres array.
-    """
-    if not chunk_ids:
-        return {}
-
-    out: dict[str, list[float]] = {}
-    missing: list[str] = []
-    for cid in chunk_ids:
-        v = _cache_get(embedding_version, cid)
-        if v is None:
-            missing.append(cid)
-        else:
-            out[cid] = v
-
-    if not missing:
-        return out
-
-    sql = text(
-        """
-        SELECT id::text AS chunk_id, (embedding::real[]) AS emb
-        FROM document_chunk
-        WHERE id::text = ANY(:ids)
-          AND embedding_version = :embedding_version
-        """
-    )
-    with read_session_scope() as db:
-        rows = db.execute(sql, {"ids": missing, "embedding_version": embedding_version}).mappings().all()
-
-    for r in rows:
-        vec = [float(x) for x in (r["emb"] or [])]
-        out[r["chunk_id"]] = vec
-        _cache_set(embedding_version, r["chunk_id"], vec)
-
-    return out
-
-
 class MMRReranker:
     """Maximum Marginal Relevance reranking.
 
@@ -91,38 +17,49 @@ class MMRReranker:
     def __init__(self, lambda_: float = 0.75):
         self.lambda_ = float(lambda_)
 
-    def rerank(self, query: str, query_vec: list[float], docs: list[RetrievedChunk], k: int) -> list[RetrievedChunk]:
+    def rerank(
+        self,
+        query: str,
+        query_vec: list[float],
+        docs: list[RetrievedChunk],
+        k: int,
+        *,
+        query_vec_unit: np.ndarray | None = None,
+    ) -> list[RetrievedChunk]:
         if not docs:
             return []
         cand = docs[:]
         k = min(int(k), len(cand))
         ids = [d.id for d in cand]
         ev = str((cand[0].meta or {}).get("embedding_version") or settings.embedding_version)
-        embs = _fetch_embeddings(ids, embedding_version=ev)
+        embs = fetch_embeddings(ids, embedding_version=ev)
+
+        # All cosines come from one normalized matrix. Relevance is E @ q,
+        # computed once. Diversity is each candidate's max similarity to
+        # anything selected so far, kept as a vector and updated with a single
+        # E @ E[j] per pick, so each step is O(n * d) with no Python loop.
+        # Candidates without an embedding fall back to their first-stage score
+        # and contribute no diversity penalty.
+        E, has = unit_matrix(ids, embs)
+        q = query_vec_unit if query_vec_unit is not None else unit_vector(query_vec)
+        scores = np.array([float(d.score) for d in cand], dtype=np.float32)
+        rel = np.where(has, query_cosines(E, q), scores)
+        max_sim = np.full(len(cand), -np.inf, dtype=np.float32)
+        available = np.ones(len(cand), dtype=bool)
 
         selected: list[RetrievedChunk] = []
-        selected_ids: set[str] = set()
-
         while len(selected) < k:
-            best = None
-            best_score = -1e9
-            for d in cand:
-                if d.id in selected_ids:
-                    continue
-                e = embs.get(d.id)
-                rel = _cosine(query_vec, e) if e else float(d.score)
-                div = 0.0
-                if selected and e:
-                    div = max(_cosine(e, embs.get(s.id, [])) for s in selected)
-                mmr = (self.lambda_ * rel) - ((1.0 - self.lambda_) * div)
-                if mmr > best_score:
-                    best_score = mmr
-                    best = d
-
-            if best is None:
+            div = np.where(has & np.isfinite(max_sim), max_sim, np.float32(0.0))
+            mmr = (self.lambda_ * rel) - ((1.0 - self.lambda_) * div)
+            mmr[~available] = -np.inf
+            j = int(mmr.argmax())
+            if not available[j]:
                 break
-            best.meta = {**best.meta, "mmr": float(best_score)}
+
+            best = cand[j]
+            best.meta = {**best.meta, "mmr": float(mmr[j])}
             selected.append(best)
-            selected_ids.add(best.id)
+            available[j] = False
+            np.maximum(max_sim, E @ E[j], out=max_sim)
 
         return selected
@@ -1,16 +1,120 @@
 from __future__ import annotations
 
+import hashlib
+import random
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
 from sqlalchemy import text
 
 from app.core.config import settings
 
-from app.data.db import session_scope
+from app.data.db import retrieval_connection
+from app.indexing.index_state import get_index_state
 from app.providers.embeddings import embed
+from app.retrieval.qvcache import qvcache
 from app.schemas import RetrievedChunk
+from app.vectorstore.encoding import vec_literal
+
+
+def _distance_sql(query_vec_sql: str) -> tuple[str, str]:
+    """(distance, score) SQL expressions for the configured metric.
+
+    Embeddings are unit-normalized, so -(a <#> b) equals cosine similarity and
+    ranks identically to 1 - (a <=> b) without the per-row norm computation.
+    """
+    if settings.dense_inner_product:
+        return f"c.embedding <#> {query_vec_sql}", "(-distance)"
+    return f"c.embedding <=> {query_vec_sql}", "(1 - distance)"
+
+
+def _ef_search(k: int) -> int:
+    return min(max(4 * int(k), 40), int(settings.hnsw_ef_search_max))
+
+
+def _set_ef_search(conn, k: int) -> None:
+    """Size the HNSW candidate list to k.
+
+    The retrieval connection is autocommit, so this is a session-level SET.
+    conn.info lives with the pooled DBAPI connection, so the SET round-trip is
+    only paid when a connection's current value differs (usually once).
+    """
+    ef = _ef_search(k)
+    if conn.info.get("hnsw.ef_search") != ef:
+        conn.exec_driver_sql(f"SET hnsw.ef_search = {ef}")
+        conn.info["hnsw.ef_search"] = ef
+
+
+_SEARCH_PARAMS = ("qvec", "workspace_id", "embedding_version", "k")
+
 
+@lru_cache(maxsize=8)
+def _search_sql(inner_product: bool, prepared: bool) -> str:
+    # Parameters are $1..$4 for a server-side PREPARE, psycopg2 pyformat
+    # placeholders otherwise. inner_product is only part of the cache key;
+    # _distance_sql reads the same setting.
+    if prepared:
+        qvec, ws, ev, k = "$1", "$2", "$3", "$4"
+    else:
+        qvec, ws, ev, k = ("CAST(%(qvec)s AS vector)", "%(workspace_id)s", "%(embedding_version)s", "%(k)s")
+    distance, score = _distance_sql(qvec)
+    return f"""
+        -- Distance is computed once per row (in the subquery) and ordered
+        -- by alias; the ORDER BY still matches the ANN index expression.
+        SELECT id, document_id, chunk_index, chunk_text, {score} AS score
+        FROM (
+          SELECT
+            c.id::text AS id,
+            c.document_id::text AS document_id,
+            c.chunk_index AS chunk_index,
+            c.chunk_text AS chunk_text,
+            {distance} AS distance
+          FROM document_chunk c
+          WHERE c.workspace_id = {ws}
+            AND c.embedding_version = {ev}
+          ORDER BY distance
+          LIMIT {k}
+        ) sub
+        ORDER BY distance
+        """
 
-def _vec_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+
+def _execute_search(conn, params: dict) -> list:
+    """Run the single-query dense search, server-side prepared when enabled.
+
+    The statement is PREPAREd once per pooled connection (tracked in
+    conn.info), so later requests skip parsing and rewriting and only send
+    EXECUTE with the bound values. Planning still happens per execution:
+    retrieval connections run with plan_cache_mode=force_custom_plan (see
+    _get_retrieval_engine), because a generic plan with embedding_version as
+    a parameter cannot match the per-version partial HNSW index.
+    """
+    if not settings.db_prepared_statements:
+        return conn.exec_driver_sql(_search_sql(settings.dense_inner_product, False), params).all()
+
+    sql = _search_sql(settings.dense_inner_product, True)
+    name = "dense_search_" + hashlib.blake2b(sql.encode("utf-8"), digest_size=6).hexdigest()
+    prepared = conn.info.setdefault("prepared", set())
+    if name not in prepared:
+        conn.exec_driver_sql(f"PREPARE {name} (vector, text, text, int) AS {sql}")
+        prepared.add(name)
+    args = ", ".join(f"%({p})s" for p in _SEARCH_PARAMS)
+    return conn.exec_driver_sql(f"EXECUTE {name}({args})", params).all()
+
+
+def _to_chunk(r, meta: dict) -> RetrievedChunk:
+    # Positional row: (id, document_id, chunk_index, chunk_text, score).
+    cid, document_id, chunk_index, chunk_text, score = r
+    return RetrievedChunk(
+        id=cid,
+        document_id=document_id,
+        chunk_index=chunk_index,
+        text=chunk_text,
+        score=float(score or 0.0),
+        meta=meta,
+    )
 
 
 class DenseRetriever:
@@ -32,49 +136,201 @@ class DenseRetriever:
         # IMPORTANT: avoid double-embedding. The retrieval pipeline computes the
         # query embedding once per request and passes it in.
         qvec = query_vec or embed(query)
-        qlit = _vec_literal(qvec)
+        ev = embedding_version or settings.embedding_version
+
+        if not settings.qvcache_enabled:
+            return self._search(qvec, workspace_id=workspace_id, k=k, database_url=database_url, embedding_version=ev)
+
+        q = np.asarray(qvec, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        q_unit = q / norm if norm > 0 else q
+        # index_epoch in the region key drops cached hits as soon as the
+        # workspace is re-ingested or reindexed.
+        region = (workspace_id, ev, get_index_state(workspace_id).index_epoch, database_url, int(k))
+
+        cached = qvcache.get(region, q_unit)
+        if cached is not None:
+            if random.random() >= settings.qvcache_verify_rate:
+                return cached
+            # Sampled verification: measure this hit's recall to adapt the
+            # region threshold, and answer with the fresh result.
+            fresh = self._search(qvec, workspace_id=workspace_id, k=k, database_url=database_url, embedding_version=ev)
+            qvcache.record_recall(region, cached, fresh)
+            return fresh
+
+        out = self._search(qvec, workspace_id=workspace_id, k=k, database_url=database_url, embedding_version=ev)
+        qvcache.put(region, q_unit, out)
+        return out
+
+    def _search(
+        self,
+        qvec: list[float],
+        *,
+        workspace_id: str,
+        k: int,
+        database_url: str | None,
+        embedding_version: str,
+    ) -> list[RetrievedChunk]:
+        params = {
+            "qvec": vec_literal(qvec),
+            "workspace_id": workspace_id,
+            "k": int(k),
+            "embedding_version": embedding_version,
+        }
+        # One round-trip: the connection carries retriever_timeout_ms as its
+        # statement_timeout and runs in autocommit (no BEGIN/SET/COMMIT).
+        with retrieval_connection(database_url) as conn:
+            _set_ef_search(conn, k)
+            rows = _execute_search(conn, params)
+
+        meta = {"retriever": "dense", "embedding_version": embedding_version}
+        return [_to_chunk(r, meta) for r in rows]
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.qvecs: list[list[float]] = []
+        self.results: list[list[RetrievedChunk]] | None = None
+        self.error: BaseException | None = None
+        self.done = threading.Event()
+
+
+class BatchingDenseRetriever(DenseRetriever):
+    """DenseRetriever that coalesces concurrent searches into one SQL call.
+
+    While a search for the same (workspace, embedding_version, shard, k) is
+    already running, new searches join a batch that stays open for
+    `window_ms` (or until `max_batch` queries). The batch is then answered by a
+    single statement that runs one LATERAL top-k per query vector, saving a
+    round-trip and a planner pass per query. An idle retriever does not wait:
+    the first search for a key runs immediately on its own.
+    """
+
+    def __init__(self, *, window_ms: float = 3.0, max_batch: int = 32):
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._lock = threading.Lock()
+        self._open: dict[tuple, _Batch] = {}
+        self._inflight: dict[tuple, int] = {}
+
+    def _search(
+        self,
+        qvec: list[float],
+        *,
+        workspace_id: str,
+        k: int,
+        database_url: str | None,
+        embedding_version: str,
+    ) -> list[RetrievedChunk]:
+        key = (workspace_id, embedding_version, database_url, int(k))
+        kw = {"workspace_id": workspace_id, "k": k, "database_url": database_url, "embedding_version": embedding_version}
+
+        with self._lock:
+            busy = self._inflight.get(key, 0) > 0
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+            batch = self._open.get(key) if busy else None
+            leader = busy and batch is None
+            if leader:
+                batch = _Batch()
+                self._open[key] = batch
+            if batch is not None:
+                idx = len(batch.qvecs)
+                batch.qvecs.append(qvec)
+                if len(batch.qvecs) >= self.max_batch:
+                    self._open.pop(key, None)
+
+        try:
+            if batch is None:
+                # Nothing else in flight for this key: single-query fast path.
+                return super()._search(qvec, **kw)
+
+            if not leader:
+                batch.done.wait()
+                if batch.error is not None:
+                    raise batch.error
+                return batch.results[idx]
+
+            time.sleep(self.window_s)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            try:
+                if len(batch.qvecs) == 1:
+                    batch.results = [super()._search(qvec, **kw)]
+                else:
+                    batch.results = self._search_many(batch.qvecs, **kw)
+            except BaseException as e:
+                batch.error = e
+                raise
+            finally:
+                batch.done.set()
+            return batch.results[0]
+        finally:
+            with self._lock:
+                n = self._inflight.get(key, 1) - 1
+                if n:
+                    self._inflight[key] = n
+                else:
+                    self._inflight.pop(key, None)
 
+    def _search_many(
+        self,
+        qvecs: list[list[float]],
+        *,
+        workspace_id: str,
+        k: int,
+        database_url: str | None,
+        embedding_version: str,
+    ) -> list[list[RetrievedChunk]]:
+        distance, score = _distance_sql("q.vec")
         sql = text(
-            """
+            f"""
+            WITH q AS (
+              SELECT t.qi, CAST(t.v AS vector) AS vec
+              FROM unnest(CAST(:qvecs AS text[])) WITH ORDINALITY AS t(v, qi)
+            )
             SELECT
-              c.id::text AS id,
-              c.document_id::text AS document_id,
-              c.chunk_index AS chunk_index,
-              c.chunk_text AS chunk_text,
-              (1 - (c.embedding <=> CAST(:qvec AS vector))) AS score
-            FROM document_chunk c
-            JOIN document d ON d.id = c.document_id
-            WHERE d.workspace_id = :workspace_id
-              AND c.embedding_version = :embedding_version
-            ORDER BY c.embedding <=> CAST(:qvec AS vector)
-            LIMIT :k
+              q.qi AS qi,
+              hit.id,
+              hit.document_id,
+              hit.chunk_index,
+              hit.chunk_text,
+              hit.score
+            FROM q
+            CROSS JOIN LATERAL (
+              SELECT id, document_id, chunk_index, chunk_text, {score} AS score, distance
+              FROM (
+                SELECT
+                  c.id::text AS id,
+                  c.document_id::text AS document_id,
+                  c.chunk_index AS chunk_index,
+                  c.chunk_text AS chunk_text,
+                  {distance} AS distance
+                FROM document_chunk c
+                WHERE c.workspace_id = :workspace_id
+                  AND c.embedding_version = :embedding_version
+                ORDER BY distance
+                LIMIT :k
+              ) sub
+            ) hit
+            ORDER BY q.qi, hit.distance
             """
         )
 
-        with session_scope(database_url) as db:
-            # Enforce a hard ceiling at the database level to protect tail
-            # latency and reduce queueing under overload.
-            db.execute(text("SET LOCAL statement_timeout = :ms"), {"ms": int(settings.retriever_timeout_ms)})
-            rows = db.execute(
+        with retrieval_connection(database_url) as conn:
+            _set_ef_search(conn, k)
+            rows = conn.execute(
                 sql,
                 {
-                    "qvec": qlit,
+                    "qvecs": [vec_literal(v) for v in qvecs],
                     "workspace_id": workspace_id,
                     "k": int(k),
-                    "embedding_version": (embedding_version or settings.embedding_version),
+                    "embedding_version": embedding_version,
                 },
-            ).mappings().all()
+            ).all()
 
-        out: list[RetrievedChunk] = []
+        meta = {"retriever": "dense", "embedding_version": embedding_version}
+        out: list[list[RetrievedChunk]] = [[] for _ in qvecs]
         for r in rows:
-            out.append(
-                RetrievedChunk(
-                    id=r["id"],
-                    document_id=r["document_id"],
-                    chunk_index=r.get("chunk_index"),
-                    text=r["chunk_text"],
-                    score=float(r.get("score") or 0.0),
-                    meta={"retriever": "dense", "embedding_version": (embedding_version or settings.embedding_version)},
-                )
-            )
+            out[int(r[0]) - 1].append(_to_chunk(r[1:], meta))
         return out
@@ -1,18 +1,187 @@
 from __future__ import annotations
 
+import threading
+import time
+
 from sqlalchemy import text
 
 from app.core.config import settings
 from app.schemas import RetrievedChunk
-from app.data.db import session_scope
+from app.data.db import retrieval_connection
+
+BM25_INDEX = "chunk_bm25_idx"
+
+# database_url -> whether the pg_textsearch BM25 index exists there. A found
+# index is remembered for the process; a missing one only for
+# _BM25_RECHECK_S, so an index created later is picked up without a restart.
+_BM25_RECHECK_S = 30.0
+_bm25_available: dict[str | None, bool] = {}
+_bm25_missing_until: dict[str | None, float] = {}
+_bm25_lock = threading.Lock()
+
+_BM25_SQL = text(
+    f"""
+    SELECT id, document_id, chunk_index, chunk_text, (-distance) AS score
+    FROM (
+      SELECT
+        c.id::text AS id,
+        c.document_id::text AS document_id,
+        c.chunk_index AS chunk_index,
+        c.chunk_text AS chunk_text,
+        c.chunk_text <@> to_bm25query(:q, '{BM25_INDEX}') AS distance
+      FROM document_chunk c
+      WHERE c.workspace_id = :workspace_id
+        AND c.embedding_version = :embedding_version
+      ORDER BY distance
+      LIMIT :k
+    ) sub
+    WHERE distance < 0
+    ORDER BY distance
+    """
+)
+
+# c.tsv is a stored generated column with a GIN index, so matching is an
+# index scan and nothing is tokenized at query time.
+_TS_RANK_SQL = text(
+    """
+    WITH q AS (SELECT plainto_tsquery('english', :q) AS query)
+    SELECT
+      c.id::text AS id,
+      c.document_id::text AS document_id,
+      c.chunk_index AS chunk_index,
+      c.chunk_text AS chunk_text,
+      ts_rank_cd(c.tsv, q.query) AS score
+    FROM document_chunk c
+    CROSS JOIN q
+    WHERE c.workspace_id = :workspace_id
+      AND c.embedding_version = :embedding_version
+      AND c.tsv @@ q.query
+    ORDER BY score DESC
+    LIMIT :k
+    """
+)
+
+# Same, but only the first :over_k matches by chunk id are ranked
+# (lexical_rank_candidates > 0). That bounds ts_rank_cd cost on very common
+# terms at the price of recall: a better-ranked match outside the first
+# :over_k ids is never scored. Ordering by id keeps the cut deterministic.
+_TS_RANK_CAPPED_SQL = text(
+    """
+    WITH q AS (SELECT plainto_tsquery('english', :q) AS query)
+    SELECT id, document_id, chunk_index, chunk_text, ts_rank_cd(tsv, q.query) AS score
+    FROM (
+      SELECT
+        c.id::text AS id,
+        c.document_id::text AS document_id,
+        c.chunk_index AS chunk_index,
+        c.chunk_text AS chunk_text,
+        c.tsv AS tsv
+      FROM document_chunk c
+      CROSS JOIN q
+      WHERE c.workspace_id = :workspace_id
+        AND c.embedding_version = :embedding_version
+        AND c.tsv @@ q.query
+      ORDER BY c.id
+      LIMIT :over_k
+    ) cand
+    CROSS JOIN q
+    ORDER BY score DESC
+    LIMIT :k
+    """
+)
+
+
+# Candidate scoring: rank only the given chunk ids (primary-key lookups)
+# instead of searching the workspace's whole corpus.
+_BM25_CANDIDATES_SQL = text(
+    f"""
+    SELECT id, document_id, chunk_index, chunk_text, (-distance) AS score
+    FROM (
+      SELECT
+        c.id::text AS id,
+        c.document_id::text AS document_id,
+        c.chunk_index AS chunk_index,
+        c.chunk_text AS chunk_text,
+        c.chunk_text <@> to_bm25query(:q, '{BM25_INDEX}') AS distance
+      FROM document_chunk c
+      WHERE c.id = ANY(CAST(:ids AS uuid[]))
+        AND c.workspace_id = :workspace_id
+        AND c.embedding_version = :embedding_version
+    ) cand
+    WHERE distance < 0
+    ORDER BY distance
+    """
+)
+
+_TS_RANK_CANDIDATES_SQL = text(
+    """
+    WITH q AS (SELECT plainto_tsquery('english', :q) AS query)
+    SELECT
+      c.id::text AS id,
+      c.document_id::text AS document_id,
+      c.chunk_index AS chunk_index,
+      c.chunk_text AS chunk_text,
+      ts_rank_cd(c.tsv, q.query) AS score
+    FROM document_chunk c
+    CROSS JOIN q
+    WHERE c.id = ANY(CAST(:ids AS uuid[]))
+      AND c.workspace_id = :workspace_id
+      AND c.embedding_version = :embedding_version
+      AND c.tsv @@ q.query
+    ORDER BY score DESC
+    """
+)
+
+
+def _has_bm25(db, database_url: str | None) -> bool:
+    if not settings.lexical_bm25:
+        return False
+    if _bm25_available.get(database_url):
+        return True
+    now = time.monotonic()
+    if now < _bm25_missing_until.get(database_url, 0.0):
+        return False
+    # to_regclass is NULL when either pg_textsearch or the index is missing.
+    found = bool(db.execute(text("SELECT to_regclass(:idx) IS NOT NULL"), {"idx": BM25_INDEX}).scalar())
+    with _bm25_lock:
+        if found:
+            _bm25_available[database_url] = True
+            _bm25_missing_until.pop(database_url, None)
+        else:
+            _bm25_missing_until[database_url] = now + _BM25_RECHECK_S
+    return found
+
+
+def _to_chunks(rows, embedding_version: str) -> list[RetrievedChunk]:
+    meta = {"retriever": "lexical", "embedding_version": embedding_version}
+    out: list[RetrievedChunk] = []
+    for cid, document_id, chunk_index, chunk_text, score in rows:
+        out.append(
+            RetrievedChunk(
+                id=cid,
+                document_id=document_id,
+                chunk_index=chunk_index,
+                text=chunk_text,
+                score=float(score or 0.0),
+                meta=meta,
+            )
+        )
+    return out
 
 
 class LexicalRetriever:
     """Postgres Full-Text Search retriever.
 
-    This models a sparse/BM25-like first-stage retriever (without extra infra).
+    Ranks with BM25 through pg_textsearch when its index exists (index-side
+    top-k, no query-time tokenization); otherwise falls back to ts_rank_cd.
+
+    With candidates_only=True the pipeline does not search the corpus with this
+    retriever; it calls score_candidates() on the dense hits instead.
     """
 
+    def __init__(self, *, candidates_only: bool = False):
+        self.candidates_only = candidates_only
+
     def retrieve(
         self,
         workspace_id: str,
@@ -23,40 +192,36 @@ class LexicalRetriever:
         database_url: str | None = None,
         embedding_version: str | None = None,
     ) -> list[RetrievedChunk]:
-        sql = text(
-            """
-            WITH q AS (SELECT plainto_tsquery('english', :q) AS query)
-            SELECT
-              c.id::text AS id,
-              c.document_id::text AS document_id,
-              c.chunk_index AS chunk_index,
-              c.chunk_text AS chunk_text,
-              ts_rank_cd(to_tsvector('english', c.chunk_text), q.query) AS score
-            FROM document_chunk c
-            JOIN document d ON d.id = c.document_id
-            CROSS JOIN q
-            WHERE d.workspace_id = :workspace_id
-              AND c.embedding_version = :embedding_version
-              AND to_tsvector('english', c.chunk_text) @@ q.query
-            ORDER BY score DESC
-            LIMIT :k
-            """
-        )
+        # Same one-round-trip path as dense retrieval: the connection already
+        # carries retriever_timeout_ms as statement_timeout (autocommit).
+        with retrieval_connection(database_url) as db:
+            over_k = max(int(k), settings.lexical_rank_candidates) if settings.lexical_rank_candidates > 0 else None
+            if _has_bm25(db, database_url):
+                sql = _BM25_SQL
+            else:
+                sql = _TS_RANK_SQL if over_k is None else _TS_RANK_CAPPED_SQL
+            rows = db.execute(sql, {"q": query, "workspace_id": workspace_id, "k": int(k), "over_k": over_k, "embedding_version": (embedding_version or settings.embedding_version)}).all()
+
+        return _to_chunks(rows, embedding_version or settings.embedding_version)
+
+    def score_candidates(
+        self,
+        workspace_id: str,
+        query: str,
+        chunk_ids: list[str],
+        *,
+        database_url: str | None = None,
+        embedding_version: str | None = None,
+    ) -> list[RetrievedChunk]:
+        """Lexically score only `chunk_ids` (e.g. dense candidates), best first.
+
+        Candidates that do not match the query are dropped, as in retrieve().
+        """
+        if not chunk_ids:
+            return []
+        ev = embedding_version or settings.embedding_version
+        with retrieval_connection(database_url) as db:
+            sql = _BM25_CANDIDATES_SQL if _has_bm25(db, database_url) else _TS_RANK_CANDIDATES_SQL
+            rows = db.execute(sql, {"q": query, "ids": list(chunk_ids), "workspace_id": workspace_id, "embedding_version": ev}).all()
+        return _to_chunks(rows, ev)
 
-        with session_scope(database_url) as db:
-            db.execute(text("SET LOCAL statement_timeout = :ms"), {"ms": int(settings.retriever_timeout_ms)})
-            rows = db.execute(sql, {"q": query, "workspace_id": workspace_id, "k": int(k), "embedding_version": (embedding_version or settings.embedding_version)}).mappings().all()
-
-        out: list[RetrievedChunk] = []
-        for r in rows:
-            out.append(
-                RetrievedChunk(
-                    id=r["id"],
-                    document_id=r["document_id"],
-                    chunk_index=r.get("chunk_index"),
-                    text=r["chunk_text"],
-                    score=float(r.get("score") or 0.0),
-                    meta={"retriever": "lexical", "embedding_version": (embedding_version or settings.embedding_version)},
-                )
-            )
-        return out
@@ -3,12 +3,9 @@ from __future__ import annotations
 from sqlalchemy import text
 
 from app.core.config import settings
-from app.data.db import session_scope
+from app.data.db import retrieval_connection
 from app.schemas import RetrievedChunk
-
-
-def _vec_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+from app.vectorstore.encoding import vec_literal
 
 
 class MultimodalDenseRetriever:
@@ -33,7 +30,7 @@ class MultimodalDenseRetriever:
         from app.providers.embeddings import embed
 
         qvec = query_vec or embed(query)
-        qlit = _vec_literal(qvec)
+        qlit = vec_literal(qvec)
         ev = embedding_version or settings.embedding_version
 
         sql = text(
@@ -69,11 +66,7 @@ class MultimodalDenseRetriever:
             """
         )
 
-        with session_scope(database_url) as db:
-            db.execute(
-                text("SET LOCAL statement_timeout = :ms"),
-                {"ms": int(settings.retriever_timeout_ms)},
-            )
+        with retrieval_connection(database_url) as db:
             rows = db.execute(
                 sql,
                 {"qvec": qlit, "workspace_id": workspace_id, "ev": ev, "k": k},
@@ -83,11 +76,11 @@ class MultimodalDenseRetriever:
             RetrievedChunk(
                 id=str(r["id"]),
                 document_id=str(r["document_id"]) if r["document_id"] else "",
-                chunk_index=r.get("chunk_index"),
+                chunk_index=r["chunk_index"],
                 text=r["content"],
-                score=float(r.get("score") or 0.0),
+                score=float(r["score"] or 0.0),
                 modality=r["modality"],
-                caption=r.get("caption"),
+                caption=r["caption"],
                 meta={
                     "retriever": "multimodal_dense",
                     "embedding_version": ev,
@@ -3,33 +3,83 @@ from __future__ import annotations
 import hashlib
 import random
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
 
 from app.core.config import settings
 from app.retrieval.consistency import fetch_shard_epochs, consistent_epochs
 
 
 def _stable_hash(s: str) -> int:
-    h = hashlib.sha256(s.encode("utf-8", errors="ignore")).hexdigest()
-    return int(h[:16], 16)
+    # 64-bit BLAKE2b: stable across processes and much cheaper than SHA-256.
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8", errors="ignore"), digest_size=8).digest(), "big")
+
+
+def _mix64(z: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer over a uint64 array (wrapping arithmetic)."""
+    z = z + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@lru_cache(maxsize=8)
+def _node_seeds(shards: tuple[str | None, ...]) -> np.ndarray:
+    # Hashed once per shard list; a changed retrieval_shard_dsns is a new key.
+    return np.fromiter((_stable_hash(str(d)) for d in shards), dtype=np.uint64, count=len(shards))
+
+
+def _rendezvous_scores(key: str, shards: tuple[str | None, ...]) -> np.ndarray:
+    # Highest Random Weight hashing (rendezvous): one vectorized mix per query
+    # instead of hashing every (key, node) pair.
+    return _mix64(_node_seeds(shards) ^ np.uint64(_stable_hash(key)))
 
 
-def _rendezvous_score(key: str, node: str) -> int:
-    # Highest Random Weight hashing (rendezvous).
-    return _stable_hash(f"{key}|{node}")
+def _top_shards(key: str, shards: tuple[str | None, ...], n: int) -> list[str | None]:
+    """The n shards with the highest rendezvous score for key, best first."""
+    scores = _rendezvous_scores(key, shards)
+    if n == 1:
+        return [shards[int(scores.argmax())]]
+    idx = np.argpartition(scores, len(shards) - n)[len(shards) - n:] if n < len(shards) else np.arange(len(shards))
+    idx = idx[np.argsort(scores[idx])[::-1]]
+    return [shards[int(i)] for i in idx]
 
 
 @dataclass(frozen=True)
 class RoutedShards:
-    dsns: list[str | None]
+    dsns: Sequence[str | None]
     epochs: list[dict] | None = None
     consistency_error: str | None = None
 
 
-def parse_shards() -> list[str | None]:
-    if not settings.retrieval_shard_dsns.strip():
-        return [None]
-    dsns = [d.strip() for d in settings.retrieval_shard_dsns.split(",") if d.strip()]
-    return dsns or [None]
+@lru_cache(maxsize=4)
+def _parse_shard_dsns(raw: str) -> tuple[str | None, ...]:
+    dsns = tuple(d.strip() for d in raw.split(",") if d.strip())
+    return dsns or (None,)
+
+
+def parse_shards() -> tuple[str | None, ...]:
+    # Parsed once per distinct setting value; the tuple is shared, not copied.
+    return _parse_shard_dsns(settings.retrieval_shard_dsns)
+
+
+@lru_cache(maxsize=4)
+def _parse_shard_replicas(shards_raw: str, replicas_raw: str) -> dict[str | None, tuple[str, ...]]:
+    out: dict[str | None, tuple[str, ...]] = {}
+    for shard, entry in zip(_parse_shard_dsns(shards_raw), replicas_raw.split(",")):
+        replicas = tuple(r.strip() for r in entry.split("|") if r.strip())
+        if replicas:
+            out[shard] = replicas
+    return out
+
+
+def shard_replicas() -> dict[str | None, tuple[str, ...]]:
+    """Shard DSN -> its read replicas (shards without replicas are absent)."""
+    if not settings.retrieval_shard_replica_dsns:
+        return {}
+    return _parse_shard_replicas(settings.retrieval_shard_dsns, settings.retrieval_shard_replica_dsns)
 
 
 def choose_shards(workspace_id: str, query: str) -> RoutedShards:
@@ -51,13 +101,12 @@ def choose_shards(workspace_id: str, query: str) -> RoutedShards:
     strategy = (settings.retrieval_routing_strategy or "fanout").lower()
     fanout = int(settings.retrieval_shard_fanout or 0)
 
-    selected: list[str | None]
+    selected: Sequence[str | None]
     if strategy == "fanout" or fanout <= 0:
         selected = all_shards
     else:
         key = f"{workspace_id}|{query.strip().lower()}"
-        ranked = sorted(all_shards, key=lambda d: _rendezvous_score(key, str(d)), reverse=True)
-        selected = ranked[: max(1, min(fanout, len(ranked)))]
+        selected = _top_shards(key, all_shards, max(1, min(fanout, len(all_shards))))
 
         if strategy == "adaptive":
             # Placeholder for health-aware routing. To keep this repo self-contained
@@ -4,7 +4,7 @@ import time
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LatencyBudget:
     """Simple per-request latency budget.
 
@@ -16,21 +16,23 @@ class LatencyBudget:
     """
 
     total_ms: int
-    started_at: float
+    started_at_ns: int  # time.monotonic_ns(); immune to wall-clock adjustments
+    deadline_ns: int  # started_at_ns + total_ms, so checks are one subtraction
 
     @classmethod
     def start(cls, total_ms: int) -> "LatencyBudget":
-        return cls(total_ms=int(total_ms), started_at=time.time())
+        now = time.monotonic_ns()
+        return cls(total_ms=int(total_ms), started_at_ns=now, deadline_ns=now + int(total_ms) * 1_000_000)
 
     def elapsed_ms(self) -> int:
-        return int((time.time() - self.started_at) * 1000)
+        return (time.monotonic_ns() - self.started_at_ns) // 1_000_000
 
     def remaining_ms(self) -> int:
-        return max(0, self.total_ms - self.elapsed_ms())
+        return max(0, (self.deadline_ns - time.monotonic_ns()) // 1_000_000)
 
     def expired(self) -> bool:
-        return self.elapsed_ms() >= self.total_ms
+        return time.monotonic_ns() >= self.deadline_ns
 
     def allow(self, stage_ms: int) -> bool:
         """Returns True if we can still afford a stage that needs stage_ms."""
-        return self.remaining_ms() >= int(stage_ms)
+        return self.deadline_ns - time.monotonic_ns() >= int(stage_ms) * 1_000_000
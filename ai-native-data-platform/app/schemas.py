@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import Any
 
 from pydantic import BaseModel, Field
@@ -31,17 +32,27 @@ class AskOut(BaseModel):
     unknown: bool
 
 
-class RetrievedChunk(BaseModel):
-    """Transport type used throughout retrieval, evaluation, and tracing."""
+@dataclass(slots=True)
+class RetrievedChunk:
+    """Transport type used throughout retrieval, evaluation, and tracing.
 
-    id: str = Field(..., description="Chunk UUID")
+    A plain slotted dataclass rather than a pydantic model: chunks are built
+    from trusted DB rows many times per request and never cross the API
+    boundary as-is, so per-instance validation is pure overhead. Serialize with
+    dataclasses.asdict().
+
+    Retrievers share one `meta` dict across the chunks of a call: treat it as
+    read-only and assign a new dict to annotate (as the rerankers do).
+    """
+
+    id: str  # Chunk UUID
     document_id: str
     chunk_index: int | None = None
-    text: str
+    text: str = ""
     score: float = 0.0
     modality: str = "text"      # text | image
     caption: str | None = None  # populated for image chunks; used as retrieval text
-    meta: dict[str, Any] = Field(default_factory=dict)
+    meta: dict[str, Any] = field(default_factory=dict)
 
 
 class GenOut(BaseModel):
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+import numpy as np
+import orjson
+
+
+def vec_literal(vec: list[float]) -> str:
+    """Encode an embedding in pgvector's text input format ("[x,y,...]")."""
+    # pgvector's text format is a JSON array; orjson writes the float32 values
+    # (shortest round-trip repr) in one native pass instead of a Python
+    # format() call per dimension.
+    return orjson.dumps(np.asarray(vec, dtype=np.float32), option=orjson.OPT_SERIALIZE_NUMPY).decode()
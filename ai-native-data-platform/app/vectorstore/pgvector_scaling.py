@@ -1,12 +1,26 @@
 from __future__ import annotations
 
+import hashlib
 import math
+import re
 from dataclasses import dataclass
 
 from sqlalchemy import text
 
 from app.core.config import settings
-from app.data.db import write_session_scope
+from app.data.db import engine, retrieval_connection, write_session_scope
+from app.retrieval.routing import parse_shards, shard_replicas
+
+_SAFE_VERSION = re.compile(r"^[A-Za-z0-9_.-]{1,40}$")
+
+_INDEX_VALID_STMT = text(
+    """
+    SELECT i.indisvalid
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name
+    """
+)
 
 
 @dataclass(frozen=True)
@@ -39,6 +53,10 @@ def ensure_partitions(*, partitions: int, table: str = "document_chunk", key: st
     This assumes Postgres declarative partitioning and a schema where the table
     can be recreated. In real deployments you'd do this during a maintenance
     window or via online table migration.
+
+    Indexes defined on the parent (the workspace_id/tsv GIN, ANN indexes) are
+    created on each new partition automatically, and retrieval filters on
+    document_chunk.workspace_id directly, so queries prune to one partition.
     """
     parts = int(partitions)
     if parts < 1:
@@ -66,12 +84,17 @@ def ensure_partitions(*, partitions: int, table: str = "document_chunk", key: st
             )
 
 
+def default_opclass() -> str:
+    """pgvector opclass serving DenseRetriever's ORDER BY (<#> or <=>)."""
+    return "vector_ip_ops" if settings.dense_inner_product else "vector_cosine_ops"
+
+
 def ensure_vector_indexes(
     *,
     index_type: str,
     table: str = "document_chunk",
     embedding_col: str = "embedding",
-    opclass: str = "vector_cosine_ops",
+    opclass: str | None = None,
     lists: int | None = None,
     m: int | None = None,
     ef_construction: int | None = None,
@@ -81,8 +104,10 @@ def ensure_vector_indexes(
     - IVF: good throughput, requires ANALYZE and reasonable `lists`.
     - HNSW: better recall/latency tradeoff; higher build cost.
 
-    We create indexes CONCURRENTLY to reduce downtime.
+    We create indexes CONCURRENTLY to reduce downtime. The opclass defaults to
+    the one matching the dense retriever's distance operator.
     """
+    opclass = opclass or default_opclass()
     it = index_type.lower()
     with write_session_scope() as db:
         db.execute(text("SET LOCAL statement_timeout = 0"))
@@ -117,6 +142,153 @@ def ensure_vector_indexes(
             raise ValueError("index_type must be ivfflat or hnsw")
 
 
+_PREWARM_HNSW_STMT = text(
+    """
+    SELECT c.relname, pg_prewarm(c.oid) AS blocks
+    FROM pg_class c
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE c.relkind = 'i' AND am.amname = 'hnsw'
+    """
+)
+
+
+def _retrieval_dsns() -> list[str | None]:
+    """Every DSN online retrieval reads from: each shard (None = primary) and its replicas."""
+    dsns: list[str | None] = list(parse_shards())
+    for replicas in shard_replicas().values():
+        dsns.extend(r for r in replicas if r not in dsns)
+    return dsns
+
+
+def prewarm_hnsw_indexes(dsns: list[str | None] | None = None) -> int:
+    """Load every HNSW index into shared_buffers with pg_prewarm.
+
+    HNSW traversal is memory-bound on a cold cache (each hop can be a page
+    read), so workers call this at startup. Runs through the retrieval pools
+    of every shard and shard replica (or `dsns`), since those are the servers
+    whose caches queries hit. The pg_prewarm extension comes from
+    init_db.sql. Returns the number of indexes warmed.
+    """
+    warmed = 0
+    for dsn in _retrieval_dsns() if dsns is None else dsns:
+        with retrieval_connection(dsn) as conn:
+            # The retrieval pool's timeout is far too tight for a full index
+            # read; reset before the connection goes back to the pool.
+            conn.execute(text("SET statement_timeout = 0"))
+            try:
+                warmed += len(conn.execute(_PREWARM_HNSW_STMT).all())
+            finally:
+                conn.execute(text("RESET statement_timeout"))
+    return warmed
+
+
+def ensure_bm25_index(*, table: str = "document_chunk", text_col: str = "chunk_text", name: str = "chunk_bm25_idx") -> None:
+    """Create the pg_textsearch BM25 index used by LexicalRetriever.
+
+    Run after bulk loads: bm25_force_merge compacts the index segments so
+    top-k queries traverse one Block-Max WAND structure. Requires the
+    pg_textsearch extension to be installable on the server.
+    """
+    with write_session_scope() as db:
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+        db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_textsearch"))
+        db.execute(
+            text(
+                f"""
+                CREATE INDEX IF NOT EXISTS {name}
+                ON {table} USING bm25 ({text_col})
+                WITH (text_config = 'english')
+                """
+            )
+        )
+        db.execute(text("SELECT bm25_force_merge(:idx)"), {"idx": name})
+
+
 def analyze_table(*, table: str = "document_chunk") -> None:
     with write_session_scope() as db:
         db.execute(text("ANALYZE " + table))
+
+
+def version_index_name(embedding_version: str, *, table: str = "document_chunk") -> str:
+    """Name of the partial ANN index covering one embedding_version.
+
+    The readable slug is suffixed with a short digest so versions that slugify
+    the same ("v1.0" vs "v1_0") still get distinct indexes.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", embedding_version.lower()).strip("_")[:20]
+    digest = hashlib.sha256(embedding_version.encode("utf-8")).hexdigest()[:8]
+    return f"idx_{table}_emb_{slug}_{digest}"
+
+
+def ensure_version_index(
+    embedding_version: str,
+    *,
+    table: str = "document_chunk",
+    embedding_col: str = "embedding",
+    opclass: str | None = None,
+    m: int = 16,
+    ef_construction: int = 64,
+) -> str:
+    """Build a partial HNSW index for one embedding_version ahead of cutover.
+
+    Run after the backfill and before promote_target_to_active so the first
+    queries against the new version hit a warm ANN index instead of a seq scan.
+    CONCURRENTLY cannot run inside a transaction block, so this uses an
+    autocommit connection rather than write_session_scope.
+
+    A failed or cancelled concurrent build leaves an INVALID index behind that
+    IF NOT EXISTS would silently keep, so one is dropped and rebuilt.
+    """
+    opclass = opclass or default_opclass()
+    if not _SAFE_VERSION.match(embedding_version):
+        raise ValueError(f"unsafe embedding_version for DDL: {embedding_version!r}")
+    name = version_index_name(embedding_version, table=table)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Session-level so it covers the whole build; reset before the
+        # connection goes back to the pool with the default timeout.
+        conn.execute(text("SET statement_timeout = 0"))
+        try:
+            valid = conn.execute(_INDEX_VALID_STMT, {"name": name}).scalar()
+            if valid is False:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(
+                text(
+                    f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}
+                    ON {table} USING hnsw ({embedding_col} {opclass})
+                    WITH (m = {int(m)}, ef_construction = {int(ef_construction)})
+                    WHERE embedding_version = '{embedding_version}'
+                    """
+                )
+            )
+        finally:
+            conn.execute(text("RESET statement_timeout"))
+    return name
+
+
+def drop_version_index_if_unused(embedding_version: str, *, table: str = "document_chunk") -> bool:
+    """Drop the partial index for a retired embedding_version.
+
+    Versions are shared across workspaces, so the index is only dropped once no
+    workspace has the version active or targeted (and it is not the process
+    default). Returns True when the index was dropped.
+    """
+    if embedding_version == settings.embedding_version:
+        return False
+    with write_session_scope() as db:
+        in_use = db.execute(
+            text(
+                """
+                SELECT 1 FROM workspace_index_state
+                WHERE active_embedding_version = :v OR target_embedding_version = :v
+                LIMIT 1
+                """
+            ),
+            {"v": embedding_version},
+        ).first()
+    if in_use:
+        return False
+    name = version_index_name(embedding_version, table=table)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    return True
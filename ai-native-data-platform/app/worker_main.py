@@ -3,11 +3,18 @@ from __future__ import annotations
 import time
 
 from app.core.logging import configure_logging
+from app.core.observability import emit_event
 from app.ingestion.pipeline import start_worker
+from app.vectorstore.pgvector_scaling import prewarm_hnsw_indexes
 
 
 def main() -> None:
     configure_logging()
+    try:
+        emit_event("hnsw_prewarmed", {"indexes": prewarm_hnsw_indexes()})
+    except Exception as e:
+        # Best effort: pg_prewarm may be unavailable to this role.
+        emit_event("hnsw_prewarm_failed", {"error": str(e)})
     start_worker()
     # Keep process alive.
     while True:
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import statistics
 import time
 
+import numpy as np
+
 from app.providers.embeddings import embed
 from app.retrieval.factory import build_pipeline
 
@@ -10,26 +11,21 @@ from app.retrieval.factory import build_pipeline
 def bench(workspace_id: str = "demo", query: str = "onboarding", n: int = 200) -> dict:
     pipeline = build_pipeline("baseline")
     qvec = embed(query)
-    lats = []
-    for _ in range(n):
-        t0 = time.time()
+    lats = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        t0 = time.perf_counter()
         _, ms = pipeline.run(workspace_id, query, query_vec=qvec, k=5, rerank_candidates=25)
-        lats.append(float(ms) if ms else (time.time() - t0) * 1000)
-
-    lats_sorted = sorted(lats)
-    def pct(p: float) -> float:
-        if not lats_sorted:
-            return 0.0
-        idx = int(round((p / 100.0) * (len(lats_sorted) - 1)))
-        idx = max(0, min(len(lats_sorted) - 1, idx))
-        return float(lats_sorted[idx])
+        lats[i] = float(ms) if ms else (time.perf_counter() - t0) * 1000
 
+    if not n:
+        return {"n": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    p50, p95 = np.percentile(lats, [50, 95])
     return {
         "n": n,
-        "mean_ms": float(statistics.mean(lats)) if lats else 0.0,
-        "p50_ms": pct(50),
-        "p95_ms": pct(95),
-        "max_ms": float(max(lats)) if lats else 0.0,
+        "mean_ms": float(lats.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "max_ms": float(lats.max()),
     }
 
 
@@ -2,16 +2,8 @@ from __future__ import annotations
 
 import argparse
 import json
-from statistics import mean
 
-
-def pct(values: list[float], q: float) -> float:
-    if not values:
-        return 0.0
-    values = sorted(values)
-    idx = int(round((len(values) - 1) * q))
-    idx = min(max(idx, 0), len(values) - 1)
-    return float(values[idx])
+import numpy as np
 
 
 def main() -> None:
@@ -19,7 +11,7 @@ def main() -> None:
     ap.add_argument("--in", dest="in_path", required=True)
     args = ap.parse_args()
 
-    lats: list[float] = []
+    lat_list: list[float] = []
     oks = 0
     unknowns = 0
     total = 0
@@ -32,10 +24,13 @@ def main() -> None:
             row = json.loads(line)
             if int(row.get("status") or 0) == 200:
                 oks += 1
-                lats.append(float(row.get("latency_ms") or 0.0))
+                lat_list.append(float(row.get("latency_ms") or 0.0))
                 if row.get("unknown"):
                     unknowns += 1
 
+    lats = np.fromiter(lat_list, dtype=np.float64, count=len(lat_list))
+    p50, p95, p99 = np.percentile(lats, [50, 95, 99]) if lats.size else (0.0, 0.0, 0.0)
+
     print(
         json.dumps(
             {
@@ -43,11 +38,11 @@ def main() -> None:
                 "ok": oks,
                 "error_rate": round(1 - (oks / max(1, total)), 4),
                 "unknown_rate": round(unknowns / max(1, oks), 4),
-                "mean_ms": round(mean(lats), 2) if lats else 0.0,
-                "p50_ms": round(pct(lats, 0.50), 2),
-                "p95_ms": round(pct(lats, 0.95), 2),
-                "p99_ms": round(pct(lats, 0.99), 2),
-                "max_ms": round(max(lats), 2) if lats else 0.0,
+                "mean_ms": round(float(lats.mean()), 2) if lats.size else 0.0,
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(lats.max()), 2) if lats.size else 0.0,
             },
             indent=2,
         )
@@ -1,4 +1,7 @@
 CREATE EXTENSION IF NOT EXISTS vector;
+-- Used by prewarm_hnsw_indexes() at worker start; created here so the app
+-- role does not need CREATE privileges at runtime.
+CREATE EXTENSION IF NOT EXISTS pg_prewarm;
 
 CREATE TABLE IF NOT EXISTS workspace (
   id TEXT PRIMARY KEY,
@@ -56,13 +59,51 @@ WHERE c.document_id = d.id AND c.workspace_id IS NULL;
 
 CREATE INDEX IF NOT EXISTS idx_chunks_workspace ON document_chunk (workspace_id);
 
--- ANN index (pgvector) for dense retrieval.
-CREATE INDEX IF NOT EXISTS idx_chunks_embedding
-ON document_chunk USING ivfflat (embedding vector_cosine_ops);
-
--- Full-text search index for hybrid retrieval.
-CREATE INDEX IF NOT EXISTS idx_chunks_fts
-ON document_chunk USING GIN (to_tsvector('english', chunk_text));
+-- Retrieval filters on the denormalized document_chunk.workspace_id (no join
+-- to document), so fill it from the parent document when a writer omits it.
+CREATE OR REPLACE FUNCTION document_chunk_fill_workspace() RETURNS trigger AS $$
+BEGIN
+  IF NEW.workspace_id IS NULL THEN
+    SELECT d.workspace_id INTO NEW.workspace_id FROM document d WHERE d.id = NEW.document_id;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_document_chunk_fill_workspace ON document_chunk;
+CREATE TRIGGER trg_document_chunk_fill_workspace
+BEFORE INSERT ON document_chunk
+FOR EACH ROW EXECUTE FUNCTION document_chunk_fill_workspace();
+
+-- Every chunk belongs to a workspace: retrieval filters and hash partitioning
+-- (ensure_partitions) key on this column, so it must never be NULL.
+ALTER TABLE document_chunk ALTER COLUMN workspace_id SET NOT NULL;
+
+-- ANN index (pgvector) for dense retrieval. Embeddings are unit-normalized,
+-- so retrieval ranks by inner product (<#>, vector_ip_ops). Only the opclass
+-- the retriever uses is kept: a second ANN index would be maintained on every
+-- insert and reindex without ever serving a query. Deployments running
+-- DENSE_INNER_PRODUCT=false build the cosine index instead with
+-- ensure_vector_indexes(opclass="vector_cosine_ops", ...) and drop this one.
+CREATE INDEX IF NOT EXISTS idx_chunks_embedding_ip
+ON document_chunk USING ivfflat (embedding vector_ip_ops);
+
+DROP INDEX IF EXISTS idx_chunks_embedding;
+
+-- Full-text search for hybrid retrieval: a stored tsvector so queries never
+-- re-tokenize chunk_text. The GIN index leads with workspace_id (btree_gin) so
+-- a lexical match only visits the tenant's postings; on a hash-partitioned
+-- document_chunk (see ensure_partitions) it is created per partition too.
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+ALTER TABLE document_chunk
+  ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED;
+
+CREATE INDEX IF NOT EXISTS chunk_ws_tsv_gin
+ON document_chunk USING GIN (workspace_id, tsv);
+
+DROP INDEX IF EXISTS chunk_tsv_gin;
+DROP INDEX IF EXISTS idx_chunks_fts;
 
 -- Unified trace store (retrieval traces, generation traces, online signals).
 CREATE TABLE IF NOT EXISTS trace_log (
@@ -116,7 +157,8 @@ CREATE TABLE IF NOT EXISTS image_chunk (
 CREATE INDEX IF NOT EXISTS idx_image_chunk_workspace
 ON image_chunk (workspace_id);
 
--- ANN index for image caption embeddings — same cosine ops as document_chunk.
+-- ANN index for image caption embeddings. Cosine ops: the multimodal retriever
+-- ranks with <=>, unlike document_chunk (inner product, see above).
 CREATE INDEX IF NOT EXISTS idx_image_chunk_embedding
 ON image_chunk USING ivfflat (embedding vector_cosine_ops);
 
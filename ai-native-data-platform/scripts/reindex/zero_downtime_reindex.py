@@ -28,8 +28,12 @@ import subprocess
 import sys
 import tempfile
 import time
+from dataclasses import replace
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 from app.indexing.index_state import (
     clear_target_embedding_version,
     get_index_state,
@@ -38,9 +42,66 @@ from app.indexing.index_state import (
     set_target_embedding_version,
 )
 from app.indexing.pipeline import IndexingConfig, build_manifest, run_manifest
+from app.vectorstore.pgvector_scaling import drop_version_index_if_unused, ensure_version_index
+
+
+# Fail-fast canary: k6 streams per-request points; the run is aborted once p95
+# over each window exceeds the budget for this many consecutive windows.
+FAIL_FAST_WINDOW_S = 5.0
+
+
+def _tail_lines(f, buf: bytearray) -> list[bytes]:
+    """Complete lines appended to f since the last call (partial tail kept in buf)."""
+    chunk = f.read()
+    if not chunk:
+        return []
+    buf += chunk
+    *lines, rest = bytes(buf).split(b"\n")
+    buf[:] = rest
+    return lines
 
 
-def _run_k6(*, base_url: str, workspace_id: str, api_key: str, rate: int, duration_s: int, embedding_version: str, admin_token: str) -> Path:
+def _watch_k6(proc: subprocess.Popen, points: Path, *, p95_ms: float, windows: int) -> bool:
+    """Follow k6's JSON point stream; terminate k6 and return False on a sustained p95 breach."""
+    buf = bytearray()
+    window: list[float] = []
+    breaches = 0
+    deadline = time.monotonic() + FAIL_FAST_WINDOW_S
+    with points.open("rb") as f:
+        while proc.poll() is None:
+            for line in _tail_lines(f, buf):
+                # Cheap pre-filter: most points are other metrics.
+                if b'"http_req_duration"' not in line:
+                    continue
+                pt = orjson.loads(line)
+                if pt.get("type") == "Point" and pt.get("metric") == "http_req_duration":
+                    window.append(float(pt["data"]["value"]))
+            if time.monotonic() >= deadline:
+                breached = bool(window) and float(np.percentile(window, 95)) > p95_ms
+                breaches = breaches + 1 if breached else 0
+                window.clear()
+                deadline += FAIL_FAST_WINDOW_S
+                if breaches >= windows:
+                    proc.terminate()
+                    proc.wait()
+                    return False
+            time.sleep(0.2)
+    return True
+
+
+def _run_k6(
+    *,
+    base_url: str,
+    workspace_id: str,
+    api_key: str,
+    rate: int,
+    duration_s: int,
+    embedding_version: str,
+    admin_token: str,
+    p95_ms: float,
+    fail_fast_windows: int,
+) -> Path | None:
+    """Run the canary; returns the summary path, or None if it was aborted early."""
     outdir = Path("reports")
     outdir.mkdir(parents=True, exist_ok=True)
     out = outdir / f"k6_canary_{workspace_id}_{embedding_version}_{int(time.time())}.json"
@@ -63,8 +124,26 @@ def _run_k6(*, base_url: str, workspace_id: str, api_key: str, rate: int, durati
         "run",
         "loadtest/k6/retrieval.js",
         f"--summary-export={out}",
+        # Only the stats the cutover gate reads; keeps the export small.
+        "--summary-trend-stats=p(95),p(99)",
     ]
-    subprocess.check_call(cmd, env=env)
+    if fail_fast_windows <= 0:
+        subprocess.check_call(cmd, env=env)
+        return out
+
+    with tempfile.TemporaryDirectory() as tmp:
+        points = Path(tmp) / "points.jsonl"
+        points.touch()
+        proc = subprocess.Popen([*cmd, f"--out=json={points}"], env=env)
+        try:
+            if not _watch_k6(proc, points, p95_ms=p95_ms, windows=fail_fast_windows):
+                return None
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
     return out
 
 
@@ -89,6 +168,13 @@ def main() -> int:
     ap.add_argument("--admin-token", default=os.environ.get("ADMIN_TOKEN", ""))
     ap.add_argument("--fault-injection", type=float, default=0.0)
     ap.add_argument("--max-retries", type=int, default=5)
+    ap.add_argument("--workers", type=int, default=8, help="manifest batches indexed concurrently")
+    ap.add_argument(
+        "--fail-fast-windows",
+        type=int,
+        default=3,
+        help=f"abort the canary after this many consecutive {FAIL_FAST_WINDOW_S:.0f}s windows with p95 over --p95-ms (0 disables)",
+    )
     args = ap.parse_args()
 
     if not args.admin_token:
@@ -105,25 +191,24 @@ def main() -> int:
 
     # 2) Backfill target version
     manifest = build_manifest(workspace_id=args.workspace)
-    cfg = IndexingConfig()
-    cfg = IndexingConfig(
-        batch_size_docs=cfg.batch_size_docs,
-        batch_size_chunks=cfg.batch_size_chunks,
-        embedding_batch_size=cfg.embedding_batch_size,
-        statement_timeout_ms=cfg.statement_timeout_ms,
-        manifest_dir=cfg.manifest_dir,
+    cfg = replace(
+        IndexingConfig(),
         fault_injection_rate=float(args.fault_injection),
         max_retries=int(args.max_retries),
         max_backoff_ms=5000,
+        max_in_flight_batches=int(args.workers),
     )
 
     print(f"Backfilling chunks for embedding_version={args.target} from manifest={manifest}")
     result = run_manifest(str(manifest), workspace_id=args.workspace, cfg=cfg, embedding_version=args.target)
     Path("reports").mkdir(parents=True, exist_ok=True)
-    Path("reports") / ""
     with open(Path("reports") / f"reindex_{args.workspace}_{args.target}_{int(time.time())}.json", "w", encoding="utf-8") as f:
         json.dump(result, f, indent=2)
 
+    # Build the target's ANN index before the canary so it measures real post-cutover latency.
+    print(f"Building ANN index for embedding_version={args.target} (CONCURRENTLY)")
+    ensure_version_index(args.target)
+
     # 3) Canary retrieval using override header (via k6 env)
     print("Running canary loadtest against target embedding_version...")
     summary_path = _run_k6(
@@ -134,26 +219,37 @@ def main() -> int:
         duration_s=args.duration,
         embedding_version=args.target,
         admin_token=args.admin_token,
+        p95_ms=args.p95_ms,
+        fail_fast_windows=args.fail_fast_windows,
     )
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
-    p95 = _read_metric(summary, "http_req_duration", "p(95)")
-    p99 = _read_metric(summary, "http_req_duration", "p(99)")
-    err = _read_metric(summary, "http_req_failed", "rate")
+    if summary_path is None:
+        print(f"Canary aborted: p95 over {args.p95_ms:.0f}ms for {args.fail_fast_windows} consecutive windows.")
+        ok = False
+    else:
+        summary = orjson.loads(summary_path.read_bytes())
+        p95 = _read_metric(summary, "http_req_duration", "p(95)")
+        p99 = _read_metric(summary, "http_req_duration", "p(99)")
+        err = _read_metric(summary, "http_req_failed", "rate")
 
-    print(f"Canary results: p95={p95:.1f}ms p99={p99:.1f}ms err_rate={err:.4f}")
+        print(f"Canary results: p95={p95:.1f}ms p99={p99:.1f}ms err_rate={err:.4f}")
 
-    ok = (p95 <= args.p95_ms) and (p99 <= args.p99_ms) and (err <= args.err_rate)
+        ok = (p95 <= args.p95_ms) and (p99 <= args.p99_ms) and (err <= args.err_rate)
 
     if not ok:
         print("Canary FAILED. Rolling back target and keeping previous active.")
         clear_target_embedding_version(args.workspace)
         set_active_embedding_version(args.workspace, prev_active)
+        # The target's partial index is pure write overhead once it is not served.
+        if args.target != prev_active and drop_version_index_if_unused(args.target):
+            print(f"Dropped ANN index for rolled-back embedding_version={args.target}")
         return 3
 
     # 4) Cutover
     print("Canary OK. Promoting target to active.")
     promote_target_to_active(args.workspace)
+    if prev_active != args.target and drop_version_index_if_unused(prev_active):
+        print(f"Dropped ANN index for retired embedding_version={prev_active}")
 
     print("Cutover complete.")
     return 0
@@ -8,9 +8,13 @@ Examples:
 from __future__ import annotations
 
 import argparse
-import json
+import sys
+import time
+from pathlib import Path
 
-from app.indexing import build_manifest, run_manifest
+import orjson
+
+from app.indexing import IndexingConfig, build_manifest, run_manifest
 
 
 def main() -> None:
@@ -20,6 +24,7 @@ def main() -> None:
     p.add_argument("--manifest", default="", help="Path to manifest jsonl")
     p.add_argument("--limit", type=int, default=0)
     p.add_argument("--embedding-version", default="", help="Override embedding_version tag")
+    p.add_argument("--workers", type=int, default=1, help="Manifest batches indexed concurrently")
     p.add_argument("--out", default="", help="Write run report JSON to this path (default: reports/...) ")
     args = p.parse_args()
 
@@ -32,16 +37,23 @@ def main() -> None:
     if not m:
         raise SystemExit("Either --build-manifest or --manifest must be provided")
 
-    result = run_manifest(m, workspace_id=args.workspace, embedding_version=(args.embedding_version or None))
-    print(json.dumps(result, indent=2))
+    result = run_manifest(
+        m,
+        workspace_id=args.workspace,
+        cfg=IndexingConfig(max_in_flight_batches=args.workers),
+        embedding_version=(args.embedding_version or None),
+    )
+    # Serialize once; the same bytes go to stdout and to the report file.
+    payload = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+    sys.stdout.flush()
+    sys.stdout.buffer.write(payload + b"\n")
+    sys.stdout.buffer.flush()
 
     out = args.out
     if not out:
         Path("reports").mkdir(parents=True, exist_ok=True)
-        import time
         out = f"reports/bulk_index_{args.workspace}_{int(time.time())}.json"
-    with open(out, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
+    Path(out).write_bytes(payload)
     print(f"Wrote report: {out}")
 
 
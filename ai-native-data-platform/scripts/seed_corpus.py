@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Seed a synthetic corpus for local perf tests.
 
-This is intentionally deterministic and dependency-free.
+This is intentionally deterministic (fixed seed) and uses only the app's own dependencies.
 
 Usage:
   DATABASE_URL=... python scripts/seed_corpus.py --workspace demo --docs 500
@@ -10,10 +10,12 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import random
+import csv
+import io
 import uuid
 from datetime import datetime, timezone
 
+import numpy as np
 from sqlalchemy import text
 
 from app.data.db import write_session_scope
@@ -22,14 +24,66 @@ TOPICS = [
     "incident response", "access control", "API key rotation", "observability", "sharding", "evaluation harness", "reliability", "backfill pipelines"
 ]
 
+# Topic for doc i is TOPICS[i & _TOPIC_MASK]; needs a power-of-two topic count.
+assert len(TOPICS) & (len(TOPICS) - 1) == 0
+_TOPIC_MASK = len(TOPICS) - 1
 
-def _doc_text(i: int) -> str:
-    rnd = random.Random(i)
-    topic = TOPICS[i % len(TOPICS)]
-    bullets = []
-    for j in range(12):
-        bullets.append(f"- {topic}: guideline {j} with detail {rnd.randint(1,9999)} and rationale.")
-    return "\n".join(bullets)
+BULLETS_PER_DOC = 12
+SEED = 0
+
+# One %-template per topic holding the whole document, so each doc is a
+# single C-level format call over its detail numbers.
+_TEMPLATES = [
+    "\n".join(f"- {topic}: guideline {j} with detail %d and rationale." for j in range(BULLETS_PER_DOC))
+    for topic in TOPICS
+]
+
+# COPY has no ON CONFLICT, so rows stream into a temp stage and are moved
+# with one INSERT ... SELECT: two statements whatever --docs is.
+DOC_COLUMNS = "id, workspace_id, source_name, external_id, title, text"
+STAGE_TABLE = "_document_seed_stage"
+
+CREATE_STAGE_STMT = text(f"CREATE TEMP TABLE {STAGE_TABLE} (LIKE document INCLUDING DEFAULTS) ON COMMIT DROP")
+COPY_STAGE_SQL = f"COPY {STAGE_TABLE} ({DOC_COLUMNS}) FROM STDIN WITH (FORMAT csv)"
+MERGE_STAGE_STMT = text(
+    f"INSERT INTO document ({DOC_COLUMNS}) SELECT {DOC_COLUMNS} FROM {STAGE_TABLE} "
+    "ON CONFLICT (workspace_id, source_name, external_id) DO NOTHING"
+)
+
+
+def _detail_numbers(docs: int) -> np.ndarray:
+    # One vectorized draw for the whole corpus. Rows come off the stream in
+    # order, so doc i gets the same numbers whatever --docs is.
+    return np.random.default_rng(SEED).integers(1, 10_000, size=(docs, BULLETS_PER_DOC))
+
+
+def _doc_text(i: int, details: list[int]) -> str:
+    return _TEMPLATES[i & _TOPIC_MASK] % tuple(details)
+
+
+class _CsvStream:
+    """Read-only file view of rows as CSV, encoded lazily for copy_expert."""
+
+    def __init__(self, rows) -> None:
+        self._rows = iter(rows)
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf, lineterminator="\n")
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self._pending += self._buf.getvalue()
+            self._buf.seek(0)
+            self._buf.truncate()
+        if size < 0:
+            out, self._pending = self._pending, ""
+        else:
+            out, self._pending = self._pending[:size], self._pending[size:]
+        return out
 
 
 def main() -> int:
@@ -39,26 +93,20 @@ def main() -> int:
     ap.add_argument("--source", default="seed")
     args = ap.parse_args()
 
+    details = _detail_numbers(int(args.docs)).tolist()
+    rows = (
+        (str(uuid.uuid4()), args.workspace, args.source, f"{args.source}-{i}", f"Policy Note {i}", _doc_text(i, d))
+        for i, d in enumerate(details)
+    )
+    # One transaction; rows are generated while COPY streams them, so memory
+    # stays flat for large --docs. No statement_timeout: a big COPY or merge
+    # must not be cancelled by a pool-level default.
     with write_session_scope() as db:
-        for i in range(int(args.docs)):
-            doc_id = str(uuid.uuid4())
-            db.execute(
-                text(
-                    """
-                    INSERT INTO document (id, workspace_id, source_name, external_id, title, text)
-                    VALUES (:id, :w, :s, :e, :t, :x)
-                    ON CONFLICT (workspace_id, source_name, external_id) DO NOTHING
-                    """
-                ),
-                {
-                    "id": doc_id,
-                    "w": args.workspace,
-                    "s": args.source,
-                    "e": f"{args.source}-{i}",
-                    "t": f"Policy Note {i}",
-                    "x": _doc_text(i),
-                },
-            )
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+        db.execute(CREATE_STAGE_STMT)
+        cur = db.connection().connection.cursor()
+        cur.copy_expert(COPY_STAGE_SQL, _CsvStream(rows))
+        db.execute(MERGE_STAGE_STMT)
 
     print(f"Seeded up to {args.docs} docs into workspace={args.workspace}")
     return 0
@@ -1,4 +1,4 @@
-import os
+import time
 
 import pytest
 
@@ -21,8 +21,14 @@ def test_generation_safe_degradation_on_provider_failure(monkeypatch):
 
 
 def test_retrieval_cache_does_not_throw(monkeypatch):
-    # Ensure cache failures behave like misses
-    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:1/0")  # invalid
-    from app.core.cache import Cache
-    c = Cache()
-    assert c.get_json("k") is None
+    # Ensure cache failures behave like misses, and quickly: an unroutable
+    # address must hit the connect timeout rather than the OS default.
+    from app.core.cache import Cache, settings
+
+    monkeypatch.setattr(settings, "redis_socket_timeout_ms", 200)
+    for url in ("redis://127.0.0.1:1/0", "redis://10.255.255.1:6379/0"):
+        monkeypatch.setattr(settings, "redis_url", url)
+        t0 = time.monotonic()
+        c = Cache()
+        assert c.get_json("k") is None
+        assert time.monotonic() - t0 < 1.0
@@ -0,0 +1,46 @@
+"""Tests for chunking helpers shared by ingestion and bulk indexing."""
+from __future__ import annotations
+
+import hashlib
+import uuid
+
+from app.chunking import chunk_hash, chunk_id, chunk_text
+
+
+class TestChunkText:
+
+    def test_empty_text_yields_no_chunks(self):
+        assert chunk_text("") == []
+        assert chunk_text("   ") == []
+
+    def test_short_text_is_single_chunk(self):
+        assert chunk_text("hello world") == ["hello world"]
+
+    def test_long_text_overlaps(self):
+        chunks = chunk_text("a" * 3000, chunk_size=1200, overlap=200)
+        assert len(chunks) == 3
+        assert all(len(c) <= 1200 for c in chunks)
+
+
+class TestChunkHash:
+
+    def test_matches_sha256_hex(self):
+        assert chunk_hash("abc") == hashlib.sha256(b"abc").hexdigest()
+
+    def test_same_text_same_hash(self):
+        assert chunk_hash("boilerplate footer") == chunk_hash("boilerplate footer")
+
+
+class TestChunkId:
+
+    def test_is_deterministic(self):
+        assert chunk_id("doc-1", 0, "v1") == chunk_id("doc-1", 0, "v1")
+
+    def test_is_valid_uuid(self):
+        assert uuid.UUID(chunk_id("doc-1", 0, "v1")).version == 5
+
+    def test_differs_per_conflict_key_component(self):
+        base = chunk_id("doc-1", 0, "v1")
+        assert chunk_id("doc-2", 0, "v1") != base
+        assert chunk_id("doc-1", 1, "v1") != base
+        assert chunk_id("doc-1", 0, "v2") != base
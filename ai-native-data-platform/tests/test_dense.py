@@ -0,0 +1,162 @@
+"""Tests for BatchingDenseRetriever request coalescing with the DB stubbed."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+import app.retrieval.retrievers.dense as dense
+from app.retrieval.retrievers.dense import BatchingDenseRetriever, DenseRetriever
+from app.schemas import RetrievedChunk
+from app.vectorstore.encoding import vec_literal
+
+KW = {"workspace_id": "ws", "k": 3, "database_url": None, "embedding_version": "v1"}
+
+
+def _hit(tag: str) -> list[RetrievedChunk]:
+    return [RetrievedChunk(id=tag, document_id="d", text="t", score=0.5)]
+
+
+@pytest.fixture
+def stub_sql(monkeypatch):
+    calls: dict[str, list] = {"solo": [], "many": []}
+    gate = threading.Event()
+    gate.set()
+
+    def _solo(self, qvec, **kw):
+        calls["solo"].append(qvec)
+        gate.wait(5)
+        return _hit(f"q{qvec[0]:g}")
+
+    def _many(self, qvecs, **kw):
+        calls["many"].append(list(qvecs))
+        return [_hit(f"q{v[0]:g}") for v in qvecs]
+
+    monkeypatch.setattr(DenseRetriever, "_search", _solo)
+    monkeypatch.setattr(BatchingDenseRetriever, "_search_many", _many)
+    return calls, gate
+
+
+class TestBatchingDenseRetriever:
+
+    def test_idle_search_runs_alone(self, stub_sql):
+        calls, _ = stub_sql
+        r = BatchingDenseRetriever(window_ms=50)
+        assert r._search([1.0], **KW)[0].id == "q1"
+        assert calls == {"solo": [[1.0]], "many": []}
+        assert r._inflight == {}
+
+    def test_concurrent_searches_share_one_call(self, stub_sql):
+        calls, gate = stub_sql
+        gate.clear()
+        r = BatchingDenseRetriever(window_ms=100)
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            blocker = ex.submit(r._search, [0.0], **KW)
+            while not calls["solo"]:
+                pass
+            futs = [ex.submit(r._search, [float(i)], **KW) for i in (1, 2, 3)]
+            results = [f.result(timeout=5) for f in futs]
+            gate.set()
+            blocker.result(timeout=5)
+
+        assert [res[0].id for res in results] == ["q1", "q2", "q3"]
+        assert len(calls["many"]) == 1
+        assert sorted(v[0] for v in calls["many"][0]) == [1.0, 2.0, 3.0]
+        assert r._inflight == {} and r._open == {}
+
+    def test_batch_error_reaches_every_waiter(self, stub_sql, monkeypatch):
+        calls, gate = stub_sql
+        gate.clear()
+
+        def _boom(self, qvecs, **kw):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(BatchingDenseRetriever, "_search_many", _boom)
+        r = BatchingDenseRetriever(window_ms=100)
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            blocker = ex.submit(r._search, [0.0], **KW)
+            while not calls["solo"]:
+                pass
+            futs = [ex.submit(r._search, [float(i)], **KW) for i in (1, 2)]
+            for f in futs:
+                with pytest.raises(RuntimeError):
+                    f.result(timeout=5)
+            gate.set()
+            blocker.result(timeout=5)
+
+
+class TestDistanceSql:
+
+    def test_inner_product_by_default(self, monkeypatch):
+        monkeypatch.setattr(dense.settings, "dense_inner_product", True)
+        assert dense._distance_sql("q.vec") == ("c.embedding <#> q.vec", "(-distance)")
+
+    def test_cosine_fallback(self, monkeypatch):
+        monkeypatch.setattr(dense.settings, "dense_inner_product", False)
+        assert dense._distance_sql("q.vec") == ("c.embedding <=> q.vec", "(1 - distance)")
+
+
+class TestVecLiteral:
+
+    def test_pgvector_text_format(self):
+        assert vec_literal([0.5, -1.0, 0.25]) == "[0.5,-1.0,0.25]"
+
+    def test_round_trips_float32(self):
+        v = np.random.default_rng(3).normal(size=64).astype(np.float32)
+        parsed = np.array(vec_literal(v.tolist())[1:-1].split(","), dtype=np.float32)
+        np.testing.assert_array_equal(parsed, v)
+
+
+class TestToChunk:
+
+    def test_chunks_share_the_call_meta(self):
+        meta = {"retriever": "dense", "embedding_version": "v1"}
+        a = dense._to_chunk(("a", "d", 0, "t", 0.9), meta)
+        b = dense._to_chunk(("b", "d", 1, "t", None), meta)
+        assert a.meta is b.meta and b.score == 0.0
+
+
+class TestEfSearch:
+
+    def test_scales_with_k_and_is_clamped(self, monkeypatch):
+        monkeypatch.setattr(dense.settings, "hnsw_ef_search_max", 200)
+        assert [dense._ef_search(k) for k in (5, 25, 100)] == [40, 100, 200]
+
+    def test_set_only_when_changed(self):
+        conn = MagicMock()
+        conn.info = {}
+        dense._set_ef_search(conn, 25)
+        dense._set_ef_search(conn, 25)
+        dense._set_ef_search(conn, 50)
+        assert [c.args[0] for c in conn.exec_driver_sql.call_args_list] == [
+            "SET hnsw.ef_search = 100",
+            "SET hnsw.ef_search = 200",
+        ]
+
+
+class TestPreparedSearch:
+
+    PARAMS = {"qvec": "[1.0]", "workspace_id": "ws", "k": 5, "embedding_version": "v1"}
+
+    def test_prepared_once_per_connection(self, monkeypatch):
+        monkeypatch.setattr(dense.settings, "db_prepared_statements", True)
+        conn = MagicMock()
+        conn.info = {}
+        dense._execute_search(conn, self.PARAMS)
+        dense._execute_search(conn, self.PARAMS)
+        stmts = [c.args[0] for c in conn.exec_driver_sql.call_args_list]
+        assert len(stmts) == 3 and stmts[0].startswith("PREPARE dense_search_")
+        assert "$1" in stmts[0] and "%(" not in stmts[0]
+        name = stmts[0].split()[1]
+        assert stmts[1:] == [f"EXECUTE {name}(%(qvec)s, %(workspace_id)s, %(embedding_version)s, %(k)s)"] * 2
+
+    def test_unprepared_uses_bound_parameters(self, monkeypatch):
+        monkeypatch.setattr(dense.settings, "db_prepared_statements", False)
+        conn = MagicMock()
+        conn.info = {}
+        dense._execute_search(conn, self.PARAMS)
+        (sql, params), _ = conn.exec_driver_sql.call_args
+        assert "CAST(%(qvec)s AS vector)" in sql and params is self.PARAMS
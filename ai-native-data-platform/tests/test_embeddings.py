@@ -0,0 +1,102 @@
+"""Tests for the mock embeddings provider."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from app.providers.embeddings import EMBED_DIM, _hash_to_vec, _hash_to_vec_batch, embed, embed_batch
+
+
+class TestHashToVec:
+
+    def test_batch_is_unit_norm(self):
+        m = _hash_to_vec_batch(["alpha", "beta", "gamma"], 64)
+        assert m.shape == (3, 64)
+        assert m.dtype == np.float32
+        assert np.allclose(np.linalg.norm(m, axis=1), 1.0, atol=1e-5)
+
+    def test_single_matches_batch_row(self):
+        m = _hash_to_vec_batch(["alpha", "beta"], 64)
+        assert np.allclose(_hash_to_vec("beta", 64), m[1])
+
+    def test_empty_batch(self):
+        assert _hash_to_vec_batch([], 8).shape == (0, 8)
+
+    def test_stable_across_processes(self):
+        # The builtin hash() is salted per process; mock vectors must not be.
+        code = "from app.providers.embeddings import embed; print(embed('stable text')[:4])"
+        outs = set()
+        for seed in ("1", "2"):
+            env = {**os.environ, "PYTHONHASHSEED": seed}
+            outs.add(subprocess.check_output([sys.executable, "-c", code], env=env, text=True))
+        assert len(outs) == 1
+
+
+class TestEmbedBatch:
+
+    def test_matches_single_embed(self):
+        texts = ["first chunk", "second chunk"]
+        batch = embed_batch(texts)
+        assert len(batch) == 2 and len(batch[0]) == EMBED_DIM
+        assert np.allclose(batch[1], embed("second chunk"))
+
+    def test_short_inputs_are_normalized(self):
+        assert np.allclose(embed_batch(["", "ab"])[0], embed("empty"))
+
+
+class TestEmbeddingCache:
+
+    def test_provider_called_only_for_misses(self, monkeypatch):
+        import app.providers.embeddings as emb
+        from app.core.cache import Cache
+
+        calls: list[list[str]] = []
+
+        def _fake_provider(texts):
+            calls.append(list(texts))
+            return [[float(len(t)), 0.5] for t in texts]
+
+        monkeypatch.setattr(emb, "PROVIDER", "openai")
+        monkeypatch.setattr(emb, "cache", Cache())
+        monkeypatch.setattr(emb, "_openai_embed_batch", _fake_provider)
+
+        first = embed_batch(["repeated text", "other text", "repeated text"])
+        assert calls == [["repeated text", "other text"]]
+        assert first[0] == first[2] == [13.0, 0.5]
+
+        second = embed_batch(["other text", "repeated text"])
+        assert len(calls) == 1
+        assert second == [[10.0, 0.5], [13.0, 0.5]]
+
+    def test_entries_are_scoped_by_embedding_version(self, monkeypatch):
+        import app.providers.embeddings as emb
+        from app.core.cache import Cache
+
+        calls: list[tuple[str, list[str]]] = []
+        version = ["v1"]
+
+        def _fake_provider(texts):
+            calls.append((version[0], list(texts)))
+            return [[1.0, 0.0] if version[0] == "v1" else [0.0, 1.0] for _ in texts]
+
+        monkeypatch.setattr(emb, "PROVIDER", "openai")
+        monkeypatch.setattr(emb, "cache", Cache())
+        monkeypatch.setattr(emb, "_openai_embed_batch", _fake_provider)
+
+        assert embed_batch(["same text"], embedding_version="v1") == [[1.0, 0.0]]
+        version[0] = "v2"
+        assert embed_batch(["same text"], embedding_version="v2") == [[0.0, 1.0]]
+        assert embed_batch(["same text"], embedding_version="v1") == [[1.0, 0.0]]
+        assert calls == [("v1", ["same text"]), ("v2", ["same text"])]
+
+
+class TestL2Normalize:
+
+    def test_provider_vectors_become_unit_norm(self):
+        from app.providers.embeddings import _l2_normalize
+
+        out = _l2_normalize([[3.0, 4.0], [0.0, 2.0]])
+        np.testing.assert_allclose(out, [[0.6, 0.8], [0.0, 1.0]], rtol=1e-6)
@@ -0,0 +1,27 @@
+"""Tests for experiment config loading in the retrieval factory."""
+from __future__ import annotations
+
+import os
+
+from app.retrieval import factory
+
+
+class TestLoadExperimentConfig:
+
+    def test_parses_yaml_once_per_mtime(self, tmp_path):
+        p = tmp_path / "exp.yaml"
+        p.write_text("retrieval:\n  mode: dense\n", encoding="utf-8")
+        factory._parse_experiment_file.cache_clear()
+
+        first = factory._load_experiment_config(str(p))
+        assert first == {"retrieval": {"mode": "dense"}}
+        assert factory._load_experiment_config(str(p)) is first
+        assert factory._parse_experiment_file.cache_info().misses == 1
+
+        p.write_text("retrieval:\n  mode: lexical\n", encoding="utf-8")
+        st = os.stat(p)
+        os.utime(p, (st.st_atime, st.st_mtime + 10))
+        assert factory._load_experiment_config(str(p)) == {"retrieval": {"mode": "lexical"}}
+
+    def test_missing_experiment_is_empty(self):
+        assert factory._load_experiment_config("does-not-exist") == {}
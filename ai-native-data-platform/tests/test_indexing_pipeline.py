@@ -0,0 +1,291 @@
+"""Tests for the bulk indexing pipeline (run_manifest) with the DB stubbed out."""
+from __future__ import annotations
+
+import itertools
+import json
+import struct
+import threading
+import uuid
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+import app.indexing.pipeline as pipeline
+from app.indexing.pg_copy import COPY_HEADER, COPY_TRAILER, ChunkCopyWriter
+from app.indexing.pipeline import IndexingConfig, run_manifest
+
+D1, D2, D3 = (str(uuid.uuid5(uuid.NAMESPACE_URL, f"doc-{i}")) for i in (1, 2, 3))
+
+
+def _decode_copy(payload: bytes) -> list[dict]:
+    """Minimal COPY BINARY decoder for the document_chunk column layout."""
+    assert payload.startswith(COPY_HEADER) and payload.endswith(COPY_TRAILER)
+    body, pos, rows = payload[: -len(COPY_TRAILER)], len(COPY_HEADER), []
+
+    def _field():
+        nonlocal pos
+        (n,) = struct.unpack_from("!i", body, pos)
+        pos += 4
+        raw = body[pos : pos + n]
+        pos += n
+        return raw
+
+    while pos < len(body):
+        (nfields,) = struct.unpack_from("!h", body, pos)
+        pos += 2
+        assert nfields == 8
+        rid, doc, ws, idx, txt, h, emb, ver = (_field() for _ in range(nfields))
+        dim, _ = struct.unpack_from("!hh", emb)
+        rows.append(
+            {
+                "id": str(uuid.UUID(bytes=rid)),
+                "document_id": str(uuid.UUID(bytes=doc)),
+                "workspace_id": ws.decode(),
+                "chunk_index": struct.unpack("!i", idx)[0],
+                "chunk_text": txt.decode(),
+                "chunk_hash": h.decode(),
+                "embedding": np.frombuffer(emb[4:], dtype=">f4").tolist(),
+                "embedding_version": ver.decode(),
+            }
+        )
+        assert len(rows[-1]["embedding"]) == dim
+    return rows
+
+
+class _FakeDB:
+    """Collects COPY'd chunk rows and serves document rows for the manifest."""
+
+    def __init__(self, docs: dict[str, str]):
+        self.docs = docs
+        self.inserted: list[dict] = []
+        self.fail_next = 0
+        self.fail_error: Exception | None = None
+        self.write_sessions = 0
+        self.savepoint_rollbacks = 0
+
+    @contextmanager
+    def read_scope(self, *args, **kwargs):
+        db = MagicMock()
+        rows = [{"id": k, "text": v} for k, v in self.docs.items()]
+        db.execute.return_value.mappings.return_value.all.return_value = rows
+        yield db
+
+    @contextmanager
+    def write_scope(self, *args, **kwargs):
+        self.write_sessions += 1
+        db = MagicMock()
+
+        def _rollback():
+            self.savepoint_rollbacks += 1
+
+        db.begin_nested.return_value.rollback.side_effect = _rollback
+
+        def _copy_expert(sql, f):
+            if self.fail_next:
+                self.fail_next -= 1
+                raise self.fail_error or pipeline.OperationalError("COPY", {}, Exception("conn reset"))
+            self.inserted.extend(_decode_copy(f.read()))
+
+        db.connection.return_value.connection.cursor.return_value.copy_expert.side_effect = _copy_expert
+        yield db
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = _FakeDB({})
+    monkeypatch.setattr(pipeline, "session_scope", fake.read_scope)
+    monkeypatch.setattr(pipeline, "write_session_scope", fake.write_scope)
+    monkeypatch.setattr(pipeline, "emit_event", lambda *a, **k: None)
+    monkeypatch.setattr(pipeline.time, "sleep", lambda s: None)
+    return fake
+
+
+def _manifest(tmp_path, doc_ids):
+    p = tmp_path / "manifest.jsonl"
+    p.write_text("".join(json.dumps({"document_id": d}) + "\n" for d in doc_ids), encoding="utf-8")
+    return p
+
+
+class TestEmbeddingDedupe:
+
+    def test_identical_chunks_are_embedded_once(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "same boilerplate text", D2: "same boilerplate text", D3: "unique body"}
+        calls: list[list[str]] = []
+
+        def _embed(texts, *, embedding_version=None):
+            calls.append(list(texts))
+            return [[float(len(t)), 0.0] for t in texts]
+
+        monkeypatch.setattr(pipeline, "embed_batch", _embed)
+        out = run_manifest(_manifest(tmp_path, [D1, D2, D3]), workspace_id="ws", embedding_version="v1")
+
+        assert out["indexed_chunks"] == 3
+        assert sum(len(c) for c in calls) == 2
+        by_doc = {r["document_id"]: r for r in fake_db.inserted}
+        assert by_doc[D1]["embedding"] == by_doc[D2]["embedding"]
+        assert by_doc[D1]["chunk_hash"] == by_doc[D2]["chunk_hash"]
+
+
+class TestFlushRetry:
+
+    def test_transient_db_error_is_retried(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "some document text"}
+        fake_db.fail_next = 2
+        monkeypatch.setattr(pipeline, "embed_batch", lambda texts, **_: [[0.0, 1.0] for _ in texts])
+
+        out = run_manifest(_manifest(tmp_path, [D1]), workspace_id="ws", embedding_version="v1")
+        assert out["indexed_chunks"] == 1
+        # Retries roll back a savepoint on the same connection instead of
+        # checking out a new session per attempt.
+        assert fake_db.write_sessions == 1
+        assert fake_db.savepoint_rollbacks == 2
+
+    def test_permanent_db_error_fails_fast(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "some document text"}
+        fake_db.fail_next = 5
+        fake_db.fail_error = IntegrityError("MERGE", {}, Exception("duplicate key"))
+        monkeypatch.setattr(pipeline, "embed_batch", lambda texts, **_: [[0.0, 1.0] for _ in texts])
+
+        with pytest.raises(IntegrityError):
+            run_manifest(_manifest(tmp_path, [D1]), workspace_id="ws", embedding_version="v1")
+        assert fake_db.fail_next == 4
+        assert fake_db.write_sessions == 1
+        assert fake_db.savepoint_rollbacks == 0
+
+    def test_invalidated_connection_is_retried(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "some document text"}
+        fake_db.fail_next = 1
+        fake_db.fail_error = DBAPIError("COPY", {}, Exception("server closed"), connection_invalidated=True)
+        monkeypatch.setattr(pipeline, "embed_batch", lambda texts, **_: [[0.0, 1.0] for _ in texts])
+
+        out = run_manifest(_manifest(tmp_path, [D1]), workspace_id="ws", embedding_version="v1")
+        assert out["indexed_chunks"] == 1
+
+    def test_gives_up_after_max_retries(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "some document text"}
+        fake_db.fail_next = 5
+        monkeypatch.setattr(pipeline, "embed_batch", lambda texts, **_: [[0.0, 1.0] for _ in texts])
+
+        with pytest.raises(pipeline.OperationalError):
+            run_manifest(
+                _manifest(tmp_path, [D1]),
+                workspace_id="ws",
+                embedding_version="v1",
+                cfg=IndexingConfig(max_retries=2),
+            )
+
+
+class TestManifestStreaming:
+
+    def test_processes_manifest_in_doc_batches(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "first doc", D2: "second doc", D3: "third doc"}
+        fetched: list[list[str]] = []
+        read_scope = fake_db.read_scope
+
+        @contextmanager
+        def _tracking_scope(*args, **kwargs):
+            with read_scope() as db:
+                inner = db.execute
+
+                def _execute(stmt, params=None):
+                    fetched.append(list(params["ids"]))
+                    return inner(stmt, params)
+
+                db.execute = _execute
+                yield db
+
+        monkeypatch.setattr(pipeline, "session_scope", _tracking_scope)
+        monkeypatch.setattr(pipeline, "embed_batch", lambda texts, **_: [[0.0, 1.0] for _ in texts])
+
+        out = run_manifest(
+            _manifest(tmp_path, [D1, D2, D3]),
+            workspace_id="ws",
+            embedding_version="v1",
+            cfg=IndexingConfig(batch_size_docs=2),
+        )
+        assert fetched == [[D1, D2], [D3]]
+        assert out["indexed_docs"] == 3
+
+    def test_batches_run_concurrently_when_allowed(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "first doc", D2: "second doc", D3: "third doc"}
+        barrier = threading.Barrier(2, timeout=2)
+        calls = itertools.count()
+
+        def _embed(texts, *, embedding_version=None):
+            # The first two batches must be embedding at the same time.
+            if next(calls) < 2:
+                barrier.wait()
+            return [[0.0, 1.0] for _ in texts]
+
+        monkeypatch.setattr(pipeline, "embed_batch", _embed)
+        out = run_manifest(
+            _manifest(tmp_path, [D1, D2, D3]),
+            workspace_id="ws",
+            embedding_version="v1",
+            cfg=IndexingConfig(batch_size_docs=1, max_in_flight_batches=2),
+        )
+        assert (out["indexed_docs"], out["indexed_chunks"]) == (3, 3)
+        assert sorted(r["document_id"] for r in fake_db.inserted) == sorted([D1, D2, D3])
+
+
+class TestBuildManifest:
+
+    def test_streams_ids_with_yield_per(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value = iter([D1, D2])
+
+        @contextmanager
+        def _scope(*args, **kwargs):
+            yield db
+
+        monkeypatch.setattr(pipeline, "session_scope", _scope)
+        path = pipeline.build_manifest(workspace_id="ws")
+        assert db.execute.call_args.kwargs["execution_options"] == {"yield_per": pipeline.MANIFEST_FETCH_ROWS}
+        assert list(pipeline._iter_doc_ids(path)) == [D1, D2]
+
+
+class TestChunkCopyWriter:
+
+    def test_round_trips_row(self):
+        w = ChunkCopyWriter()
+        w.write_row(
+            id=str(uuid.uuid4()),
+            document_id=D1,
+            workspace_id="ws",
+            chunk_index=7,
+            chunk_text="héllo",
+            chunk_hash="abc",
+            embedding=np.array([0.5, -1.0, 2.0], dtype=np.float32),
+            embedding_version="v2",
+        )
+        (row,) = _decode_copy(w.getvalue())
+        assert w.rows == 1
+        assert row["document_id"] == D1
+        assert row["chunk_index"] == 7
+        assert row["chunk_text"] == "héllo"
+        assert row["embedding"] == [0.5, -1.0, 2.0]
+        assert row["embedding_version"] == "v2"
+
+    def test_empty_payload_is_header_and_trailer(self):
+        assert ChunkCopyWriter().getvalue() == COPY_HEADER + COPY_TRAILER
+
+
+class TestChunkBatchFlush:
+
+    def test_flushes_every_batch_size_chunks(self, fake_db, tmp_path, monkeypatch):
+        fake_db.docs = {D1: "first doc", D2: "second doc", D3: "third doc"}
+        monkeypatch.setattr(pipeline, "embed_batch", lambda texts, **_: [[0.0, 1.0] for _ in texts])
+
+        out = run_manifest(
+            _manifest(tmp_path, [D1, D2, D3]),
+            workspace_id="ws",
+            embedding_version="v1",
+            cfg=IndexingConfig(batch_size_chunks=1, embedding_batch_size=1),
+        )
+        assert out["indexed_chunks"] == 3
+        assert fake_db.write_sessions == 3
+        assert sorted(r["document_id"] for r in fake_db.inserted) == sorted([D1, D2, D3])
@@ -0,0 +1,116 @@
+"""Tests for LexicalRetriever ranking-backend selection with the DB stubbed."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.retrieval.retrievers.lexical as lexical
+
+
+@pytest.fixture(autouse=True)
+def _fresh_detection(monkeypatch):
+    monkeypatch.setattr(lexical, "_bm25_available", {})
+    monkeypatch.setattr(lexical, "_bm25_missing_until", {})
+    monkeypatch.setattr(lexical.settings, "lexical_bm25", True)
+
+
+def _db(index_exists: bool) -> MagicMock:
+    db = MagicMock()
+    db.execute.return_value.scalar.return_value = index_exists
+    return db
+
+
+class TestBm25Detection:
+
+    def test_detected_once_per_dsn(self):
+        db = _db(True)
+        assert lexical._has_bm25(db, "dsn-a")
+        assert lexical._has_bm25(db, "dsn-a")
+        assert db.execute.call_count == 1
+        assert not lexical._has_bm25(_db(False), "dsn-b")
+
+    def test_missing_index_is_rechecked_after_ttl(self, monkeypatch):
+        clock = [100.0]
+        monkeypatch.setattr(lexical.time, "monotonic", lambda: clock[0])
+        db = _db(False)
+        assert not lexical._has_bm25(db, "dsn")
+        assert not lexical._has_bm25(db, "dsn")
+        assert db.execute.call_count == 1
+
+        db.execute.return_value.scalar.return_value = True
+        clock[0] += lexical._BM25_RECHECK_S
+        assert lexical._has_bm25(db, "dsn")
+        clock[0] += 3600
+        assert lexical._has_bm25(db, "dsn")
+        assert db.execute.call_count == 2
+
+    def test_disabled_by_setting(self, monkeypatch):
+        monkeypatch.setattr(lexical.settings, "lexical_bm25", False)
+        db = _db(True)
+        assert not lexical._has_bm25(db, None)
+        db.execute.assert_not_called()
+
+
+class TestTsRankFallback:
+
+    def test_ranks_every_match_by_default(self, monkeypatch):
+        db = _db(False)
+        db.execute.return_value.all.return_value = []
+
+        @contextmanager
+        def _scope(url=None):
+            yield db
+
+        monkeypatch.setattr(lexical, "retrieval_connection", _scope)
+        assert lexical.settings.lexical_rank_candidates == 0
+        lexical.LexicalRetriever().retrieve("ws", "q", 5)
+        sql, params = db.execute.call_args.args
+        assert sql is lexical._TS_RANK_SQL and params["over_k"] is None
+        assert ":over_k" not in str(sql)
+
+    def test_rank_candidates_bound(self, monkeypatch):
+        db = _db(False)
+        db.execute.return_value.all.return_value = []
+
+        @contextmanager
+        def _scope(url=None):
+            yield db
+
+        monkeypatch.setattr(lexical, "retrieval_connection", _scope)
+        monkeypatch.setattr(lexical.settings, "lexical_rank_candidates", 200)
+        lexical.LexicalRetriever().retrieve("ws", "q", 5)
+        sql, params = db.execute.call_args.args
+        assert sql is lexical._TS_RANK_CAPPED_SQL and params["over_k"] == 200
+
+        # The cap never drops below k.
+        lexical.LexicalRetriever().retrieve("ws", "q", 500)
+        assert db.execute.call_args.args[1]["over_k"] == 500
+
+    def test_capped_candidates_are_cut_deterministically(self):
+        # More matches than the cap: which ones get ranked must not depend on
+        # the plan, so the candidate subquery orders by id before its LIMIT.
+        sql = " ".join(str(lexical._TS_RANK_CAPPED_SQL).split())
+        assert "ORDER BY c.id LIMIT :over_k" in sql
+
+
+class TestScoreCandidates:
+
+    def test_scores_only_given_ids(self, monkeypatch):
+        db = _db(True)
+        db.execute.return_value.all.return_value = [("c2", "d2", 0, "t", 1.5)]
+
+        @contextmanager
+        def _scope(url=None):
+            yield db
+
+        monkeypatch.setattr(lexical, "retrieval_connection", _scope)
+        out = lexical.LexicalRetriever(candidates_only=True).score_candidates("ws", "q", ["c1", "c2"])
+        sql, params = db.execute.call_args.args
+        assert sql is lexical._BM25_CANDIDATES_SQL and params["ids"] == ["c1", "c2"]
+        assert [d.id for d in out] == ["c2"]
+
+    def test_no_candidates_skips_db(self, monkeypatch):
+        monkeypatch.setattr(lexical, "retrieval_connection", MagicMock(side_effect=AssertionError))
+        assert lexical.LexicalRetriever().score_candidates("ws", "q", []) == []
@@ -0,0 +1,204 @@
+"""Tests for the LLM provider wrapper (prompt cache, mock generator)."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import app.providers.llm as llm
+import app.providers.prompt_cache as pc
+from app.core.cache import Cache
+from app.providers.llm import CircuitBreaker, _collect_stream_content, _parse_context_blocks
+from app.providers.prompt_cache import SemanticIndex, cached_generate
+
+ANSWER = json.dumps({"answer": "a", "unknown": False, "citations": [], "followups": []})
+UNKNOWN = json.dumps({"answer": "?", "unknown": True, "citations": [], "followups": []})
+
+
+class TestPromptCache:
+
+    def test_exact_hit_skips_provider(self, monkeypatch):
+        monkeypatch.setattr(pc, "cache", Cache())
+        calls: list[str] = []
+
+        def _call(prompt):
+            calls.append(prompt)
+            return ANSWER
+
+        for _ in range(3):
+            assert cached_generate("p", model="m", temperature=0.2, call=_call) == ANSWER
+        assert calls == ["p"]
+        cached_generate("p", model="other", temperature=0.2, call=_call)
+        assert len(calls) == 2
+
+    def test_unknown_answers_are_not_cached(self, monkeypatch):
+        monkeypatch.setattr(pc, "cache", Cache())
+        calls: list[str] = []
+
+        def _call(prompt):
+            calls.append(prompt)
+            return UNKNOWN
+
+        cached_generate("p", model="m", temperature=0.2, call=_call)
+        cached_generate("p", model="m", temperature=0.2, call=_call)
+        assert len(calls) == 2
+
+
+    def test_semantic_hits_are_scoped_and_keyed_by_question(self, monkeypatch):
+        monkeypatch.setattr(pc, "cache", Cache())
+        monkeypatch.setattr(pc, "SEMANTIC_CACHE", True)
+        monkeypatch.setattr(pc, "_semantic", pc.OrderedDict())
+        embedded: list[str] = []
+
+        def _embed(text):
+            embedded.append(text)
+            return [1.0, 0.0] if "revenue" in text else [0.0, 1.0]
+
+        monkeypatch.setattr(pc, "_embed_question", _embed)
+        calls: list[str] = []
+
+        def _call(prompt):
+            calls.append(prompt)
+            return ANSWER
+
+        cached_generate("ctx A revenue?", model="m", temperature=0.2, call=_call, question="revenue?", workspace_id="w1")
+        # Paraphrase in the same scope: served from the semantic tier.
+        cached_generate("ctx A revenue!!", model="m", temperature=0.2, call=_call, question="revenue!!", workspace_id="w1")
+        assert len(calls) == 1
+        assert embedded == ["revenue?", "revenue!!"]
+        # Another tenant, model or temperature never shares entries.
+        cached_generate("ctx B revenue!!", model="m", temperature=0.2, call=_call, question="revenue!!", workspace_id="w2")
+        cached_generate("ctx A revenue!!?", model="m2", temperature=0.2, call=_call, question="revenue!!", workspace_id="w1")
+        cached_generate("ctx A revenue!!!", model="m", temperature=0.7, call=_call, question="revenue!!", workspace_id="w1")
+        assert len(calls) == 4
+
+    def test_no_question_skips_semantic_tier(self, monkeypatch):
+        monkeypatch.setattr(pc, "cache", Cache())
+        monkeypatch.setattr(pc, "SEMANTIC_CACHE", True)
+        monkeypatch.setattr(pc, "_embed_question", lambda text: pytest.fail("should not embed"))
+        assert cached_generate("judge prompt", model="m", temperature=0.0, call=lambda p: ANSWER) == ANSWER
+
+
+class TestSemanticIndex:
+
+    def test_hit_above_threshold_only(self):
+        idx = SemanticIndex(max_items=4, threshold=0.97)
+        idx.put([1.0, 0.0], "x")
+        assert idx.get([0.999, 0.01]) == "x"
+        assert idx.get([0.5, 0.5]) is None
+
+    def test_ring_buffer_evicts_oldest(self):
+        idx = SemanticIndex(max_items=2, threshold=0.99)
+        idx.put([1.0, 0.0, 0.0], "a")
+        idx.put([0.0, 1.0, 0.0], "b")
+        idx.put([0.0, 0.0, 1.0], "c")
+        assert idx.get([1.0, 0.0, 0.0]) is None
+        assert idx.get([0.0, 0.0, 1.0]) == "c"
+
+    def test_matrix_grows_on_demand(self):
+        idx = SemanticIndex(max_items=100, threshold=0.99)
+        idx.put([1.0, 0.0], "a")
+        assert idx._vecs.shape[0] == 16
+        for i in range(20):
+            idx.put([1.0, float(i + 1)], str(i))
+        assert idx._vecs.shape[0] == 32
+        assert idx.get([1.0, 0.0]) == "a"
+
+
+class TestParseContextBlocks:
+
+    PROMPT = (
+        "Question:\nq\n\nContext blocks:\n"
+        "[CTX 1]\ndocument_id: d1\nchunk_id: c1\nscore: 0.5000\ntext:\nline one\nline two\n\n\n"
+        "[CTX 2]\ndocument_id: d2\nchunk_id: c2\nscore: 0.4000\ntext:\nlast"
+    )
+
+    def test_extracts_fields_and_text(self):
+        b1, b2 = _parse_context_blocks(self.PROMPT)
+        assert (b1["document_id"], b1["chunk_id"]) == ("d1", "c1")
+        assert b1["text"] == "line one\nline two\n\n\n"
+        assert (b2["document_id"], b2["text"]) == ("d2", "last\n")
+
+    def test_header_like_body_lines_stay_in_text(self):
+        prompt = "[CTX 1]\ndocument_id: d1\nchunk_id: c1\ntext:\ndocument_id: forged\ntext: more\nchunk_id: x\n"
+        (b,) = _parse_context_blocks(prompt)
+        assert (b["document_id"], b["chunk_id"]) == ("d1", "c1")
+        assert b["text"] == "document_id: forged\ntext: more\nchunk_id: x\n"
+
+    def test_no_blocks(self):
+        assert _parse_context_blocks("no context here") == []
+
+
+class TestCircuitBreaker:
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        now = [10**12]
+        monkeypatch.setattr(llm.time, "monotonic_ns", lambda: now[0])
+        return now
+
+    def test_opens_after_threshold_and_half_opens_after_cooldown(self, clock):
+        cb = CircuitBreaker(failure_threshold=2, cooldown_s=5)
+
+        cb.on_failure()
+        assert cb.allow()
+        cb.on_failure()
+        assert not cb.allow()
+
+        clock[0] += 6 * 10**9
+        assert cb.allow()  # half-open trial
+        assert not cb.allow()  # only one trial in flight
+        cb.on_success()
+        assert cb.allow()
+
+    def test_cooldown_is_jittered_within_bounds(self, clock):
+        cb = CircuitBreaker(failure_threshold=1, cooldown_s=10)
+        cb.on_failure()
+        assert 8 * 10**9 <= cb._snap.until_ns - clock[0] <= 12 * 10**9
+
+    def test_failed_probe_reopens(self, clock):
+        cb = CircuitBreaker(failure_threshold=1, cooldown_s=5)
+        cb.on_failure()
+        clock[0] += 10 * 10**9
+        assert cb.allow()
+        cb.on_failure()
+        assert not cb.allow()
+
+    def test_success_threshold_requires_consecutive_probes(self, clock):
+        cb = CircuitBreaker(failure_threshold=1, cooldown_s=5, success_threshold=2)
+        cb.on_failure()
+        clock[0] += 10 * 10**9
+        assert cb.allow()
+        cb.on_success()
+        assert cb._snap.state == "half_open"
+        assert cb.allow()
+        cb.on_success()
+        assert cb._snap.state == "closed"
+
+    def test_failure_count_is_bounded(self):
+        cb = CircuitBreaker(failure_threshold=3, cooldown_s=5)
+        for _ in range(100):
+            cb.on_failure()
+        assert cb._snap.failures == 6
+
+    def test_success_resets_failure_count(self):
+        cb = CircuitBreaker(failure_threshold=2, cooldown_s=5)
+        cb.on_failure()
+        cb.on_success()
+        cb.on_failure()
+        assert cb.allow()
+
+
+class TestCollectStreamContent:
+
+    def test_joins_deltas_until_done(self):
+        lines = [
+            'data: {"choices":[{"delta":{"role":"assistant"}}]}',
+            "",
+            'data: {"choices":[{"delta":{"content":"{\\"answer\\""}}]}',
+            ": keep-alive",
+            'data: {"choices":[{"delta":{"content":": 1}"}}]}',
+            "data: [DONE]",
+            'data: {"choices":[{"delta":{"content":"ignored"}}]}',
+        ]
+        assert _collect_stream_content(lines) == '{"answer": 1}'
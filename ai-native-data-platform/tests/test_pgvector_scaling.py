@@ -0,0 +1,28 @@
+"""Tests for HNSW prewarming with the retrieval pools stubbed."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import app.vectorstore.pgvector_scaling as scaling
+
+
+def test_prewarm_runs_on_every_shard_and_replica(monkeypatch):
+    seen = []
+
+    @contextmanager
+    def _conn(url=None):
+        conn = MagicMock()
+        conn.execute.return_value.all.return_value = [("idx_a", 10)]
+        yield conn
+        seen.append((url, [str(c.args[0]) for c in conn.execute.call_args_list]))
+
+    monkeypatch.setattr(scaling, "retrieval_connection", _conn)
+    monkeypatch.setattr(scaling, "parse_shards", lambda: ("s1", "s2"))
+    monkeypatch.setattr(scaling, "shard_replicas", lambda: {"s1": ("r1", "s2")})
+
+    assert scaling.prewarm_hnsw_indexes() == 3
+    assert [url for url, _ in seen] == ["s1", "s2", "r1"]
+    stmts = seen[0][1]
+    assert stmts[0] == "SET statement_timeout = 0" and stmts[-1] == "RESET statement_timeout"
+    assert not any("CREATE EXTENSION" in s for s in stmts)
@@ -0,0 +1,92 @@
+"""Tests for the semantic query-vector cache and its DenseRetriever wiring."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import app.retrieval.qvcache as qvc
+import app.retrieval.retrievers.dense as dense
+from app.retrieval.qvcache import QVCache
+from app.retrieval.retrievers.dense import DenseRetriever
+from app.schemas import RetrievedChunk
+
+REGION = ("ws", "v1", 0, None, 5)
+
+
+def _unit(*xs: float) -> np.ndarray:
+    v = np.asarray(xs, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _hits(*ids: str) -> list[RetrievedChunk]:
+    return [RetrievedChunk(id=i, document_id="d", text="t", score=0.5) for i in ids]
+
+
+def _cache(**kw) -> QVCache:
+    return QVCache(**{"threshold": 0.97, "ttl_s": 60, "max_entries": 4, "target_recall": 0.9, **kw})
+
+
+class TestQVCache:
+
+    def test_near_duplicate_hits_and_distant_misses(self):
+        c = _cache()
+        c.put(REGION, _unit(1.0, 0.0), _hits("a"))
+        assert [h.id for h in c.get(REGION, _unit(1.0, 0.05))] == ["a"]
+        assert c.get(REGION, _unit(1.0, 1.0)) is None
+        assert c.get(("ws", "v2", 0, None, 5), _unit(1.0, 0.0)) is None
+
+    def test_returns_copies(self):
+        c = _cache()
+        c.put(REGION, _unit(1.0, 0.0), _hits("a"))
+        c.get(REGION, _unit(1.0, 0.0))[0].score = 99.0
+        assert c.get(REGION, _unit(1.0, 0.0))[0].score == 0.5
+
+    def test_expired_entries_are_ignored(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(qvc.time, "monotonic", lambda: now[0])
+        c = _cache(ttl_s=10)
+        c.put(REGION, _unit(1.0, 0.0), _hits("a"))
+        now[0] += 11
+        assert c.get(REGION, _unit(1.0, 0.0)) is None
+
+    def test_region_matrix_grows_on_demand(self):
+        c = _cache(max_entries=40)
+        c.put(REGION, _unit(1.0, 0.0), _hits("a"))
+        r = c._regions[REGION]
+        assert r.vecs.shape == (16, 2)
+        for i in range(40):
+            c.put(REGION, _unit(float(i), 1.0), _hits(str(i)))
+        assert r.vecs.shape == (40, 2) and r.stored_at.shape == (40,)
+        assert [h.id for h in c.get(REGION, _unit(39.0, 1.0))] == ["39"]
+
+    def test_low_recall_raises_region_threshold(self):
+        c = _cache()
+        c.put(REGION, _unit(1.0, 0.0), _hits("a"))
+        c.record_recall(REGION, _hits("a", "b"), _hits("c", "d"))
+        assert c.threshold(REGION) > 0.97
+        for _ in range(50):
+            c.record_recall(REGION, _hits("c", "d"), _hits("c", "d"))
+        assert c.threshold(REGION) == pytest.approx(0.97)
+
+
+class TestDenseRetrieverCache:
+
+    def test_second_near_duplicate_query_skips_db(self, monkeypatch):
+        monkeypatch.setattr(dense.settings, "qvcache_enabled", True)
+        monkeypatch.setattr(dense.settings, "qvcache_verify_rate", 0.0)
+        monkeypatch.setattr(dense, "qvcache", _cache())
+        monkeypatch.setattr(dense, "get_index_state", lambda ws: SimpleNamespace(index_epoch=1))
+        calls: list[list[float]] = []
+
+        def _search(self, qvec, **kw):
+            calls.append(qvec)
+            return _hits("a", "b")
+
+        monkeypatch.setattr(DenseRetriever, "_search", _search)
+        r = DenseRetriever()
+        first = r.retrieve("ws", "q", 5, query_vec=[1.0, 0.0])
+        second = r.retrieve("ws", "q", 5, query_vec=[1.0, 0.01])
+        assert len(calls) == 1
+        assert [h.id for h in second] == [h.id for h in first]
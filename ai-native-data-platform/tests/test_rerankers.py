@@ -0,0 +1,170 @@
+"""Tests for the MMR and cross-encoder-stub rerankers with embeddings stubbed."""
+from __future__ import annotations
+
+import struct
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+import app.retrieval.rerankers._embcache as embcache
+import app.retrieval.rerankers.cross_encoder_stub as ce
+import app.retrieval.rerankers.mmr as mmr
+from app.retrieval.rerankers._embcache import EmbeddingLRU
+from app.retrieval.rerankers._vectors import decode_vectors, query_cosines, unit_matrix, unit_vector
+from app.retrieval.rerankers.cross_encoder_stub import CrossEncoderStubReranker
+from app.retrieval.rerankers.mmr import MMRReranker
+from app.schemas import RetrievedChunk
+
+EMBS = {
+    "a": [1.0, 0.0, 0.0],
+    "a2": [0.99, 0.1, 0.0],  # near-duplicate of "a"
+    "b": [0.6, 0.8, 0.0],
+}
+
+
+def _docs(*ids: str) -> list[RetrievedChunk]:
+    return [RetrievedChunk(id=i, document_id=f"doc-{i}", text=f"text {i}", score=0.1) for i in ids]
+
+
+@pytest.fixture
+def stub_embeddings(monkeypatch):
+    def _fetch(ids, *, embedding_version):
+        return {i: EMBS[i] for i in ids if i in EMBS}
+
+    monkeypatch.setattr(mmr, "fetch_embeddings", _fetch)
+    monkeypatch.setattr(ce, "fetch_embeddings", _fetch)
+
+
+class TestVectors:
+
+    def test_matches_scalar_cosine(self):
+        E, has = unit_matrix(["a", "b", "missing"], EMBS)
+        assert has.tolist() == [True, True, False]
+        cos = query_cosines(E, unit_vector([1.0, 1.0, 0.0]))
+        assert cos[0] == pytest.approx(1 / np.sqrt(2), rel=1e-5)
+        assert cos[1] == pytest.approx(1.4 / np.sqrt(2), rel=1e-5)
+        assert cos[2] == 0.0
+
+    def test_dimension_mismatch_is_zero(self):
+        E, _ = unit_matrix(["a"], EMBS)
+        assert query_cosines(E, unit_vector([1.0, 0.0])).tolist() == [0.0]
+
+    def test_decode_vectors(self):
+        payloads = [struct.pack("!hh3f", 3, 0, 1.0, 2.0, 3.0), memoryview(struct.pack("!hh3f", 3, 0, -1.0, 0.5, 0.0))]
+        m = decode_vectors(payloads)
+        assert m.dtype == np.float32 and m.shape == (2, 3)
+        assert m.tolist() == [[1.0, 2.0, 3.0], [-1.0, 0.5, 0.0]]
+
+    def test_decode_rejects_mixed_dims(self):
+        with pytest.raises(ValueError):
+            decode_vectors([struct.pack("!hh2f", 2, 0, 1.0, 2.0), struct.pack("!hh3f", 3, 0, 1.0, 2.0, 3.0)])
+
+
+class TestFetchEmbeddings:
+
+    def test_decodes_and_caches_rows(self, monkeypatch):
+        queries: list[list[str]] = []
+
+        @contextmanager
+        def _scope():
+            db = MagicMock()
+
+            def _execute(sql, params):
+                queries.append(list(params["ids"]))
+                rows = [{"chunk_id": cid, "emb": struct.pack("!hh2f", 2, 0, 1.0, float(i))} for i, cid in enumerate(params["ids"])]
+                res = MagicMock()
+                res.mappings.return_value.all.return_value = rows
+                return res
+
+            db.execute.side_effect = _execute
+            yield db
+
+        monkeypatch.setattr(embcache, "read_session_scope", _scope)
+        monkeypatch.setattr(embcache, "_cache", EmbeddingLRU(100))
+        first = embcache.fetch_embeddings(["x", "y"], embedding_version="v1")
+        assert first["y"].tolist() == [1.0, 1.0]
+        embcache.fetch_embeddings(["x", "y", "z"], embedding_version="v1")
+        assert queries == [["x", "y"], ["z"]]
+
+
+class TestEmbeddingLRU:
+
+    def test_evicts_least_recently_used(self):
+        lru = EmbeddingLRU(2)
+        lru.set("v1", "a", np.zeros(2))
+        lru.set("v1", "b", np.zeros(2))
+        assert lru.get("v1", "a") is not None  # "a" is now most recent
+        lru.set("v1", "c", np.zeros(2))
+        hits, missing = lru.mget("v1", ["a", "b", "c"])
+        assert sorted(hits) == ["a", "c"] and missing == ["b"]
+
+    def test_keyed_by_embedding_version(self):
+        lru = EmbeddingLRU(4)
+        lru.set("v1", "a", np.ones(2))
+        assert lru.get("v2", "a") is None
+
+
+class TestMMRReranker:
+
+    def test_prefers_diverse_second_pick(self, stub_embeddings):
+        out = MMRReranker(lambda_=0.3).rerank("q", [1.0, 0.0, 0.0], _docs("a", "a2", "b"), k=2)
+        assert [d.id for d in out] == ["a", "b"]
+        assert all("mmr" in d.meta for d in out)
+
+    def test_missing_embedding_falls_back_to_score(self, stub_embeddings):
+        docs = _docs("a", "nope")
+        docs[1].score = 5.0
+        out = MMRReranker(lambda_=1.0).rerank("q", [1.0, 0.0, 0.0], docs, k=2)
+        assert [d.id for d in out] == ["nope", "a"]
+
+    def test_matches_naive_mmr(self, monkeypatch):
+        rng = np.random.default_rng(7)
+        embs = {f"c{i}": rng.normal(size=8).astype(np.float32) for i in range(30)}
+        monkeypatch.setattr(mmr, "fetch_embeddings", lambda ids, *, embedding_version: embs)
+        q = rng.normal(size=8)
+        lam = 0.6
+
+        def _cos(a, b):
+            return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+        expected: list[str] = []
+        while len(expected) < 10:
+            best = max(
+                (cid for cid in embs if cid not in expected),
+                key=lambda cid: lam * _cos(q, embs[cid])
+                - (1 - lam) * max((_cos(embs[cid], embs[s]) for s in expected), default=0.0),
+            )
+            expected.append(best)
+
+        out = MMRReranker(lambda_=lam).rerank("q", q.tolist(), _docs(*embs), k=10)
+        assert [d.id for d in out] == expected
+
+    def test_k_larger_than_candidates(self, stub_embeddings):
+        assert len(MMRReranker().rerank("q", [1.0, 0.0, 0.0], _docs("a", "b"), k=10)) == 2
+
+
+class TestCrossEncoderStubReranker:
+
+    def test_orders_by_semantic_score(self, stub_embeddings):
+        out = CrossEncoderStubReranker(alpha=1.0).rerank("q", [0.0, 1.0, 0.0], _docs("a", "b"), k=2)
+        assert [d.id for d in out] == ["b", "a"]
+        assert out[0].meta["rerank_sem"] == pytest.approx(0.8, rel=1e-5)
+
+    def test_precomputed_unit_query_matches(self, stub_embeddings):
+        q = [0.0, 3.0, 0.0]
+        a = CrossEncoderStubReranker(alpha=1.0).rerank("q", q, _docs("a", "b"), k=2)
+        b = CrossEncoderStubReranker(alpha=1.0).rerank("q", q, _docs("a", "b"), k=2, query_vec_unit=unit_vector(q))
+        assert [d.score for d in a] == [d.score for d in b]
+
+
+class TestTokenOverlap:
+
+    def test_counts_query_tokens_found_in_doc(self):
+        q = ce._query_tokens("Onboarding is slow slow")
+        assert ce._token_overlap(q, ce._doc_tokens("onboarding takes forever and is SLOW")) == 1.0
+        assert ce._token_overlap(q, ce._doc_tokens("fast setup")) == 0.0
+
+    def test_empty_query(self):
+        assert ce._token_overlap(ce._query_tokens("  "), ce._doc_tokens("anything")) == 0.0
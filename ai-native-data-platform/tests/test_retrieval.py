@@ -0,0 +1,313 @@
+"""Tests for retrieval orchestration helpers with the DB stubbed out."""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.retrieval.consistency as consistency
+import app.retrieval.pipeline as pipeline
+import app.retrieval.routing as routing
+from app.retrieval.consistency import fetch_shard_epochs
+from app.retrieval.pipeline import RetrievalPipeline, _hedged_retrieve
+from app.retrieval.slo import LatencyBudget
+from app.schemas import RetrievedChunk
+
+
+class TestFetchShardEpochs:
+
+    def test_shards_are_queried_concurrently_and_in_order(self, monkeypatch):
+        barrier = threading.Barrier(3, timeout=2)
+
+        @contextmanager
+        def _scope(dsn):
+            # Every shard must be in flight at once to pass the barrier.
+            barrier.wait()
+            db = MagicMock()
+            db.execute.return_value.fetchone.return_value = (f"epoch-{dsn}",)
+            yield db
+
+        monkeypatch.setattr(consistency, "session_scope", _scope)
+        out = fetch_shard_epochs(["s0", "s1", "s2"])
+        assert [e.dsn for e in out] == ["s0", "s1", "s2"]
+        assert [e.index_epoch for e in out] == ["epoch-s0", "epoch-s1", "epoch-s2"]
+
+    def test_failing_shard_reports_unknown_epoch(self, monkeypatch):
+        @contextmanager
+        def _scope(dsn):
+            if dsn == "bad":
+                raise RuntimeError("down")
+            db = MagicMock()
+            db.execute.return_value.fetchone.return_value = ("e1",)
+            yield db
+
+        monkeypatch.setattr(consistency, "session_scope", _scope)
+        out = fetch_shard_epochs(["good", "bad"])
+        assert [e.index_epoch for e in out] == ["e1", None]
+
+
+class _ShardRetriever:
+    """Answers per shard after a configured delay (or raises)."""
+
+    def __init__(self, delays: dict[str, float], fail: set[str] = frozenset()):
+        self.delays = delays
+        self.fail = fail
+        self.calls: list[str] = []
+
+    def retrieve(self, workspace_id, query, k, *, query_vec=None, database_url=None, embedding_version=None):
+        self.calls.append(database_url)
+        time.sleep(self.delays.get(database_url, 0.0))
+        if database_url in self.fail:
+            raise RuntimeError(f"{database_url} down")
+        return [RetrievedChunk(id=f"{database_url}-1", document_id="d", text="t", score=1.0)]
+
+
+def _hedge(r, budget=None):
+    return _hedged_retrieve(
+        r, workspace_id="ws", query="q", k=5, query_vec=[0.0], dsns=["p", "h"], embedding_version="v1", budget=budget
+    )
+
+
+class TestRendezvousRouting:
+
+    SHARDS = tuple(f"dsn{i}" for i in range(12))
+
+    def test_top_shards_match_full_sort(self):
+        for q in ("a", "b", "refund policy"):
+            scores = routing._rendezvous_scores(q, self.SHARDS)
+            ranked = [d for _, d in sorted(zip(scores.tolist(), self.SHARDS), reverse=True)]
+            for n in (1, 3, 12):
+                assert routing._top_shards(q, self.SHARDS, n) == ranked[:n]
+
+    def test_parse_shards_is_cached_per_setting(self, monkeypatch):
+        monkeypatch.setattr(routing.settings, "retrieval_shard_dsns", " a , ,b ")
+        assert routing.parse_shards() == ("a", "b")
+        assert routing.parse_shards() is routing.parse_shards()
+        monkeypatch.setattr(routing.settings, "retrieval_shard_dsns", "")
+        assert routing.parse_shards() == (None,)
+
+    def test_choose_shards_is_deterministic(self, monkeypatch):
+        monkeypatch.setattr(routing.settings, "retrieval_shard_dsns", ",".join(self.SHARDS))
+        monkeypatch.setattr(routing.settings, "retrieval_routing_strategy", "rendezvous")
+        monkeypatch.setattr(routing.settings, "retrieval_shard_fanout", 2)
+        monkeypatch.setattr(routing.settings, "shard_consistency_mode", "best_effort")
+        first = routing.choose_shards("ws", " Refund Policy ").dsns
+        assert len(first) == 2 and first == routing.choose_shards("ws", "refund policy").dsns
+
+    def test_scores_are_well_spread(self):
+        wins = [routing._top_shards(f"q{i}", self.SHARDS, 1)[0] for i in range(1200)]
+        counts = [wins.count(d) for d in self.SHARDS]
+        assert min(counts) > 50 and max(counts) < 150
+
+
+class TestShardReplicas:
+
+    def test_aligned_with_shard_order(self, monkeypatch):
+        monkeypatch.setattr(routing.settings, "retrieval_shard_dsns", "s0,s1,s2")
+        monkeypatch.setattr(routing.settings, "retrieval_shard_replica_dsns", "s0a|s0b,,s2a")
+        assert routing.shard_replicas() == {"s0": ("s0a", "s0b"), "s2": ("s2a",)}
+
+    def test_unset_is_empty(self, monkeypatch):
+        monkeypatch.setattr(routing.settings, "retrieval_shard_replica_dsns", "")
+        assert routing.shard_replicas() == {}
+
+
+class TestLatencyBudget:
+
+    def test_deadline_checks(self, monkeypatch):
+        import app.retrieval.slo as slo
+
+        now = [5_000_000_000]
+        monkeypatch.setattr(slo.time, "monotonic_ns", lambda: now[0])
+        b = LatencyBudget.start(100)
+        now[0] += 40_500_000
+        assert (b.elapsed_ms(), b.remaining_ms()) == (40, 59)
+        assert b.allow(59) and not b.allow(60) and not b.expired()
+        now[0] += 60_000_000
+        assert b.expired() and b.remaining_ms() == 0
+
+
+class TestHedgedRetrieve:
+
+    @pytest.fixture(autouse=True)
+    def _hedge_after(self, monkeypatch):
+        monkeypatch.setattr(pipeline.settings, "shard_hedge_after_ms", 20)
+
+    def test_fast_primary_does_not_hedge(self):
+        r = _ShardRetriever({"p": 0.0})
+        assert [d.id for d in _hedge(r)] == ["p-1"]
+        assert r.calls == ["p"]
+
+    def test_slow_primary_returns_hedge_without_waiting(self):
+        r = _ShardRetriever({"p": 1.0, "h": 0.0})
+        t0 = time.monotonic()
+        assert [d.id for d in _hedge(r)] == ["h-1"]
+        assert time.monotonic() - t0 < 0.5
+
+    def test_failed_primary_falls_back_to_hedge(self):
+        r = _ShardRetriever({}, fail={"p"})
+        assert [d.id for d in _hedge(r)] == ["h-1"]
+
+    def test_both_failing_raises(self):
+        with pytest.raises(RuntimeError):
+            _hedge(_ShardRetriever({}, fail={"p", "h"}))
+
+    def test_budget_shortens_hedge_delay(self, monkeypatch):
+        monkeypatch.setattr(pipeline.settings, "shard_hedge_after_ms", 5_000)
+        r = _ShardRetriever({"p": 1.0, "h": 0.0})
+        t0 = time.monotonic()
+        assert [d.id for d in _hedge(r, budget=LatencyBudget.start(100))] == ["h-1"]
+        assert time.monotonic() - t0 < 0.5
+
+    def test_no_hedge_when_budget_cannot_cover_it(self, monkeypatch):
+        import app.retrieval.slo as slo
+
+        monkeypatch.setattr(slo.LatencyBudget, "allow", lambda self, ms: False)
+        r = _ShardRetriever({"p": 0.1, "h": 0.0})
+        assert [d.id for d in _hedge(r, budget=LatencyBudget.start(1000))] == ["p-1"]
+        assert r.calls == ["p"]
+
+
+class TestCacheKey:
+
+    def test_stable_and_prefixed(self):
+        key = pipeline._cache_key(["ws", "baseline", "v1", "0", "10", "25", "q"])
+        assert key == pipeline._cache_key(["ws", "baseline", "v1", "0", "10", "25", "q"])
+        assert key.startswith("retrieval:") and len(key) == len("retrieval:") + 32
+
+    def test_parts_change_key(self):
+        assert pipeline._cache_key(["ws", "a"]) != pipeline._cache_key(["ws", "b"])
+
+
+class TestFanOut:
+
+    def _fan_out(self, retrievers, dsns, budget_ms=1000):
+        return RetrievalPipeline(retrievers=retrievers)._fan_out(
+            "ws", "q", query_vec=[0.0], k=5, shard_dsns=dsns, embedding_version="v1",
+            budget=LatencyBudget.start(budget_ms),
+        )
+
+    def test_all_calls_run_concurrently(self, monkeypatch):
+        monkeypatch.setattr(pipeline.settings, "retrieval_shard_fanout", 2)
+        barrier = threading.Barrier(4, timeout=2)
+
+        class _R(_ShardRetriever):
+            def retrieve(self, *a, **kw):
+                barrier.wait()
+                return super().retrieve(*a, **kw)
+
+        out = self._fan_out([_R({}), _R({})], ["s0", "s1"])
+        assert [[d.id for d in stage] for stage in out] == [["s0-1", "s1-1"], ["s0-1", "s1-1"]]
+
+    def test_dense_and_lexical_overlap_on_one_shard(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        class _R(_ShardRetriever):
+            def retrieve(self, *a, **kw):
+                barrier.wait()
+                return super().retrieve(*a, **kw)
+
+        dense, lexical = _R({}), _R({})
+        out = self._fan_out([dense, lexical], [None])
+        assert len(out) == 2 and dense.calls == lexical.calls == [None]
+
+    def test_slow_shard_is_hedged_to_its_replica(self, monkeypatch):
+        monkeypatch.setattr(pipeline.settings, "retrieval_shard_fanout", 2)
+        monkeypatch.setattr(pipeline.settings, "shard_hedge_after_ms", 20)
+        monkeypatch.setattr(pipeline, "shard_replicas", lambda: {"s1": ("s1r",)})
+        r = _ShardRetriever({"s1": 1.0})
+        t0 = time.monotonic()
+        out = self._fan_out([r], ["s0", "s1"])
+        assert time.monotonic() - t0 < 0.5
+        assert [[d.id for d in stage] for stage in out] == [["s0-1", "s1r-1"]]
+
+    def test_calls_over_budget_are_dropped(self, monkeypatch):
+        monkeypatch.setattr(pipeline.settings, "retrieval_shard_fanout", 2)
+        out = self._fan_out([_ShardRetriever({"slow": 1.0})], ["fast", "slow"], budget_ms=50)
+        assert [[d.id for d in stage] for stage in out] == [["fast-1"]]
+
+    def test_expired_budget_runs_nothing(self):
+        r = _ShardRetriever({})
+        assert self._fan_out([r], ["s0"], budget_ms=0) == []
+        assert r.calls == []
+
+    def test_candidate_scorer_runs_over_first_pass_hits(self, monkeypatch):
+        monkeypatch.setattr(pipeline.settings, "retrieval_shard_fanout", 2)
+        seen: list[tuple[str, list[str]]] = []
+
+        class _Scorer:
+            candidates_only = True
+
+            def retrieve(self, *a, **kw):
+                raise AssertionError("candidate scorers must not search the corpus")
+
+            def score_candidates(self, workspace_id, query, chunk_ids, *, database_url=None, embedding_version=None):
+                seen.append((database_url, list(chunk_ids)))
+                return _hits(*[c for c in chunk_ids if c.startswith(database_url)])
+
+        out = self._fan_out([_ShardRetriever({}), _Scorer()], ["s0", "s1"])
+        assert [[d.id for d in stage] for stage in out] == [["s0-1", "s1-1"], ["s0-1", "s1-1"]]
+        assert sorted(seen) == [("s0", ["s0-1", "s1-1"]), ("s1", ["s0-1", "s1-1"])]
+
+
+def _hits(*ids: str) -> list[RetrievedChunk]:
+    return [RetrievedChunk(id=i, document_id="d", text="t", score=1.0 / (n + 1)) for n, i in enumerate(ids)]
+
+
+class TestFuse:
+
+    def test_single_stage_is_returned_as_is(self):
+        stage = _hits("a", "b", "c")
+        out = RetrievalPipeline(retrievers=[])._fuse([stage], top_k=2)
+        assert out == stage[:2]
+
+    def test_rrf_ranks_and_does_not_mutate_inputs(self):
+        dense, lexical = _hits("a", "b", "c"), _hits("b", "c", "a")
+        out = RetrievalPipeline(retrievers=[], rrf_k=60)._fuse([dense, lexical], top_k=2)
+        assert [d.id for d in out] == ["b", "a"]
+        assert out[0].score == pytest.approx(1 / 62 + 1 / 61)
+        assert dense[1].score == 0.5
+
+
+class TestCacheHit:
+
+    def test_returns_top_k_and_traces_raw_dicts(self, monkeypatch):
+        from types import SimpleNamespace
+
+        from app.core.cache import Cache
+
+        traces: list[dict] = []
+        monkeypatch.setattr(pipeline, "cache", Cache())
+        monkeypatch.setattr(pipeline, "persist_trace", lambda **kw: traces.append(kw["body"]))
+        monkeypatch.setattr(
+            pipeline,
+            "get_index_state",
+            lambda ws: SimpleNamespace(active_embedding_version="v1", index_epoch=3),
+        )
+        p = RetrievalPipeline(retrievers=[])
+        key = pipeline._cache_key(["ws", "baseline", "v1", "3", "2", "5", "q"])
+        raw = [asdict(h) for h in _hits("a", "b", "c")]
+        pipeline.cache.set_blob(key, pipeline._pack_cached({"hits": raw, "latency_ms": 7}))
+
+        hits, latency_ms = p.run("ws", "Q ", query_vec=[0.0], k=2, rerank_candidates=5)
+        assert [h.id for h in hits] == ["a", "b"] and latency_ms == 7
+        assert traces[0]["cached"] is True
+        assert traces[0]["hits"] == raw[:2]
+
+
+class TestCachedEntryCodec:
+
+    def test_round_trip(self):
+        entry = {"hits": [{"id": "a", "score": 0.25, "meta": {"mmr": 0.5}}], "latency_ms": 3}
+        assert pipeline._unpack_cached(pipeline._pack_cached(entry)) == entry
+
+    def test_garbage_is_a_miss(self):
+        assert pipeline._unpack_cached(b"\xc1") is None
+        assert pipeline._unpack_cached(None) is None
+
+    def test_unencodable_is_not_cached(self):
+        assert pipeline._pack_cached({"hits": [object()]}) is None
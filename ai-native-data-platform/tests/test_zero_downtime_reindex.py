@@ -0,0 +1,76 @@
+"""Tests for the reindex canary's k6 point-stream watcher."""
+from __future__ import annotations
+
+import io
+
+import orjson
+
+import scripts.reindex.zero_downtime_reindex as zdr
+
+
+def _point(ms: float) -> bytes:
+    return orjson.dumps({"type": "Point", "metric": "http_req_duration", "data": {"value": ms}}) + b"\n"
+
+
+class TestTailLines:
+
+    def test_partial_line_waits_for_its_newline(self):
+        f = io.BytesIO(b"a\nb\npar")
+        buf = bytearray()
+        assert zdr._tail_lines(f, buf) == [b"a", b"b"]
+        assert buf == b"par"
+
+        f.write(b"tial\n")
+        f.seek(-5, io.SEEK_CUR)
+        assert zdr._tail_lines(f, buf) == [b"partial"]
+        assert buf == b""
+
+    def test_nothing_new(self):
+        buf = bytearray(b"x")
+        assert zdr._tail_lines(io.BytesIO(b""), buf) == []
+        assert buf == b"x"
+
+
+class _FakeK6:
+    """Appends one latency point per poll; exits after `polls` polls."""
+
+    def __init__(self, path, ms: float, polls: int):
+        self.path, self.ms, self.polls = path, ms, polls
+        self.terminated = False
+
+    def poll(self):
+        if self.polls == 0:
+            return 0
+        self.polls -= 1
+        with self.path.open("ab") as f:
+            f.write(b'{"type":"Metric","metric":"vus"}\n' + _point(self.ms))
+        return None
+
+    def terminate(self):
+        self.terminated = True
+
+    def wait(self):
+        return 0
+
+
+def _watch(monkeypatch, tmp_path, ms: float, polls: int):
+    # Every clock read is one full window later, so each loop closes a window.
+    clock = iter(range(0, 10_000, int(zdr.FAIL_FAST_WINDOW_S)))
+    monkeypatch.setattr(zdr.time, "monotonic", lambda: float(next(clock)))
+    monkeypatch.setattr(zdr.time, "sleep", lambda s: None)
+    points = tmp_path / "points.json"
+    points.touch()
+    proc = _FakeK6(points, ms, polls)
+    return zdr._watch_k6(proc, points, p95_ms=100.0, windows=2), proc
+
+
+class TestWatchK6:
+
+    def test_sustained_breach_aborts(self, monkeypatch, tmp_path):
+        ok, proc = _watch(monkeypatch, tmp_path, ms=500.0, polls=10)
+        assert not ok and proc.terminated
+        assert proc.polls == 8  # stopped after the second breached window
+
+    def test_fast_run_is_not_aborted(self, monkeypatch, tmp_path):
+        ok, proc = _watch(monkeypatch, tmp_path, ms=20.0, polls=10)
+        assert ok and not proc.terminated
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from typing import Annotated, Literal, TypedDict
 
@@ -10,8 +11,6 @@ from langgraph.prebuilt import ToolNode
 
 # 1. Setup
 load_dotenv(override=True)
-if not os.getenv("OPENAI_API_KEY"):
-    raise ValueError("Missing API Key")
 
 # 2. Define the Tools ( The "Hands" of the Agent )
 
@@ -36,65 +35,77 @@ def search_web_wikipedia(query: str):
 # We just need to keep a list of messages (User -> AI -> Tool -> AI)
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    # Set by the chatbot node so the router doesn't re-inspect the last message.
+    needs_tool: bool
 
 # 4. Define the Brain ( The LLM )
 # We "bind" the tools to the model so it knows they exist.
+# Built on first use and reused, so importing this module costs nothing.
 tools = [search_internal_database, search_web_wikipedia]
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-llm_with_tools = llm.bind_tools(tools)
+
+@lru_cache(maxsize=1)
+def get_llm_with_tools():
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("Missing API Key")
+    llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+    return llm.bind_tools(tools)
 
 # 5. Define the Nodes ( The Steps )
 
 def chatbot_node(state: AgentState):
     """The thinking step: LLM decides what to do."""
-    response = llm_with_tools.invoke(state["messages"])
-    return {"messages": [response]}
+    response = get_llm_with_tools().invoke(state["messages"])
+    return {"messages": [response], "needs_tool": bool(getattr(response, "tool_calls", None))}
 
 # 6. Define the Router ( The Decision Logic )
+TOOLS_NODE = "tools"
+
 def router_logic(state: AgentState) -> Literal["tools", "__end__"]:
     """
-    Checks the last message. 
+    Checks the flag the chatbot node set for its last reply.
     If the LLM wants to call a tool -> Go to 'tools' node.
     If the LLM just replied with text -> End.
     """
-    messages = state["messages"]
-    last_message = messages[-1]
-    
-    if last_message.tool_calls:
-        return "tools"
-    return "__end__"
+    return TOOLS_NODE if state.get("needs_tool") else END
 
 # 7. Build the Graph ( The Assembly )
-workflow = StateGraph(AgentState)
+@lru_cache(maxsize=1)
+def get_app():
+    """Compile the graph once per process and reuse it across requests."""
+    workflow = StateGraph(AgentState)
 
-# Add the two main nodes
-workflow.add_node("chatbot", chatbot_node)
-workflow.add_node("tools", ToolNode(tools)) # ToolNode is a pre-built LangGraph component
+    # Add the two main nodes
+    workflow.add_node("chatbot", chatbot_node)
+    workflow.add_node("tools", ToolNode(tools)) # ToolNode is a pre-built LangGraph component
 
-# Define the flow
-workflow.add_edge(START, "chatbot")
+    # Define the flow
+    workflow.add_edge(START, "chatbot")
 
-# Add the "Conditional Edge" (The fork in the road)
-workflow.add_conditional_edges(
-    "chatbot",
-    router_logic
-)
+    # Add the "Conditional Edge" (The fork in the road)
+    workflow.add_conditional_edges(
+        "chatbot",
+        router_logic
+    )
 
-# If a tool was used, go back to the chatbot to generate the final answer
-workflow.add_edge("tools", "chatbot")
+    # If a tool was used, go back to the chatbot to generate the final answer
+    workflow.add_edge("tools", "chatbot")
 
-# Compile the graph
-app = workflow.compile()
+    # Compile the graph
+    return workflow.compile()
 
 # --- 8. TEST IT ---
-print("\n--- TEST 1: Internal Question ---")
-input_1 = {"messages": [("user", "What is the status of Project Omega?")]}
-for event in app.stream(input_1):
-    for key, value in event.items():
-        print(f"Node '{key}': processed.")
-
-print("\n--- TEST 2: External Question ---")
-input_2 = {"messages": [("user", "Who won the World Cup in 2022?")]}
-for event in app.stream(input_2):
-    for key, value in event.items():
-        print(f"Node '{key}': processed.")
\ No newline at end of file
+# Only when run as a script: importing the module must not call the LLM.
+if __name__ == "__main__":
+    app = get_app()
+
+    print("\n--- TEST 1: Internal Question ---")
+    input_1 = {"messages": [("user", "What is the status of Project Omega?")]}
+    for event in app.stream(input_1):
+        for key, value in event.items():
+            print(f"Node '{key}': processed.")
+
+    print("\n--- TEST 2: External Question ---")
+    input_2 = {"messages": [("user", "Who won the World Cup in 2022?")]}
+    for event in app.stream(input_2):
+        for key, value in event.items():
+            print(f"Node '{key}': processed.")
\ No newline at end of file
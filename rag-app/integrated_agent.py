@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Annotated, Literal, TypedDict
 from dotenv import load_dotenv
 
@@ -15,8 +16,12 @@ from llama_index.core import (
     VectorStoreIndex, 
     SimpleDirectoryReader, 
     StorageContext, 
+    Settings,
     load_index_from_storage
 )
+from llama_index.core.ingestion import IngestionPipeline
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.embeddings.openai import OpenAIEmbedding
 from tavily import TavilyClient
 
 # --- 1. SETUP & CONFIGURATION ---
@@ -26,20 +31,66 @@ if not os.getenv("OPENAI_API_KEY"):
     raise ValueError("Missing OPENAI_API_KEY!")
 
 PERSIST_DIR = "./storage"
-
-# --- 2. INITIALIZE LLAMAINDEX RAG (Global Scope) ---
-print("--- Initializing Internal Knowledge Base ---")
-if os.path.exists(PERSIST_DIR):
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
-else:
-    if not os.path.exists("./data"):
-        os.makedirs("./data")
-    documents = SimpleDirectoryReader("./data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-
-rag_engine = index.as_query_engine(similarity_top_k=3)
+DATA_DIR = "./data"
+
+# OpenAI embeddings are rate-limited per request, so send 100 chunks per
+# call instead of LlamaIndex's default of 10.
+EMBED_BATCH_SIZE = 100
+Settings.embed_model = OpenAIEmbedding(embed_batch_size=EMBED_BATCH_SIZE)
+
+# Worker processes for the cold-start build: parsing is CPU-bound and
+# embedding is network-bound, so they overlap across workers.
+INGEST_WORKERS = os.cpu_count() or 1
+
+# --- 2. INITIALIZE LLAMAINDEX RAG (lazily, once per process) ---
+
+def load_documents():
+    # File paths as ids keep a document's id stable across runs, so the
+    # docstore's content hashes can tell which files changed.
+    return SimpleDirectoryReader(DATA_DIR, filename_as_id=True).load_data(num_workers=INGEST_WORKERS)
+
+
+def sync_index(index) -> bool:
+    """Re-embed only new/changed files and drop deleted ones. True if changed."""
+    # SimpleDirectoryReader rejects an empty directory; with no files left,
+    # every indexed document goes in the deletion pass below.
+    documents = load_documents() if any(os.scandir(DATA_DIR)) else []
+    changed = any(index.refresh_ref_docs(documents))
+    current = {doc.id_ for doc in documents}
+    for ref_doc_id in set(index.ref_doc_info) - current:
+        index.delete_ref_doc(ref_doc_id, delete_from_docstore=True)
+        changed = True
+    return changed
+
+
+# Loading or building the index embeds the whole corpus on a cold start, so
+# it happens on the first internal search rather than at import time.
+@lru_cache(maxsize=1)
+def get_rag_engine():
+    print("--- Initializing Internal Knowledge Base ---")
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    if os.path.exists(PERSIST_DIR):
+        storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
+        index = load_index_from_storage(storage_context)
+        if sync_index(index):
+            index.storage_context.persist(persist_dir=PERSIST_DIR)
+    else:
+        documents = load_documents()
+        # Each worker splits and embeds its own slice of the documents.
+        pipeline = IngestionPipeline(transformations=[SentenceSplitter(), Settings.embed_model])
+        nodes = pipeline.run(documents=documents, num_workers=INGEST_WORKERS)
+        index = VectorStoreIndex(nodes)
+        # Record content hashes so later syncs skip unchanged files.
+        for doc in documents:
+            index.docstore.set_document_hash(doc.id_, doc.hash)
+        index.storage_context.persist(persist_dir=PERSIST_DIR)
+    return index.as_query_engine(similarity_top_k=3)
+
+
+# One client per process so web searches reuse its HTTP connection.
+# None when no API key is configured.
+TAVILY = TavilyClient(api_key=os.getenv("TAVILY_API_KEY")) if os.getenv("TAVILY_API_KEY") else None
 
 # --- 3. DEFINE REAL TOOLS ---
 
@@ -49,7 +100,7 @@ def search_internal_database(query: str):
     Useful for questions about internal projects (Omega), salaries, employees, or policies.
     """
     try:
-        response = rag_engine.query(query)
+        response = get_rag_engine().query(query)
         return str(response)
     except Exception as e:
         return f"Error: {e}"
@@ -60,10 +111,9 @@ def search_web_tavily(query: str):
     Useful for general knowledge, current events, or public info.
     """
     try:
-        if not os.getenv("TAVILY_API_KEY"):
+        if TAVILY is None:
             return "Error: Tavily API Key missing."
-        tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-        response = tavily.search(query=query)
+        response = TAVILY.search(query=query)
         return str([result['content'] for result in response['results'][:3]])
     except Exception as e:
         return f"Error searching web: {e}"
@@ -72,6 +122,8 @@ def search_web_tavily(query: str):
 
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    # Set by the chatbot node so the router doesn't re-inspect the last message.
+    needs_tool: bool
 
 tools = [search_internal_database, search_web_tavily]
 llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
@@ -89,15 +141,12 @@ def chatbot_node(state: AgentState):
     # We prepend the system message to the history so the model knows its instructions
     messages = [sys_msg] + state["messages"]
     response = llm_with_tools.invoke(messages)
-    return {"messages": [response]}
+    return {"messages": [response], "needs_tool": bool(getattr(response, "tool_calls", None))}
+
+TOOLS_NODE = "tools"
 
 def router_logic(state: AgentState) -> Literal["tools", "__end__"]:
-    messages = state["messages"]
-    last_message = messages[-1]
-    
-    if last_message.tool_calls:
-        return "tools"
-    return "__end__"
+    return TOOLS_NODE if state.get("needs_tool") else END
 
 # --- 5. BUILD THE GRAPH ---
 workflow = StateGraph(AgentState)
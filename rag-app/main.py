@@ -2,6 +2,8 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
@@ -11,7 +13,7 @@ from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain_openai import ChatOpenAI
 
 try:
@@ -19,8 +21,6 @@ try:
 except ImportError:
     from langchain_community.tools.tavily_search import TavilySearchResults
 
-app_api = FastAPI()
-
 class State(TypedDict):
     messages: Annotated[list, add_messages]
 
@@ -39,8 +39,30 @@ builder.add_edge(START, "chatbot")
 builder.add_conditional_edges("chatbot", tools_condition)
 builder.add_edge("tools", "chatbot")
 
-memory = MemorySaver()
-graph = builder.compile(interrupt_before=["tools"])
+def make_graph():
+    """Graph factory for `langgraph dev` (langgraph.json); the LangGraph
+    server supplies its own persistence."""
+    return builder.compile(interrupt_before=["tools"])
+
+
+# The API persists threads in SQLite instead, so a paused thread survives
+# restarts. SQLite does not support concurrent writers from several
+# processes: run the API with a single uvicorn worker.
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.db")
+
+# Compiled once, in the lifespan, against the SQLite checkpointer.
+graph = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global graph
+    async with AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB) as checkpointer:
+        graph = builder.compile(checkpointer=checkpointer, interrupt_before=["tools"])
+        yield
+
+
+app_api = FastAPI(lifespan=lifespan)
 
 class ChatRequest(BaseModel):
     question: str
@@ -53,7 +75,7 @@ async def ask(req: ChatRequest):
         async for _ in graph.astream({"messages": [("user", req.question)]}, config, stream_mode="values"):
             pass
         
-        snapshot = graph.get_state(config)
+        snapshot = await graph.aget_state(config)
         is_paused = snapshot.next and snapshot.next[0] == "tools"
         
         return {
@@ -74,11 +96,11 @@ async def act(action: str, req: ChatRequest):
                 pass
         elif action == "reject":
             # Provide rejection feedback to the LLM
-            graph.update_state(config, {"messages": [("user", "Action rejected. Please answer directly based on what you know.")]}, as_node="chatbot")
+            await graph.aupdate_state(config, {"messages": [("user", "Action rejected. Please answer directly based on what you know.")]}, as_node="chatbot")
             async for _ in graph.astream(None, config, stream_mode="values"):
                 pass
 
-        final_snapshot = graph.get_state(config)
+        final_snapshot = await graph.aget_state(config)
         return {"answer": final_snapshot.values["messages"][-1].content}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 from typing import Dict, Any, List, Tuple, Optional
+from collections import OrderedDict
+from functools import lru_cache
 import re
+import threading
 
 from .models.state import State
 from .tools import (
@@ -12,7 +15,7 @@ from .tools import (
     generate_ats_summary_and_email,
 )
 from .utils.normalize import normalize_criteria, VALID_CRITERIA
-from .cv_rag import get_cv_rag  # <-- CV RAG integration
+from .cv_rag import get_cv_rag, NOT_FOUND  # <-- CV RAG integration
 
 
 # ------------------------------------------------------------
@@ -20,7 +23,7 @@ from .cv_rag import get_cv_rag  # <-- CV RAG integration
 # ------------------------------------------------------------
 
 VALID_ROLES = [
-    # Longer/more specific variants must come BEFORE shorter ones
+    # The longest role mentioned wins (see extract_role); order breaks ties
     "lead ai engineer",
     "senior machine learning engineer",
     "senior ml engineer",
@@ -47,24 +50,33 @@ VALID_ROLES = [
 
 ROLE_ENDINGS = ["engineer", "scientist", "developer", "researcher"]
 
+# Compiled once at import; used on every turn.
+_ROLE_RE = re.compile(r"\b([a-z0-9 /+_-]+?(engineer|scientist|developer|researcher))\b")
+_PUNCT_RE = re.compile(r"[^\w\s,]+")
+# All known roles in one alternation, longest first. The lookahead makes
+# finditer report a hit at every start position (overlapping), and `s?`
+# accepts plurals ("ml engineers").
+_VALID_ROLES_RE = re.compile(
+    r"(?=\b(" + "|".join(map(re.escape, sorted(VALID_ROLES, key=len, reverse=True))) + r")s?\b)"
+)
+_ROLE_RANK = {r: i for i, r in enumerate(VALID_ROLES)}
+
 
+@lru_cache(maxsize=512)
 def extract_role(text: str) -> Optional[str]:
     """
     Simple heuristic role extraction from free text / job description.
-    No LLM, deterministic & cheap.
+    No LLM, deterministic & cheap — and memoized, since it is pure.
     """
     t = text.lower().strip()
 
-    # direct matches first
-    for r in VALID_ROLES:
-        if r in t:
-            return r.title()
+    # direct matches first: the most specific (longest) known role mentioned
+    hits = {m.group(1) for m in _VALID_ROLES_RE.finditer(t)}
+    if hits:
+        return min(hits, key=lambda r: (-len(r), _ROLE_RANK[r])).title()
 
     # generic "<something> engineer|scientist|developer|researcher"
-    match = re.search(
-        r"\b([a-z0-9 /+_-]+?(engineer|scientist|developer|researcher))\b",
-        t,
-    )
+    match = _ROLE_RE.search(t)
     if match:
         return match.group(1).strip().title()
 
@@ -143,21 +155,48 @@ _HIRING_MARKERS = [
 ]
 
 
-def _looks_like_cv_question(msg: str) -> bool:
+# One alternation per list: a single C-level scan of the message instead of
+# one substring search per keyword. Plain substring semantics, as before.
+_CV_KEYWORD_RE = re.compile("|".join(map(re.escape, CV_QUERY_KEYWORDS)))
+_HIRING_MARKER_RE = re.compile("|".join(map(re.escape, _HIRING_MARKERS)))
+
+
+def _looks_like_cv_question(low: str) -> bool:
     """
     Heuristic to decide if the recruiter is asking something
-    that should be answered from the CV (via RAG).
+    that should be answered from the CV (via RAG). Takes the lower-cased message.
 
     Hiring requests like "I'm hiring a Senior ML Engineer with RAG experience"
     are explicitly excluded even if they contain CV keywords like "experience".
     """
-    low = msg.lower()
-
     # Hiring requests take priority — never route these to CV RAG
-    if any(m in low for m in _HIRING_MARKERS):
+    if _HIRING_MARKER_RE.search(low):
         return False
 
-    return any(k in low for k in CV_QUERY_KEYWORDS)
+    return _CV_KEYWORD_RE.search(low) is not None
+
+
+# Canned recruiter questions are often pasted verbatim; an exact-text hit
+# skips the embedding call and the LLM entirely. Bounded LRU.
+_EXACT_CACHE_MAX = 256
+_EXACT_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_EXACT_CACHE_LOCK = threading.Lock()
+
+
+def _exact_cache_get(key: str) -> Optional[str]:
+    with _EXACT_CACHE_LOCK:
+        answer = _EXACT_CACHE.get(key)
+        if answer is not None:
+            _EXACT_CACHE.move_to_end(key)
+        return answer
+
+
+def _exact_cache_put(key: str, answer: str) -> None:
+    with _EXACT_CACHE_LOCK:
+        _EXACT_CACHE[key] = answer
+        _EXACT_CACHE.move_to_end(key)
+        if len(_EXACT_CACHE) > _EXACT_CACHE_MAX:
+            _EXACT_CACHE.popitem(last=False)
 
 
 def answer_from_cv(state: State, user_message: str) -> Optional[Dict[str, Any]]:
@@ -166,8 +205,12 @@ def answer_from_cv(state: State, user_message: str) -> Optional[Dict[str, Any]]:
     Returns a reply dict or None if something goes wrong.
     """
     try:
-        rag = get_cv_rag()
-        answer = rag.query(user_message)
+        key = user_message.strip().lower()
+        answer = _exact_cache_get(key)
+        if answer is None:
+            answer = get_cv_rag().query(user_message)
+            if answer != NOT_FOUND:
+                _exact_cache_put(key, answer)
 
         # log in lightweight memory so we can inspect later
         remember(
@@ -210,16 +253,18 @@ def _match_criteria_to_project(
     Deterministic, no LLM. Great for transparent "why this fits" reasoning.
     """
     reasons: List[str] = []
-    tags_text = " ".join(project.get("tags", [])).lower()
-    summary_text = project.get("summary", "").lower()
+    # Tags are whole labels: a set lookup per criterion instead of a substring
+    # scan of the joined tag string (which also let "ml" match "html").
+    tags_lc = {t.lower() for t in project.get("tags", [])}
+    summary_lc = project.get("summary", "").lower()
 
     for c in criteria:
         c_low = c.lower()
         evidence: List[str] = []
 
-        if c_low in tags_text:
+        if c_low in tags_lc:
             evidence.append("tags")
-        if c_low in summary_text:
+        if c_low in summary_lc:
             evidence.append("summary")
 
         if not evidence:
@@ -340,6 +385,10 @@ def _get_projects_for_state(state: State) -> Tuple[List[Dict[str, Any]], int]:
     return projects, deep_idx
 
 
+# JD-ish section headers; IGNORECASE avoids lower-casing a long pasted JD.
+_JD_MARKER_RE = re.compile(r"responsibilities|requirements|nice to have|about the role", re.IGNORECASE)
+
+
 def _is_job_description(msg: str) -> bool:
     """
     Very rough heuristic to detect pasted job descriptions.
@@ -347,10 +396,7 @@ def _is_job_description(msg: str) -> bool:
     words = msg.split()
     if len(words) < 20:
         return False
-    # look for JD-ish words
-    jd_markers = ["responsibilities", "requirements", "nice to have", "about the role"]
-    low = msg.lower()
-    return any(m in low for m in jd_markers) or len(words) > 40
+    return len(words) > 40 or _JD_MARKER_RE.search(msg) is not None
 
 
 def _extract_implicit_criteria(msg: str) -> List[str]:
@@ -382,11 +428,11 @@ def _extract_implicit_criteria(msg: str) -> List[str]:
     return normalize_criteria(raw)
 
 
-def _derive_criteria_from_jd(msg: str) -> List[str]:
+def _derive_criteria_from_jd(low: str) -> List[str]:
     """
-    Look for canonical criteria words in a JD and map through normalize_criteria.
+    Look for canonical criteria words in a (lower-cased) JD and map through
+    normalize_criteria.
     """
-    low = msg.lower()
     raw: List[str] = []
 
     if "rag" in low or "retrieval" in low or "embeddings" in low or "vector" in low or "ranking" in low:
@@ -411,6 +457,12 @@ def _derive_criteria_from_jd(msg: str) -> List[str]:
     return normalized
 
 
+# Every known variant → canonical key. VALID_CRITERIA is static, so build once.
+_VARIANT_TO_CANON: Dict[str, str] = {
+    v: canon for canon, variants in VALID_CRITERIA.items() for v in (canon, *variants)
+}
+
+
 def _split_recognized_unrecognized(raw_crit: List[str]) -> Tuple[List[str], List[str]]:
     """
     Using VALID_CRITERIA, separate canonical criteria from extra contextual ones.
@@ -420,30 +472,16 @@ def _split_recognized_unrecognized(raw_crit: List[str]) -> Tuple[List[str], List
     """
     recognized = normalize_criteria(raw_crit)
 
-    # Build a quick lookup of all known variants → canonical
-    variant_to_canon: Dict[str, str] = {}
-    for canon, variants in VALID_CRITERIA.items():
-        variant_to_canon[canon] = canon
-        for v in variants:
-            variant_to_canon[v] = canon
-
     unrecognized: List[str] = []
     for raw in raw_crit:
         x = raw.strip().lower().strip(" .;:,!?")
         if not x:
             continue
-        if x not in variant_to_canon:
+        if x not in _VARIANT_TO_CANON:
             unrecognized.append(raw)
 
     # de-duplicate recognized while preserving order
-    seen = set()
-    dedup_recognized: List[str] = []
-    for c in recognized:
-        if c not in seen:
-            seen.add(c)
-            dedup_recognized.append(c)
-
-    return dedup_recognized, unrecognized
+    return list(dict.fromkeys(recognized)), unrecognized
 
 
 def _format_criteria_confirmation(
@@ -490,6 +528,108 @@ def _format_criteria_confirmation(
 # Main agent logic
 # ------------------------------------------------------------
 
+# Exact-match command words (compared against the normalized message).
+_RESET_CMDS = frozenset({"reset", "start over", "restart"})
+_HELP_CMDS = frozenset({"help", "menu", "options"})
+# "won" and "to"/"too" are common STT substitutions for "one"/"two".
+_NAV_CMDS = frozenset({"1", "one", "won", "deep", "dive", "another", "next", "more",
+                       "yes", "y", "continue", "go", "show", "ok", "okay"})
+_ATS_CMDS = frozenset({"2", "two", "to", "too", "ats", "summary", "ats summary"})
+_SOCIAL_SOURCES = frozenset({"linkedin", "github"})
+_SHORTCUT_ATS = frozenset({"ats", "2", "two", "summary", "ats summary"})
+_SHORTCUT_INTENTS = _SHORTCUT_ATS | {"1", "one", "another", "next", "more"}
+
+# Static replies, kept as module constants; role/criteria-specific
+# replies are still built inline.
+_RESET_REPLY = (
+    "✅ Resetting the recruiter tour.\n\n"
+    "What role are you hiring for?\n"
+    "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
+)
+
+_CHANGE_ROLE_REPLY = (
+    "Sure — let's adjust the target role.\n\n"
+    "What role are you hiring for now?"
+)
+
+_CHANGE_CRITERIA_REPLY = (
+    "Got it — let's update your evaluation criteria.\n\n"
+    "List 1–3 criteria (comma-separated), e.g.:\n"
+    "- production RAG\n"
+    "- ownership\n"
+    "- leadership\n"
+    "- communication"
+)
+
+_HELP_REPLY = (
+    "Here’s what I can do:\n\n"
+    "1. **Project deep dives** – walk you through the most relevant projects.\n"
+    "2. **ATS-style summary** – concise summary + recruiter follow-up email draft.\n"
+    "3. **CV Q&A** – ask about phone number, certifications, skills, location, etc.\n\n"
+    "You can say:\n"
+    "- `1` or `another` → next project deep dive\n"
+    "- `2` or `ats` → ATS summary\n"
+    "- `what is his phone number?` → CV-based answer\n"
+    "- `change role` / `change criteria` / `reset`"
+)
+
+_AUTO_START_REPLY = (
+    "👋 Welcome! What role are you hiring for?\n"
+    "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
+)
+
+_SOCIAL_WELCOME_REPLY = (
+    "👋 Welcome, and thanks for checking out Sergiu’s work.\n\n"
+    "To tailor the tour, what role are you hiring for?\n"
+    "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
+)
+
+_JD_CONTEXT_REPLY = (
+    "Thanks for sharing the job description — I'll keep it in mind for context.\n\n"
+    "Given this JD and your current focus, Sergiu’s strongest matches are:\n"
+    "- **ML/LLM engineering & production-grade systems**\n"
+    "- **RAG / vector search and retrieval pipelines**\n"
+    "- **MLOps: CI/CD, observability, and scalable deployment**\n\n"
+    "You can now:\n"
+    "1) Get a project deep dive (`1` / `another`)\n"
+    "2) Generate an ATS-style summary (`2` / `ats`)"
+)
+
+_JD_NO_ROLE_REPLY = (
+    "Thanks for the job description.\n"
+    "To tailor the tour, what **role title** are you hiring for?\n"
+    "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
+)
+
+_ROLE_NOT_CAUGHT_REPLY = (
+    "I didn’t quite catch the job role.\n\n"
+    "Please specify it explicitly (e.g. **Senior ML Engineer**, **AI Engineer**, **Data Scientist**)."
+)
+
+_NUMERIC_CRITERIA_REPLY = (
+    "To set evaluation criteria, please use meaningful text such as:\n"
+    "• production RAG\n"
+    "• ownership\n"
+    "• leadership\n"
+    "• communication\n\n"
+    "You can list 1–3 criteria, comma-separated."
+)
+
+_SHORT_CRITERIA_REPLY = (
+    "Please provide criteria with a bit more detail "
+    "(e.g. `production RAG`, `ownership`, `communication`)."
+)
+
+_FALLBACK_REPLY = (
+    "You’re set up with a role and criteria.\n\n"
+    "You can:\n"
+    "1) Request a project deep dive (`1`, `another`)\n"
+    "2) Request an ATS-style summary (`2`, `ats`)\n"
+    "Or say `help` to see all options.\n\n"
+    "You can also ask CV-specific questions like phone number, certifications, or skills."
+)
+
+
 def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
     """
     Core orchestrator: implements the role → criteria → project selection → ATS loop,
@@ -507,7 +647,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
     # --------------------------------------------------------
     # Global commands
     # --------------------------------------------------------
-    if low in ["reset", "start over", "restart"]:
+    if low in _RESET_CMDS:
         remember(
             state,
             "session_reset",
@@ -519,11 +659,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
         state.extra.pop("deep_dive_index", None)
 
         return {
-            "reply": (
-                "✅ Resetting the recruiter tour.\n\n"
-                "What role are you hiring for?\n"
-                "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
-            ),
+            "reply": _RESET_REPLY,
             "state": state,
         }
 
@@ -539,10 +675,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
         state.extra.pop("deep_dive_index", None)
 
         return {
-            "reply": (
-                "Sure — let's adjust the target role.\n\n"
-                "What role are you hiring for now?"
-            ),
+            "reply": _CHANGE_ROLE_REPLY,
             "state": state,
         }
 
@@ -557,37 +690,20 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
         state.extra.pop("deep_dive_index", None)
 
         return {
-            "reply": (
-                "Got it — let's update your evaluation criteria.\n\n"
-                "List 1–3 criteria (comma-separated), e.g.:\n"
-                "- production RAG\n"
-                "- ownership\n"
-                "- leadership\n"
-                "- communication"
-            ),
+            "reply": _CHANGE_CRITERIA_REPLY,
             "state": state,
         }
 
-    if low in ["help", "menu", "options"]:
+    if low in _HELP_CMDS:
         return {
-            "reply": (
-                "Here’s what I can do:\n\n"
-                "1. **Project deep dives** – walk you through the most relevant projects.\n"
-                "2. **ATS-style summary** – concise summary + recruiter follow-up email draft.\n"
-                "3. **CV Q&A** – ask about phone number, certifications, skills, location, etc.\n\n"
-                "You can say:\n"
-                "- `1` or `another` → next project deep dive\n"
-                "- `2` or `ats` → ATS summary\n"
-                "- `what is his phone number?` → CV-based answer\n"
-                "- `change role` / `change criteria` / `reset`"
-            ),
+            "reply": _HELP_REPLY,
             "state": state,
         }
 
     # --------------------------------------------------------
     # CV Q&A (RAG) — available ANYTIME
     # --------------------------------------------------------
-    if _looks_like_cv_question(msg):
+    if _looks_like_cv_question(low):
         rag_result = answer_from_cv(state, msg)
         if rag_result is not None:
             return rag_result
@@ -598,20 +714,13 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
     # --------------------------------------------------------
     if low == "recruiter_auto_start":
         return {
-            "reply": (
-                "👋 Welcome! What role are you hiring for?\n"
-                "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
-            ),
+            "reply": _AUTO_START_REPLY,
             "state": state,
         }
 
-    if state.source in ["linkedin", "github"] and state.role is None:
+    if state.source in _SOCIAL_SOURCES and state.role is None:
         return {
-            "reply": (
-                "👋 Welcome, and thanks for checking out Sergiu’s work.\n\n"
-                "To tailor the tour, what role are you hiring for?\n"
-                "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
-            ),
+            "reply": _SOCIAL_WELCOME_REPLY,
             "state": state,
         }
 
@@ -624,13 +733,10 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
 
         # If the user restates a role (e.g. "AI engineer") while already in a session,
         # treat it as wanting to start over with a new role — not a menu command.
-        _NAV_WORDS = {"1", "one", "won", "deep", "dive", "another", "next", "more",
-                      "yes", "y", "continue", "go", "show", "ok", "okay"}
-        _ATS_WORDS = {"2", "two", "to", "too", "ats", "summary", "ats summary"}
         restated_role = extract_role(msg)
-        if restated_role and low not in _NAV_WORDS and \
-                low not in _ATS_WORDS and \
-                not _is_job_description(msg) and not _looks_like_cv_question(msg):
+        if restated_role and low not in _NAV_CMDS and \
+                low not in _ATS_CMDS and \
+                not _is_job_description(msg) and not _looks_like_cv_question(low):
             remember(state, "change_role", {"old_role": state.role})
             state.role = restated_role
             state.criteria = []
@@ -650,9 +756,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
 
         # OPTION 1: deep dive / another / yes / next
         # Also match short phrases containing a nav word (e.g. "next one", "show next")
-        _NAV = _NAV_WORDS | {"another"}
-        _low_words = low.split()
-        if low in _NAV or any(w in _NAV for w in _low_words):
+        if low in _NAV_CMDS or not _NAV_CMDS.isdisjoint(low.split()):
             total = len(projects)
             if total == 0:
                 # ultra-defensive, should never happen
@@ -681,7 +785,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
             return {"reply": reply, "state": state}
 
         # OPTION 2: ATS summary  ("to"/"too" are common STT substitutions for "two")
-        if low in ["2", "two", "to", "too", "ats", "summary", "ats summary"]:
+        if low in _ATS_CMDS:
             # Ensure projects shortlist exists
             projects, _ = _get_projects_for_state(state)
             summaries = generate_ats_summary_and_email(role, criteria, projects)
@@ -714,16 +818,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
                 {"text": msg, "role": role, "criteria": criteria},
             )
             return {
-                "reply": (
-                    "Thanks for sharing the job description — I'll keep it in mind for context.\n\n"
-                    "Given this JD and your current focus, Sergiu’s strongest matches are:\n"
-                    "- **ML/LLM engineering & production-grade systems**\n"
-                    "- **RAG / vector search and retrieval pipelines**\n"
-                    "- **MLOps: CI/CD, observability, and scalable deployment**\n\n"
-                    "You can now:\n"
-                    "1) Get a project deep dive (`1` / `another`)\n"
-                    "2) Generate an ATS-style summary (`2` / `ats`)"
-                ),
+                "reply": _JD_CONTEXT_REPLY,
                 "state": state,
             }
 
@@ -759,11 +854,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
                 {"text": msg},
             )
             return {
-                "reply": (
-                    "Thanks for the job description.\n"
-                    "To tailor the tour, what **role title** are you hiring for?\n"
-                    "Examples: **Senior ML Engineer, AI Engineer, Data Scientist**."
-                ),
+                "reply": _JD_NO_ROLE_REPLY,
                 "state": state,
             }
 
@@ -800,9 +891,8 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
             }
 
         # Detect shortcut intents sent before a role is established
-        _SHORTCUT_INTENTS = {"ats", "2", "two", "summary", "ats summary", "1", "one", "another", "next", "more"}
-        if low.strip() in _SHORTCUT_INTENTS:
-            intent_label = "ATS summary" if low.strip() in {"ats", "2", "two", "summary", "ats summary"} else "project deep dive"
+        if low in _SHORTCUT_INTENTS:
+            intent_label = "ATS summary" if low in _SHORTCUT_ATS else "project deep dive"
             return {
                 "reply": (
                     f"To generate the **{intent_label}** I need to know the target role first.\n\n"
@@ -812,10 +902,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
             }
 
         return {
-            "reply": (
-                "I didn’t quite catch the job role.\n\n"
-                "Please specify it explicitly (e.g. **Senior ML Engineer**, **AI Engineer**, **Data Scientist**)."
-            ),
+            "reply": _ROLE_NOT_CAUGHT_REPLY,
             "state": state,
         }
 
@@ -825,7 +912,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
     if not state.criteria:
         # If recruiter pasted a JD here *after* giving role, derive criteria
         if _is_job_description(msg):
-            crit = _derive_criteria_from_jd(msg)
+            crit = _derive_criteria_from_jd(low)
             state.criteria = crit
             remember(
                 state,
@@ -847,19 +934,12 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
         # reject pure numbers like "2"
         if msg.isdigit():
             return {
-                "reply": (
-                    "To set evaluation criteria, please use meaningful text such as:\n"
-                    "• production RAG\n"
-                    "• ownership\n"
-                    "• leadership\n"
-                    "• communication\n\n"
-                    "You can list 1–3 criteria, comma-separated."
-                ),
+                "reply": _NUMERIC_CRITERIA_REPLY,
                 "state": state,
             }
 
         # remove punctuation: leadershi; → leadership
-        clean_msg = re.sub(r"[^\w\s,]+", "", msg).strip()
+        clean_msg = _PUNCT_RE.sub("", msg).strip()
 
         # parse into list
         if "," in clean_msg:
@@ -871,10 +951,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
         else:
             if len(clean_msg) < 3:
                 return {
-                    "reply": (
-                        "Please provide criteria with a bit more detail "
-                        "(e.g. `production RAG`, `ownership`, `communication`)."
-                    ),
+                    "reply": _SHORT_CRITERIA_REPLY,
                     "state": state,
                 }
             raw_crit = [clean_msg]
@@ -904,14 +981,7 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
     # Final fallback (should rarely hit)
     # --------------------------------------------------------
     return {
-        "reply": (
-            "You’re set up with a role and criteria.\n\n"
-            "You can:\n"
-            "1) Request a project deep dive (`1`, `another`)\n"
-            "2) Request an ATS-style summary (`2`, `ats`)\n"
-            "Or say `help` to see all options.\n\n"
-            "You can also ask CV-specific questions like phone number, certifications, or skills."
-        ),
+        "reply": _FALLBACK_REPLY,
         "state": state,
     }
 
@@ -922,6 +992,19 @@ def agent_turn(state: State, user_message: str) -> Dict[str, Any]:
 
 
 
+# One scan of the JD; each hit reports its signal via the named group.
+# Leading word boundary only, so "html"/"storage" don't count as ML/RAG
+# while "llms" or "leadership" still do.
+_MATCH_SIGNALS_RE = re.compile(
+    r"(?P<ml>\b(?:ml|machine learning|llm|rag|genai|gemini))"
+    r"|(?P<senior>\bsenior)"
+    r"|(?P<lead>\b(?:lead|manager))"
+    r"|(?P<frontend>\b(?:frontend|mobile))"
+    r"|(?P<embedded>\b(?:embedded|firmware))",
+    re.IGNORECASE,
+)
+
+
 def analyze_match(match_request: Any) -> MatchResponse:
     """Compatibility layer for the older /match endpoint.
 
@@ -932,20 +1015,20 @@ def analyze_match(match_request: Any) -> MatchResponse:
     job_text = getattr(job, "text", "") if job is not None else ""
 
     # Very simple, deterministic scoring based on keywords
-    text_low = job_text.lower()
+    signals = {m.lastgroup for m in _MATCH_SIGNALS_RE.finditer(job_text)}
     strengths: List[str] = []
     risks: List[str] = []
 
-    if any(k in text_low for k in ["ml", "machine learning", "llm", "rag", "genai", "gemini"]):
+    if "ml" in signals:
         strengths.append("Direct experience with ML/LLM and production RAG systems.")
-    if "senior" in text_low:
+    if "senior" in signals:
         strengths.append("Multiple years owning end-to-end ML products and infra.")
-    if "lead" in text_low or "manager" in text_low:
+    if "lead" in signals:
         strengths.append("Track record of technical leadership and mentoring.")
 
-    if "frontend" in text_low or "mobile" in text_low:
+    if "frontend" in signals:
         risks.append("Primary experience is ML/LLM; pure frontend/mobile roles may be a weaker fit.")
-    if "embedded" in text_low or "firmware" in text_low:
+    if "embedded" in signals:
         risks.append("Little focus on low-level or embedded systems in recent work.")
 
     if not strengths:
@@ -970,7 +1053,7 @@ def analyze_match(match_request: Any) -> MatchResponse:
         pass
 
     overall = "Strong match for ML/LLM-focused roles."
-    if "frontend" in text_low or "mobile" in text_low or "embedded" in text_low:
+    if signals & {"frontend", "embedded"}:
         overall = "Potential match, but role seems less ML/LLM-focused."
 
     summary = Summary(
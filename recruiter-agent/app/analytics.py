@@ -1,15 +1,65 @@
 # app/analytics.py
 
 from __future__ import annotations
+import atexit
 import json
 import logging
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import deque
+from typing import Any, Deque, Dict, Optional
 
 # Cloud Run auto-parses JSON logs if you log to stdout
 logger = logging.getLogger("analytics")
 logger.setLevel(logging.INFO)
 
+# Events are serialized in emit (so later mutation of a payload can't change
+# what gets logged) and written by a daemon thread, one log record per event,
+# so a turn never waits on stdout. The buffer is bounded: on a burst the
+# oldest events are dropped rather than growing memory.
+_BUFFER_MAX = 10_000
+_BATCH_SIZE = 128
+_FLUSH_INTERVAL_S = 0.05
+
+_buffer: Deque[str] = deque(maxlen=_BUFFER_MAX)
+_wake = threading.Event()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+
+def flush() -> None:
+    """Write everything buffered so far, one JSON log record per event.
+
+    Called from both the flush thread and atexit, so the drain tolerates the
+    other side emptying the deque first.
+    """
+    while True:
+        try:
+            line = _buffer.popleft()
+        except IndexError:
+            return
+        try:
+            logger.info(line)
+        except Exception:
+            # Never break the agent because of telemetry
+            pass
+
+
+def _flush_loop() -> None:
+    while True:
+        _wake.wait(_FLUSH_INTERVAL_S)
+        _wake.clear()
+        flush()
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="analytics-flush", daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
 
 def emit(event: str, payload: Optional[Dict[str, Any]] = None) -> None:
     """
@@ -17,12 +67,19 @@ def emit(event: str, payload: Optional[Dict[str, Any]] = None) -> None:
     Aligned with Google Agents course: log intent, tools, outcome.
     """
     try:
-        record = {
-            "ts": time.time(),
-            "event": event,
-            "payload": payload or {},
-        }
-        logger.info(json.dumps(record))
+        line = json.dumps(
+            {
+                "ts": time.time(),
+                "event": event,
+                "payload": payload or {},
+            }
+        )
+        if _flusher is None:
+            _ensure_flusher()
+        _buffer.append(line)
+        if len(_buffer) >= _BATCH_SIZE:
+            _wake.set()
     except Exception:
-        # Never break the agent because of telemetry
+        # Never break the agent because of telemetry (including an
+        # unserializable payload, which only loses that event)
         pass
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,5 +13,7 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 9191
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    # Parse env/.env once per process; FastAPI deps can call this per request.
     return Settings()
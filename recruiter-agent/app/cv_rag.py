@@ -10,9 +10,13 @@ import numpy as np
 from google import genai
 from google.genai import types
 
+from .semantic_cache import SemanticCache
+
 EMBED_MODEL = "models/text-embedding-004"
 GEN_MODEL = "gemini-2.5-flash"
 
+NOT_FOUND = "I couldn't find this information in Sergiu’s CV."
+
 _client: "genai.Client | None" = None
 _rag: Optional["CVRAG"] = None
 
@@ -343,6 +347,8 @@ class CVRAG:
         self.cv_text: str = cv_text
         self.chunks: List[str] = _chunk_text(cv_text)
         self._embeddings: Optional[np.ndarray] = None  # lazy
+        # Near-duplicate questions reuse an earlier LLM answer.
+        self._answer_cache = SemanticCache()
 
     def _ensure_embeddings(self) -> bool:
         """Compute embeddings once on first query."""
@@ -360,21 +366,17 @@ class CVRAG:
         self._embeddings = embs
         return True
 
-    def _retrieve_top_k(self, question: str, k: int = 3) -> List[str]:
+    def _retrieve_top_k(self, question: str, q_vec: Optional[np.ndarray], k: int = 3) -> List[str]:
         """
         Retrieve top-k chunks using cosine similarity + simple token boosts.
         """
-        if not self.chunks:
+        if not self.chunks or q_vec is None:
             return []
 
         if not self._ensure_embeddings():
             # No embeddings available
             return []
 
-        q_vec = _embed_text(question, task_type="retrieval_query")
-        if q_vec is None:
-            return []
-
         assert self._embeddings is not None
         sims = _cosine_sim_matrix(q_vec, self._embeddings)
         if sims.size == 0:
@@ -464,16 +466,24 @@ class CVRAG:
         if direct is not None:
             return direct
 
-        # 2) Retrieve relevant snippets for general questions.
-        relevant_chunks = self._retrieve_top_k(question, k=3)
+        # 2) Semantic cache: the query embedding is needed for retrieval
+        #    anyway, so a near-duplicate question costs no extra call.
+        q_vec = _embed_text(question, task_type="retrieval_query") if self.chunks else None
+        if q_vec is not None:
+            cached = self._answer_cache.get(q_vec)
+            if cached is not None:
+                return cached
+
+        # 3) Retrieve relevant snippets for general questions.
+        relevant_chunks = self._retrieve_top_k(question, q_vec, k=3)
         if not relevant_chunks:
-            return "I couldn't find this information in Sergiu’s CV."
+            return NOT_FOUND
 
         context = "\n\n---\n\n".join(relevant_chunks)
 
-        # 3) If Gemini isn't configured, avoid dumping raw context; be conservative.
+        # 4) If Gemini isn't configured, avoid dumping raw context; be conservative.
         if not _try_configure_client():
-            return "I couldn't find this information in Sergiu’s CV."
+            return NOT_FOUND
 
         prompt = f"""
 You are helping a recruiter understand a candidate's fit based ONLY on their CV.
@@ -494,12 +504,15 @@ Instructions:
             resp = _client.models.generate_content(model=GEN_MODEL, contents=prompt)  # type: ignore[union-attr]
             text = getattr(resp, "text", None)
             if text:
-                return text.strip()
+                answer = text.strip()
+                # Only real answers are cached; failures should be retried.
+                self._answer_cache.put(q_vec, answer)
+                return answer
             # Fallback if no text field but call succeeded
-            return "I couldn't find this information in Sergiu’s CV."
+            return NOT_FOUND
         except Exception:
             # Strict fallback: do not leak raw CV chunks
-            return "I couldn't find this information in Sergiu’s CV."
+            return NOT_FOUND
 
 
 # ---------------------------
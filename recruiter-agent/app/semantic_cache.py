@@ -0,0 +1,66 @@
+# app/semantic_cache.py — in-process semantic answer cache for CV Q&A
+
+from __future__ import annotations
+
+from typing import List, Optional
+import os
+import threading
+
+import numpy as np
+
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("CV_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ITEMS = int(os.environ.get("CV_SEMANTIC_CACHE_MAX_ITEMS", "512"))
+
+
+class SemanticCache:
+    """
+    Remembers Gemini answers to recent CV questions.
+
+    CVRAG.query already embeds each question for retrieval; the same vector is
+    compared against the stored questions, and a paraphrase at or above
+    `threshold` cosine gets the earlier answer without another LLM call.
+    Holds at most `max_items` answers, replacing the oldest first.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_items: int = SEMANTIC_CACHE_MAX_ITEMS) -> None:
+        self.threshold = float(threshold)
+        self.max_items = max(1, int(max_items))
+        self._lock = threading.Lock()
+        self._vecs: Optional[np.ndarray] = None
+        self._answers: List[str] = []
+        self._next = 0
+
+    @staticmethod
+    def _unit(vec: np.ndarray) -> Optional[np.ndarray]:
+        v = np.asarray(vec, dtype=np.float32).ravel()
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else None
+
+    def get(self, vec: np.ndarray) -> Optional[str]:
+        """Cached answer for the most similar question above the threshold, else None."""
+        q = self._unit(vec)
+        if q is None:
+            return None
+        with self._lock:
+            if self._vecs is None or not self._answers or self._vecs.shape[1] != q.shape[0]:
+                return None
+            sims = self._vecs[: len(self._answers)] @ q
+            i = int(sims.argmax())
+            return self._answers[i] if sims[i] >= self.threshold else None
+
+    def put(self, vec: np.ndarray, answer: str) -> None:
+        v = self._unit(vec)
+        if v is None:
+            return
+        with self._lock:
+            if self._vecs is None or self._vecs.shape[1] != v.shape[0]:
+                self._vecs = np.zeros((self.max_items, v.shape[0]), dtype=np.float32)
+                self._answers = []
+                self._next = 0
+            i = self._next
+            self._vecs[i] = v
+            if i < len(self._answers):
+                self._answers[i] = answer
+            else:
+                self._answers.append(answer)
+            self._next = (i + 1) % self.max_items
@@ -12,6 +12,7 @@ from opentelemetry import trace
 from pydantic import BaseModel
 
 from .agent import agent_turn
+from .analytics import emit
 from .voice import voice_bench_handler, voice_handler
 from .critic_agent import get_critic_session_summary, validate_turn
 from .mcp import call_mcp_tool, list_mcp_tools
@@ -87,6 +88,7 @@ async def chat_endpoint(req: ChatRequest) -> ChatResponse:
     Every turn emits:
     - An OTel span with session/role/criteria attributes
     - A structured trajectory log (user step + agent step with timestamps)
+    - A `chat_turn` analytics event (role, criteria, reply length)
     """
     session_id = req.session_id or "default-session"
     tracer = trace.get_tracer(SERVICE_NAME)
@@ -153,6 +155,17 @@ async def chat_endpoint(req: ChatRequest) -> ChatResponse:
             extra={"json_fields": trajectory.to_dict()},
         )
 
+        emit(
+            "chat_turn",
+            {
+                "session_id": session_id,
+                "source": req.source,
+                "role": new_state.role,
+                "criteria": new_state.criteria,
+                "reply_length": len(reply),
+            },
+        )
+
     # Persist to SQLite so voice and future turns can recover even if client loses state
     try:
         save_session(session_id, new_state)
@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+from app import agent
+from app.cv_rag import NOT_FOUND
+from app.models.state import State
+
+
+def test_generic_role_suffix_is_extracted():
+    assert agent.extract_role("We need a prompt engineer for our team") == "We Need A Prompt Engineer"
+    assert agent.extract_role("no role in here") is None
+
+
+def test_punctuation_is_stripped_from_criteria():
+    assert agent._PUNCT_RE.sub("", "leadershi; ownership!") == "leadershi ownership"
+    assert agent._PUNCT_RE.sub("", "rag, evals") == "rag, evals"
+
+
+def test_cv_questions_and_hiring_requests():
+    assert agent._looks_like_cv_question("what is his phone number?")
+    assert agent._looks_like_cv_question("which certifications does he have")
+    assert not agent._looks_like_cv_question("i'm hiring a senior ml engineer with rag experience")
+    assert not agent._looks_like_cv_question("next")
+
+
+class _FakeRAG:
+    def __init__(self, answer):
+        self.answer = answer
+        self.questions = []
+
+    def query(self, question):
+        self.questions.append(question)
+        return self.answer
+
+
+def test_identical_cv_questions_hit_the_exact_cache(monkeypatch):
+    rag = _FakeRAG("AWS Certified ML Specialty")
+    monkeypatch.setattr(agent, "get_cv_rag", lambda: rag)
+    monkeypatch.setattr(agent, "_EXACT_CACHE", agent.OrderedDict())
+
+    first = agent.answer_from_cv(State(), "Which certifications does he have?")
+    second = agent.answer_from_cv(State(), "  which certifications does he have?  ")
+    assert first["reply"] == second["reply"]
+    assert "AWS Certified ML Specialty" in second["reply"]
+    assert rag.questions == ["Which certifications does he have?"]
+
+
+def test_not_found_answers_are_not_cached(monkeypatch):
+    rag = _FakeRAG(NOT_FOUND)
+    monkeypatch.setattr(agent, "get_cv_rag", lambda: rag)
+    monkeypatch.setattr(agent, "_EXACT_CACHE", agent.OrderedDict())
+
+    agent.answer_from_cv(State(), "what is his shoe size?")
+    agent.answer_from_cv(State(), "what is his shoe size?")
+    assert len(rag.questions) == 2
+
+
+def test_exact_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(agent, "_EXACT_CACHE", agent.OrderedDict())
+    monkeypatch.setattr(agent, "_EXACT_CACHE_MAX", 2)
+    agent._exact_cache_put("a", "1")
+    agent._exact_cache_put("b", "2")
+    assert agent._exact_cache_get("a") == "1"  # "a" is now most recent
+    agent._exact_cache_put("c", "3")
+    assert agent._exact_cache_get("b") is None
+    assert agent._exact_cache_get("a") == "1"
+
+
+def test_known_roles_accept_plurals():
+    assert agent.extract_role("We are hiring ML engineers") == "Ml Engineer"
+    assert agent.extract_role("Looking for data scientists") == "Data Scientist"
+
+
+def test_most_specific_known_role_wins():
+    assert agent.extract_role("hiring a ml engineer or senior ml engineer") == "Senior Ml Engineer"
+    assert agent.extract_role("Senior ML Engineer, RAG focus") == "Senior Ml Engineer"
+    assert agent.extract_role("voice ai engineer wanted") == "Voice Ai Engineer"
+
+
+def test_known_roles_match_whole_words_only():
+    assert agent.extract_role("html engineer") == "Html Engineer"
+
+
+def test_unrecognized_criteria_are_kept_as_context():
+    recognized, unrecognized = agent._split_recognized_unrecognized(["Leadership.", "RAG", "kubernetes"])
+    assert recognized[:2] == ["leadership", "production_rag"]
+    assert unrecognized == ["kubernetes"]
+
+
+def test_criteria_match_whole_project_tags():
+    project = {"tags": ["HTML", "Leadership"], "summary": "Built a dashboard."}
+    reasons = agent._match_criteria_to_project(project, ["leadership", "ml"])
+    assert reasons == ["- **leadership**: explicitly supported in the project tags."]
+
+
+def test_recognized_criteria_are_deduped_in_order():
+    recognized, _ = agent._split_recognized_unrecognized(["ownership", "rag", "Ownership", "production rag"])
+    assert recognized == ["ownership", "production_rag"]
+
+
+def test_job_description_detection():
+    filler = " ".join(["word"] * 20)
+    assert agent._is_job_description("RESPONSIBILITIES: " + filler)
+    assert agent._is_job_description(" ".join(["word"] * 41))
+    assert not agent._is_job_description(" ".join(["word"] * 30))
+    assert not agent._is_job_description("Requirements: python")
+
+
+def test_extract_role_is_memoized():
+    agent.extract_role.cache_clear()
+    agent.extract_role("hiring a data scientist")
+    agent.extract_role("hiring a data scientist")
+    info = agent.extract_role.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def _no_rag():
+    raise RuntimeError("no index")
+
+
+def test_match_signals_use_word_starts(monkeypatch):
+    monkeypatch.setattr(agent, "get_cv_rag", _no_rag)
+    job = SimpleNamespace(text="Senior LLMs engineer; some firmware work")
+    summary = agent.analyze_match(SimpleNamespace(job=job)).summary
+    assert len(summary.strengths) == 2
+    assert summary.overall_fit == "Potential match, but role seems less ML/LLM-focused."
+
+    job = SimpleNamespace(text="HTML and storage work")
+    summary = agent.analyze_match(SimpleNamespace(job=job)).summary
+    assert summary.strengths == ["Solid background in ML/LLM engineering, RAG, and production systems."]
+    assert summary.overall_fit == "Strong match for ML/LLM-focused roles."
+
+
+def test_jd_criteria_from_lowercased_text():
+    assert agent._derive_criteria_from_jd("you will lead a retrieval team") == ["production_rag", "leadership"]
+    assert agent._derive_criteria_from_jd("nothing relevant") == ["production_rag", "ownership"]
+
+
+def test_command_words_route_turns(monkeypatch):
+    state = State(role="Ml Engineer", criteria=["ownership"])
+    assert agent.agent_turn(state, "Restart.")["reply"] == agent._RESET_REPLY
+    assert state.role is None and state.criteria == []
+
+    monkeypatch.setattr(agent, "_get_projects_for_state", lambda s: ([], 0))
+    monkeypatch.setattr(
+        agent, "generate_ats_summary_and_email", lambda role, criteria, projects: {"ats": "ATS", "email": "EMAIL"}
+    )
+    state = State(role="Ml Engineer", criteria=["ownership"])
+    reply = agent.agent_turn(state, "To.")["reply"]
+    assert "ATS-ready Summary" in reply and "EMAIL" in reply
+
+
+def test_help_reply_is_the_shared_constant():
+    state = State()
+    assert agent.agent_turn(state, "Help!")["reply"] is agent._HELP_REPLY
+    assert agent.agent_turn(state, "menu")["reply"] is agent._HELP_REPLY
@@ -0,0 +1,31 @@
+import json
+import logging
+
+from app import analytics
+
+
+def test_events_are_serialized_at_emit_and_logged_one_per_record(monkeypatch, caplog):
+    monkeypatch.setattr(analytics, "_flusher", object())  # no background drain
+    monkeypatch.setattr(analytics, "_buffer", analytics.deque(maxlen=10))
+
+    payload = {"role": "Ml Engineer"}
+    analytics.emit("chat_turn", payload)
+    payload["role"] = "changed later"
+    analytics.emit("bad", {"obj": object()})
+    analytics.emit("chat_turn", {"role": None})
+
+    with caplog.at_level(logging.INFO, logger="analytics"):
+        analytics.flush()
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "analytics"]
+    assert [r["payload"] for r in records] == [{"role": "Ml Engineer"}, {"role": None}]
+    assert not analytics._buffer
+
+
+def test_buffer_drops_oldest_events_when_full(monkeypatch):
+    monkeypatch.setattr(analytics, "_flusher", object())
+    monkeypatch.setattr(analytics, "_buffer", analytics.deque(maxlen=2))
+
+    for i in range(3):
+        analytics.emit("e", {"i": i})
+    assert [json.loads(line)["payload"]["i"] for line in analytics._buffer] == [1, 2]
@@ -0,0 +1,11 @@
+from app.config import get_settings
+
+
+def test_settings_are_parsed_once(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    get_settings.cache_clear()
+    try:
+        assert get_settings() is get_settings()
+        assert get_settings().GOOGLE_API_KEY == "test-key"
+    finally:
+        get_settings.cache_clear()
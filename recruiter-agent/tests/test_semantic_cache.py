@@ -0,0 +1,31 @@
+import numpy as np
+
+from app.semantic_cache import SemanticCache
+
+
+def test_paraphrase_above_threshold_hits():
+    cache = SemanticCache(threshold=0.92, max_items=4)
+    cache.put(np.array([1.0, 0.0, 0.0]), "AWS, GCP")
+    # cosine ~0.995: same question, slightly different wording
+    assert cache.get(np.array([1.0, 0.1, 0.0])) == "AWS, GCP"
+
+
+def test_below_threshold_and_empty_miss():
+    cache = SemanticCache(threshold=0.92, max_items=4)
+    assert cache.get(np.array([1.0, 0.0])) is None
+    cache.put(np.array([1.0, 0.0]), "a")
+    # cosine ~0.89
+    assert cache.get(np.array([1.0, 0.5])) is None
+    assert cache.get(np.zeros(2)) is None
+    # a different embedding size never matches
+    assert cache.get(np.array([1.0, 0.0, 0.0])) is None
+
+
+def test_oldest_answer_is_evicted_when_full():
+    cache = SemanticCache(threshold=0.99, max_items=2)
+    cache.put(np.array([1.0, 0.0, 0.0]), "a")
+    cache.put(np.array([0.0, 1.0, 0.0]), "b")
+    cache.put(np.array([0.0, 0.0, 1.0]), "c")
+    assert cache.get(np.array([1.0, 0.0, 0.0])) is None
+    assert cache.get(np.array([0.0, 1.0, 0.0])) == "b"
+    assert cache.get(np.array([0.0, 0.0, 1.0])) == "c"